@@ -0,0 +1,107 @@
+"""
+Bulk export of stored CVs as a streaming ZIP archive of PDFs.
+
+CVs are loaded and rendered a few at a time (CV_EXPORT_CONCURRENCY) in the
+render worker pool, and each archive entry is sent as soon as its render
+completes. Only the CVs currently in flight are held in memory, however
+many CVs are exported.
+
+Each CV is loaded as its owner (cv["user_id"]) through load_content, which
+returns the same text its download renders, so an export entry and a
+download of that CV are the same PDF (and share a render-cache entry).
+"""
+
+import asyncio
+import os
+import zipfile
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from pdf_renderer import CV_PDF_RENDERER
+from render_cache import render_cache, render_cache_key
+from render_service import render_service
+from tenancy import user_scope
+
+CV_EXPORT_CONCURRENCY = int(os.getenv("CV_EXPORT_CONCURRENCY", str(max(1, render_service.workers))))
+
+class ZipStreamSink:
+    """Write-only file object for zipfile: collects archive bytes until drained.
+
+    zipfile notices the sink cannot seek and writes sizes in data
+    descriptors after each entry, so nothing has to be rewritten later.
+    """
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+def export_entry_name(cv: Dict, extension: str) -> str:
+    safe_title = "".join(c for c in (cv.get("title") or "") if c.isalnum() or c in (' ', '-', '_')).strip() or "cv"
+    return f"{cv['id']:05d}_{safe_title}.{extension}"
+
+async def _render_cv(cv: Dict, load_content: Callable[[int], Optional[str]]) -> bytes:
+    with user_scope(cv["user_id"]):
+        content = await asyncio.to_thread(load_content, cv["id"])
+    if content is None:
+        raise LookupError("CV was deleted during the export")
+    # Same key as a selected-projects download with no projects: both render this exact document
+    cache_key = render_cache_key(content, [], renderer=CV_PDF_RENDERER,
+                                 extra={"projects": [], "date": datetime.now().date().isoformat()})
+    data, _ = await asyncio.to_thread(
+        render_cache.get_or_render, cache_key,
+        lambda: render_service.render({"template": "cv", "content": content, "projects": []}))
+    return data
+
+async def stream_cv_export(cvs: List[Dict], load_content: Callable[[int], Optional[str]],
+                           concurrency: int = CV_EXPORT_CONCURRENCY) -> AsyncIterator[bytes]:
+    """Yield a ZIP archive of the given CVs (dicts with id, title and user_id), one entry per completed render.
+
+    A CV that cannot be rendered is exported as a .error.txt entry instead of
+    aborting the archive.
+    """
+    sink = ZipStreamSink()
+    archive = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED)  # PDFs are already compressed
+    queue = iter(cvs)
+    pending = {}
+    exported = failed = 0
+
+    def schedule_next():
+        cv = next(queue, None)
+        if cv is not None:
+            pending[asyncio.ensure_future(_render_cv(cv, load_content))] = cv
+
+    try:
+        for _ in range(max(1, concurrency)):
+            schedule_next()
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                cv = pending.pop(task)
+                try:
+                    data = task.result()
+                    extension = "pdf" if data.startswith(b"%PDF") else "txt"
+                    archive.writestr(export_entry_name(cv, extension), data)
+                    exported += 1
+                except Exception as e:
+                    print(f"❌ Export of CV {cv['id']} failed: {e}")
+                    archive.writestr(export_entry_name(cv, "error.txt"), f"Could not render CV {cv['id']}: {e}\n")
+                    failed += 1
+                schedule_next()
+                yield sink.drain()
+        archive.close()
+        yield sink.drain()
+        print(f"📦 Exported {exported} CVs ({failed} failed)")
+    finally:
+        for task in pending:
+            task.cancel()
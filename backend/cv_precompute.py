@@ -0,0 +1,266 @@
+"""
+Background preparation of AI-formatted CVs.
+
+Downloads used to call OpenAI (apply pending cv_updates, then format the
+whole CV) before they could render anything. A background thread now does
+that work ahead of time:
+
+- users with unprocessed cv_updates get them applied to their active CV
+  (a new CV version),
+- any active CV whose latest state has not been formatted yet is assembled
+  with the user's manual projects (the same document /cv/enhanced/ shows),
+  formatted and stored in prepared_cvs,
+- other CVs are formatted from their own text once they are downloaded
+  (request()), since most of them never are.
+
+Every change to a CV's content records a version (cv_versions) and every
+change to a user's projects bumps their project_revisions row, so a prepared
+row is current exactly when its source_version and source_projects_revision
+are the latest ones. Downloads only read a current prepared row and render it.
+
+The thread polls every CV_PREPARE_INTERVAL_SECONDS and is woken early after
+write requests. CV_PREPARE_INTERVAL_SECONDS=0 disables it (run_once() can
+still be called directly).
+"""
+
+import os
+import threading
+import time
+from typing import Callable, List, Optional
+
+from cv_versions import update_active_cv_content
+from db import get_db_cursor_context
+from tenancy import user_scope
+
+CV_PREPARE_INTERVAL_SECONDS = float(os.getenv("CV_PREPARE_INTERVAL_SECONDS", "30"))
+CV_PREPARE_BATCH_SIZE = int(os.getenv("CV_PREPARE_BATCH_SIZE", "20"))
+
+_LATEST_VERSION = "COALESCE((SELECT MAX(version_number) FROM cv_versions WHERE cv_id = {cv}), 0)"
+_PROJECTS_REVISION = "COALESCE((SELECT revision FROM project_revisions WHERE user_id = {user}), 0)"
+# Only the active CV is assembled with projects; other CVs are prepared from their own text (-1)
+NO_PROJECTS = -1
+_EXPECTED_PROJECTS_REVISION = (f"CASE WHEN c.is_active THEN {_PROJECTS_REVISION.format(user='c.user_id')} "
+                               f"ELSE {NO_PROJECTS} END")
+
+def source_markers(cursor, cv_id: int, user_id: str) -> tuple:
+    """(latest version, projects revision) of a CV: two indexed lookups that change whenever its text or
+    the user's projects do"""
+    cursor.execute(f"SELECT {_LATEST_VERSION.format(cv='?')}, {_PROJECTS_REVISION.format(user='?')}",
+                   (cv_id, user_id))
+    return tuple(cursor.fetchone())
+
+def get_prepared_content(cursor, cv_id: int) -> Optional[str]:
+    """Formatted content of cv_id if it was prepared from the CV's latest version and projects"""
+    cursor.execute(f'''SELECT p.formatted_content FROM prepared_cvs p JOIN cvs c ON c.id = p.cv_id
+                       WHERE p.cv_id = ? AND p.source_version = {_LATEST_VERSION.format(cv='c.id')}
+                         AND p.source_projects_revision = {_EXPECTED_PROJECTS_REVISION}''', (cv_id,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+# Only active CVs are prepared ahead of time; other CVs wait until a download requests them
+_STALE_CVS = f'''FROM cvs c LEFT JOIN prepared_cvs p ON p.cv_id = c.id
+                  WHERE c.is_active = TRUE
+                    AND (p.cv_id IS NULL OR p.source_version <> {_LATEST_VERSION.format(cv='c.id')}
+                         OR p.source_projects_revision <> {_EXPECTED_PROJECTS_REVISION})'''
+
+def _stale_cvs(cursor, limit: int) -> List[tuple]:
+    """(cv_id, user_id) of CVs with no prepared row for their latest version, least recently changed first"""
+    cursor.execute(f"SELECT c.id, c.user_id {_STALE_CVS} ORDER BY c.updated_at LIMIT ?", (limit,))
+    return cursor.fetchall()
+
+def _users_with_pending_updates(cursor, limit: int) -> List[str]:
+    """Users with unprocessed updates, longest waiting first so no user is starved by the batch limit"""
+    cursor.execute('''SELECT user_id FROM cv_updates WHERE processed = FALSE
+                      GROUP BY user_id ORDER BY MIN(created_at), user_id LIMIT ?''', (limit,))
+    return [row[0] for row in cursor.fetchall()]
+
+def _active_cv(cursor, user_id: str) -> Optional[tuple]:
+    """(cv_id, current_content, latest version) of the user's active CV"""
+    cursor.execute("SELECT id, current_content FROM cvs WHERE user_id = ? AND is_active = TRUE LIMIT 1", (user_id,))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    cursor.execute(f"SELECT {_LATEST_VERSION.format(cv='?')}", (row[0],))
+    return row[0], row[1], cursor.fetchone()[0]
+
+class CVPreparer:
+    """Applies pending updates and formats changed CVs off the request path.
+
+    enhance(content, updates) and format_cv(content) are the (slow, AI-backed)
+    transformations; they run outside any database transaction.
+    assemble(cursor) returns the current user's active CV with their projects
+    integrated, without writing anything.
+    """
+
+    def __init__(self, enhance: Callable[[str, List[tuple]], str], format_cv: Callable[[str], str],
+                 assemble: Callable[[object], str],
+                 interval: float = CV_PREPARE_INTERVAL_SECONDS, batch_size: int = CV_PREPARE_BATCH_SIZE):
+        self.enhance = enhance
+        self.format_cv = format_cv
+        self.assemble = assemble
+        self.interval = interval
+        self.batch_size = max(1, batch_size)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._run_lock = threading.Lock()
+        self._requested_lock = threading.Lock()
+        self._requested: dict = {}  # cv_id -> user_id, in request order
+        self._stats = {"runs": 0, "updates_applied": 0, "prepared": 0, "failed": 0, "last_run_ms": None}
+
+    def apply_pending_updates(self, user_id: str) -> bool:
+        """Fold the user's unprocessed cv_updates into their active CV; False if there was nothing to do"""
+        with user_scope(user_id):
+            with get_db_cursor_context() as (cursor, conn):
+                active = _active_cv(cursor, user_id)
+                if not active:
+                    return False
+                cursor.execute('''SELECT id, update_type, content FROM cv_updates
+                                  WHERE user_id = ? AND processed = FALSE ORDER BY created_at, id''', (user_id,))
+                rows = cursor.fetchall()
+            if not rows:
+                return False
+            cv_id, content, version = active
+            enhanced = self.enhance(content, [(update_type, text) for _, update_type, text in rows])
+
+            with get_db_cursor_context() as (cursor, conn):
+                current = _active_cv(cursor, user_id)
+                if current is None or current[0] != cv_id or current[2] != version:
+                    # The CV changed while we were enhancing: start over from the new content next run
+                    return False
+                placeholders = ",".join("?" * len(rows))
+                cursor.execute(f"UPDATE cv_updates SET processed = TRUE WHERE id IN ({placeholders})",
+                               [row[0] for row in rows])
+                update_active_cv_content(cursor, enhanced, f"Applied {len(rows)} updates")
+        return True
+
+    def prepare_cv(self, cv_id: int, user_id: str) -> bool:
+        """Format cv_id's latest state (with projects, if it is the active CV) and store it;
+        False if the CV no longer exists"""
+        with user_scope(user_id):
+            with get_db_cursor_context() as (cursor, conn):
+                cursor.execute("SELECT current_content, is_active FROM cvs WHERE id = ? AND user_id = ?",
+                               (cv_id, user_id))
+                row = cursor.fetchone()
+                if not row:
+                    return False
+                version, projects_revision = source_markers(cursor, cv_id, user_id)
+                # Read in the same transaction as the markers, so they describe this exact text
+                if row[1]:
+                    source = self.assemble(cursor)
+                else:
+                    source, projects_revision = row[0], NO_PROJECTS
+            formatted = self.format_cv(source)
+
+            with get_db_cursor_context() as (cursor, conn):
+                # A newer version or project change meanwhile simply leaves this row stale for the next run
+                cursor.execute('''INSERT INTO prepared_cvs (cv_id, user_id, source_version, source_projects_revision,
+                                                           formatted_content)
+                                  VALUES (?, ?, ?, ?, ?)
+                                  ON CONFLICT (cv_id) DO UPDATE SET
+                                      source_version = excluded.source_version,
+                                      source_projects_revision = excluded.source_projects_revision,
+                                      formatted_content = excluded.formatted_content,
+                                      prepared_at = CURRENT_TIMESTAMP''',
+                               (cv_id, user_id, version, projects_revision, formatted))
+        return True
+
+    def _take_requested(self) -> List[tuple]:
+        with self._requested_lock:
+            taken = list(self._requested.items())[:self.batch_size]
+            for cv_id, _ in taken:
+                del self._requested[cv_id]
+        return taken
+
+    def run_once(self) -> dict:
+        """One pass: apply pending updates, then prepare stale active CVs and requested CVs
+        (at most batch_size of each)"""
+        with self._run_lock:
+            started = time.perf_counter()
+            applied = prepared = failed = 0
+            with get_db_cursor_context() as (cursor, conn):
+                users = _users_with_pending_updates(cursor, self.batch_size)
+            for user_id in users:
+                try:
+                    applied += self.apply_pending_updates(user_id)
+                except Exception as e:
+                    print(f"❌ Applying CV updates for {user_id} failed: {e}")
+                    failed += 1
+
+            with get_db_cursor_context() as (cursor, conn):
+                stale = _stale_cvs(cursor, self.batch_size)
+            requested = []
+            stale_ids = {row[0] for row in stale}
+            for cv_id, user_id in self._take_requested():
+                with get_db_cursor_context() as (cursor, conn):
+                    # Already in this pass's stale list, or prepared since it was requested
+                    if cv_id in stale_ids or get_prepared_content(cursor, cv_id) is not None:
+                        continue
+                requested.append((cv_id, user_id))
+            for cv_id, user_id in list(stale) + requested:
+                try:
+                    prepared += self.prepare_cv(cv_id, user_id)
+                except Exception as e:
+                    print(f"❌ Preparing CV {cv_id} failed: {e}")
+                    failed += 1
+
+            self._stats["runs"] += 1
+            self._stats["updates_applied"] += applied
+            self._stats["prepared"] += prepared
+            self._stats["failed"] += failed
+            self._stats["last_run_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            if applied or prepared:
+                print(f"🪄 Prepared {prepared} CVs, applied updates for {applied} users")
+            # A full, productive batch means more work is probably waiting
+            more = bool(applied or prepared) and self.batch_size in (len(users), len(stale))
+            with self._requested_lock:
+                more = more or bool(self._requested)
+            return {"updates_applied": applied, "prepared": prepared, "failed": failed, "more": more}
+
+    def wake(self):
+        """Run a pass now instead of at the next poll (cheap; safe to call from any thread)"""
+        self._wake.set()
+
+    def request(self, cv_id: int, user_id: str):
+        """Prepare cv_id in the next pass even though it is not an active CV, and start that pass now"""
+        with self._requested_lock:
+            self._requested.setdefault(cv_id, user_id)
+        self.wake()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            # Cleared before the pass, so a wake() during it triggers another one
+            self._wake.clear()
+            try:
+                more = self.run_once()["more"]
+            except Exception as e:
+                print(f"❌ CV preparation pass failed: {e}")
+                more = False
+            if not more:
+                self._wake.wait(self.interval)
+
+    def start(self):
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="cv-preparer", daemon=True)
+        self._thread.start()
+        print(f"🪄 CV preparer running (every {self.interval:g}s and after writes)")
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+
+    def snapshot(self) -> dict:
+        with get_db_cursor_context() as (cursor, conn):
+            cursor.execute(f"SELECT COUNT(*) {_STALE_CVS}")
+            stale = cursor.fetchone()[0]
+            cursor.execute("SELECT COUNT(DISTINCT user_id) FROM cv_updates WHERE processed = FALSE")
+            pending_users = cursor.fetchone()[0]
+        return dict(self._stats, interval_seconds=self.interval, batch_size=self.batch_size,
+                    running=bool(self._thread and self._thread.is_alive()),
+                    stale_cvs=stale, requested_cvs=len(self._requested),
+                    users_with_pending_updates=pending_users)
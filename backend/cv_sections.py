@@ -0,0 +1,150 @@
+"""
+CV section detection.
+
+A section starts at a line that is one of the known headings (PROFILE,
+SKILLS, WORK EXPERIENCE, ...) and runs until the next one. The patterns are
+compiled once at import; the CV editing code and the PDF layout engine use
+the same parser, so they agree on where sections are.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Enhanced section headers patterns to handle various formats
+SECTION_HEADER_PATTERNS = {
+    'profile': [
+        r'^\s*PROFILE\s+SUMMARY\s*$', r'^\s*PROFILE\s*$', r'^\s*SUMMARY\s*$', r'^\s*ABOUT\s+ME\s*$',
+        r'^\s*OBJECTIVE\s*$', r'^\s*PROFESSIONAL\s+SUMMARY\s*$', r'^\s*CAREER\s+OBJECTIVE\s*$',
+        r'^\s*_+\s*PROFILE\s+SUMMARY\s*_+\s*$', r'^\s*_+\s*PROFILE\s*_+\s*$'
+    ],
+    'skills': [
+        r'^\s*SKILLS?\s*$', r'^\s*TECHNICAL\s+SKILLS?\s*$', r'^\s*CORE\s+COMPETENCIES\s*$',
+        r'^\s*TECHNOLOGIES\s*$', r'^\s*TECHNICAL\s+COMPETENCIES\s*$', r'^\s*PROFESSIONAL\s+SKILLS?\s*$',
+        r'^\s*_+\s*SKILLS?\s*_+\s*$', r'^\s*_+\s*TECHNICAL\s+SKILLS?\s*_+\s*$'
+    ],
+    'experience': [
+        r'^\s*WORK\s+EXPERIENCE\s*$', r'^\s*EXPERIENCE\s*$', r'^\s*PROFESSIONAL\s+EXPERIENCE\s*$',
+        r'^\s*EMPLOYMENT\s+HISTORY\s*$', r'^\s*CAREER\s+HISTORY\s*$', r'^\s*WORK\s+HISTORY\s*$',
+        r'^\s*_+\s*WORK\s+EXPERIENCE\s*_+\s*$', r'^\s*_+\s*EXPERIENCE\s*_+\s*$'
+    ],
+    'education': [
+        r'^\s*EDUCATION\s*$', r'^\s*EDUCATIONAL\s+BACKGROUND\s*$', r'^\s*ACADEMIC\s+BACKGROUND\s*$',
+        r'^\s*QUALIFICATIONS\s*$', r'^\s*ACADEMIC\s+QUALIFICATIONS\s*$', r'^\s*DEGREES\s*$',
+        r'^\s*_+\s*EDUCATION\s*_+\s*$', r'^\s*_+\s*EDUCATIONAL\s+BACKGROUND\s*_+\s*$'
+    ],
+    'projects': [
+        r'^\s*PROJECTS?\s*$', r'^\s*KEY\s+PROJECTS?\s*$', r'^\s*NOTABLE\s+PROJECTS?\s*$',
+        r'^\s*PERSONAL\s+PROJECTS?\s*$', r'^\s*PORTFOLIO\s*$', r'^\s*SELECTED\s+PROJECTS?\s*$',
+        r'^\s*MAJOR\s+PROJECTS?\s*$', r'^\s*PROJECT\s+EXPERIENCE\s*$', r'^\s*PROFESSIONAL\s+PROJECTS?\s*$',
+        r'^\s*_+\s*PROJECTS?\s*_+\s*$'
+    ],
+    'contact': [
+        r'^\s*CONTACT\s*$', r'^\s*CONTACT\s+INFORMATION\s*$', r'^\s*CONTACT\s+DETAILS\s*$',
+        r'^\s*PERSONAL\s+INFORMATION\s*$', r'^\s*CONTACT\s+INFO\s*$',
+        r'^\s*_+\s*CONTACT\s*_+\s*$', r'^\s*_+\s*CONTACT\s+INFORMATION\s*_+\s*$'
+    ],
+    'objective': [
+        r'^\s*OBJECTIVE\s*$', r'^\s*CAREER\s+OBJECTIVE\s*$', r'^\s*PROFESSIONAL\s+OBJECTIVE\s*$',
+        r'^\s*GOAL\s*$', r'^\s*CAREER\s+GOAL\s*$',
+        r'^\s*_+\s*OBJECTIVE\s*_+\s*$', r'^\s*_+\s*CAREER\s+OBJECTIVE\s*_+\s*$'
+    ],
+    'certifications': [
+        r'^\s*CERTIFICATIONS\s*$', r'^\s*CERTIFICATES\s*$', r'^\s*PROFESSIONAL\s+CERTIFICATIONS\s*$',
+        r'^\s*LICENSES\s*$', r'^\s*CREDENTIALS\s*$', r'^\s*TRAINING\s*$',
+        r'^\s*_+\s*CERTIFICATIONS\s*_+\s*$'
+    ],
+    'research': [
+        r'^\s*RESEARCH\s*$', r'^\s*PUBLICATIONS\s*$', r'^\s*RESEARCH\s+PAPERS\s*$',
+        r'^\s*ACADEMIC\s+PUBLICATIONS\s*$', r'^\s*THESIS\s*$', r'^\s*DISSERTATION\s*$',
+        r'^\s*STUDIES\s*$', r'^\s*_+\s*RESEARCH\s*_+\s*$'
+    ],
+    'achievements': [
+        r'^\s*ACHIEVEMENTS\s*$', r'^\s*AWARDS\s*$', r'^\s*HONORS\s*$',
+        r'^\s*RECOGNITIONS\s*$', r'^\s*SCHOLARSHIPS\s*$', r'^\s*ACCOMPLISHMENTS\s*$',
+        r'^\s*_+\s*ACHIEVEMENTS\s*_+\s*$'
+    ],
+    'leadership': [
+        r'^\s*LEADERSHIP\s*$', r'^\s*MANAGEMENT\s*$', r'^\s*TEAM\s+LEADERSHIP\s*$',
+        r'^\s*SUPERVISION\s*$', r'^\s*DIRECTION\s*$',
+        r'^\s*_+\s*LEADERSHIP\s*_+\s*$'
+    ],
+    'volunteer': [
+        r'^\s*VOLUNTEER\s*$', r'^\s*VOLUNTEER\s+WORK\s*$', r'^\s*COMMUNITY\s+SERVICE\s*$',
+        r'^\s*CHARITY\s+WORK\s*$', r'^\s*PRO\s+BONO\s*$',
+        r'^\s*_+\s*VOLUNTEER\s*_+\s*$'
+    ],
+    'languages': [
+        r'^\s*LANGUAGES\s*$', r'^\s*LANGUAGE\s+SKILLS\s*$', r'^\s*SPOKEN\s+LANGUAGES\s*$',
+        r'^\s*LINGUISTIC\s+SKILLS\s*$',
+        r'^\s*_+\s*LANGUAGES\s*_+\s*$'
+    ],
+    'technologies': [
+        r'^\s*TECHNOLOGIES\s*$', r'^\s*TOOLS\s*$', r'^\s*SOFTWARE\s*$',
+        r'^\s*PLATFORMS\s*$', r'^\s*SYSTEMS\s*$',
+        r'^\s*_+\s*TECHNOLOGIES\s*_+\s*$'
+    ],
+    'interests': [
+        r'^\s*INTERESTS\s*$', r'^\s*HOBBIES\s*$', r'^\s*PERSONAL\s+INTERESTS\s*$',
+        r'^\s*PASSIONS\s*$',
+        r'^\s*_+\s*INTERESTS\s*_+\s*$'
+    ],
+    'references': [
+        r'^\s*REFERENCES\s*$', r'^\s*REFEREES\s*$', r'^\s*RECOMMENDATIONS\s*$',
+        r'^\s*ENDORSEMENTS\s*$',
+        r'^\s*_+\s*REFERENCES\s*_+\s*$'
+    ],
+    'additional': [
+        r'^\s*ADDITIONAL\s*$', r'^\s*MISCELLANEOUS\s*$', r'^\s*OTHER\s*$',
+        r'^\s*EXTRA\s*$',
+        r'^\s*_+\s*ADDITIONAL\s*_+\s*$'
+    ]
+}
+
+_COMPILED_HEADER_PATTERNS = [
+    (section_type, [re.compile(pattern, re.IGNORECASE) for pattern in patterns])
+    for section_type, patterns in SECTION_HEADER_PATTERNS.items()
+]
+
+def section_type_of(line: str) -> Optional[str]:
+    """The section a heading line opens (first matching type), or None for ordinary lines"""
+    line_upper = line.upper().strip()
+    for section_type, patterns in _COMPILED_HEADER_PATTERNS:
+        if any(pattern.match(line_upper) for pattern in patterns):
+            return section_type
+    return None
+
+def find_section_headers(cv_lines: List[str]) -> List[Tuple[int, str]]:
+    """(line index, section type) of every heading line, in document order"""
+    headers = []
+    for i, line in enumerate(cv_lines):
+        section_type = section_type_of(line)
+        if section_type:
+            headers.append((i, section_type))
+    return headers
+
+def parse_cv_sections(cv_content: str) -> dict:
+    """Parse CV content to identify sections and their positions"""
+    
+    sections = {}
+    cv_lines = cv_content.split('\n')
+    
+    # A repeated heading moves its section to the later occurrence
+    for i, section_type in find_section_headers(cv_lines):
+        sections[section_type] = {
+            'start_line': i,
+            'header': cv_lines[i].strip(),
+            'content_start': i + 1
+        }
+    
+    # Find section end positions
+    section_names = list(sections.keys())
+    for i, section_name in enumerate(section_names):
+        if i < len(section_names) - 1:
+            # Next section starts where this one ends
+            next_section = sections[section_names[i + 1]]
+            sections[section_name]['end_line'] = next_section['start_line'] - 1
+        else:
+            # Last section goes to end of document
+            sections[section_name]['end_line'] = len(cv_lines) - 1
+    
+    return sections
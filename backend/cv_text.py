@@ -0,0 +1,49 @@
+"""
+Text normalisation shared by the upload path and the PDF renderers.
+"""
+
+import re
+import unicodedata
+
+def clean_cv_text(text: str) -> str:
+    """Clean and normalize CV text by removing problematic Unicode characters"""
+    # Remove or replace problematic Unicode characters
+    cleaned_text = text
+    
+    # Replace common Unicode icons with text equivalents
+    unicode_replacements = {
+        '\uf1ad': '',  # Remove problematic Unicode character
+        '\uf0f1': 'Phone: ',  # Phone icon
+        '\uf0e0': 'Email: ',  # Email icon
+        '\uf08c': 'LinkedIn: ',  # LinkedIn icon
+        '\uf3c5': 'Home: ',  # Home icon
+        '\uf1ad': '',  # Building/company icon
+        '\uf0b1': '',  # Other problematic characters
+        '\u2013': '-',  # En dash
+        '\u2014': '-',  # Em dash
+        '\u2018': "'",  # Left single quote
+        '\u2019': "'",  # Right single quote
+        '\u201c': '"',  # Left double quote
+        '\u201d': '"',  # Right double quote
+        '\u2022': '•',  # Bullet point
+        '\u2026': '...',  # Ellipsis
+    }
+    
+    for unicode_char, replacement in unicode_replacements.items():
+        cleaned_text = cleaned_text.replace(unicode_char, replacement)
+    
+    # Remove other problematic Unicode characters that can't be encoded in utf-8
+    # cleaned_text = ''.join(char for char in cleaned_text if ord(char) < 256 or char in '•')
+    
+    # Normalize Unicode characters
+    cleaned_text = unicodedata.normalize('NFKC', cleaned_text)
+    
+    # Clean up extra whitespace but preserve line breaks
+    # Replace multiple spaces with single space, but keep newlines
+    cleaned_text = re.sub(r'[ \t]+', ' ', cleaned_text)
+    # Clean up multiple newlines
+    cleaned_text = re.sub(r'\n\s*\n', '\n\n', cleaned_text)
+    # Remove trailing spaces from lines
+    cleaned_text = re.sub(r' +$', '', cleaned_text, flags=re.MULTILINE)
+    
+    return cleaned_text.strip()
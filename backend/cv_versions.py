@@ -0,0 +1,121 @@
+"""
+Delta-compressed CV version history.
+
+Each version stores either a full keyframe or a line diff (difflib opcodes)
+against the previous version, zlib-compressed. A keyframe is written every
+CV_VERSION_KEYFRAME_INTERVAL versions, so rebuilding any version applies at
+most interval - 1 patches.
+"""
+
+import difflib
+import hashlib
+import json
+import os
+import zlib
+from typing import Dict, List, Optional
+
+from tenancy import current_user_id
+
+CV_VERSION_KEYFRAME_INTERVAL = max(1, int(os.getenv("CV_VERSION_KEYFRAME_INTERVAL", "10")))
+
+def _hash(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def _pack(obj) -> bytes:
+    return zlib.compress(json.dumps(obj, separators=(',', ':')).encode('utf-8'), 9)
+
+def _unpack(blob: bytes):
+    return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+def make_delta(old: str, new: str) -> list:
+    """Opcodes turning old lines into new: ["=", i1, i2] keeps old[i1:i2], ["+", [lines]] inserts"""
+    old_lines, new_lines = old.split('\n'), new.split('\n')
+    ops = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False).get_opcodes():
+        if tag == 'equal':
+            ops.append(["=", i1, i2])
+        elif j2 > j1:
+            ops.append(["+", new_lines[j1:j2]])
+    return ops
+
+def apply_delta(old: str, ops: list) -> str:
+    old_lines = old.split('\n')
+    new_lines = []
+    for op in ops:
+        if op[0] == "=":
+            new_lines.extend(old_lines[op[1]:op[2]])
+        else:
+            new_lines.extend(op[1])
+    return '\n'.join(new_lines)
+
+def _summarise(ops: list, old: str) -> str:
+    kept = sum(op[2] - op[1] for op in ops if op[0] == "=")
+    added = sum(len(op[1]) for op in ops if op[0] == "+")
+    removed = len(old.split('\n')) - kept
+    return f"+{added} -{removed} lines"
+
+def _latest(cursor, cv_id: int) -> Optional[tuple]:
+    cursor.execute('''SELECT version_number, content_hash FROM cv_versions
+                      WHERE cv_id = ? ORDER BY version_number DESC LIMIT 1''', (cv_id,))
+    return cursor.fetchone()
+
+def get_cv_version_content(cursor, cv_id: int, version_number: int) -> Optional[str]:
+    """Rebuild a version from its nearest keyframe"""
+    cursor.execute('''SELECT version_number, is_keyframe, payload FROM cv_versions
+                      WHERE cv_id = ? AND version_number <= ?
+                        AND version_number >= (SELECT MAX(version_number) FROM cv_versions
+                                               WHERE cv_id = ? AND version_number <= ? AND is_keyframe)
+                      ORDER BY version_number''', (cv_id, version_number, cv_id, version_number))
+    rows = cursor.fetchall()
+    if not rows or rows[-1][0] != version_number:
+        return None
+    content = None
+    for _, is_keyframe, payload in rows:
+        data = _unpack(payload)
+        content = data if is_keyframe else apply_delta(content, data)
+    return content
+
+def record_cv_version(cursor, cv_id: int, content: str, changes_summary: Optional[str] = None) -> Optional[int]:
+    """Append a version for cv_id unless content is unchanged; returns the new version number"""
+    content_hash = _hash(content)
+    latest = _latest(cursor, cv_id)
+    if latest and latest[1] == content_hash:
+        return None
+
+    version_number = latest[0] + 1 if latest else 1
+    previous = None
+    if (version_number - 1) % CV_VERSION_KEYFRAME_INTERVAL:
+        previous = get_cv_version_content(cursor, cv_id, latest[0])
+    is_keyframe = previous is None
+    if is_keyframe:
+        payload = _pack(content)
+        summary = changes_summary or ("Initial version" if version_number == 1 else "Keyframe")
+    else:
+        ops = make_delta(previous, content)
+        payload = _pack(ops)
+        summary = changes_summary or _summarise(ops, previous)
+
+    cursor.execute('''INSERT INTO cv_versions (cv_id, version_number, is_keyframe, payload, content_hash,
+                                               content_length, changes_summary)
+                      VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                   (cv_id, version_number, is_keyframe, payload, content_hash, len(content), summary))
+    return version_number
+
+def update_active_cv_content(cursor, content: str, changes_summary: Optional[str] = None):
+    """Set current_content of the current user's active CV and record the change as a new version"""
+    user_id = current_user_id()
+    cursor.execute("SELECT id FROM cvs WHERE user_id = ? AND is_active = TRUE", (user_id,))
+    active_ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute('''UPDATE cvs SET current_content = ?, updated_at = CURRENT_TIMESTAMP
+                      WHERE user_id = ? AND is_active = TRUE''', (content, user_id))
+    for cv_id in active_ids:
+        record_cv_version(cursor, cv_id, content, changes_summary)
+
+def list_cv_versions(cursor, cv_id: int) -> List[Dict]:
+    cursor.execute('''SELECT version_number, is_keyframe, content_length, length(payload), changes_summary, created_at
+                      FROM cv_versions WHERE cv_id = ? ORDER BY version_number DESC''', (cv_id,))
+    return [
+        {"version_number": number, "is_keyframe": bool(is_keyframe), "content_length": content_length,
+         "stored_bytes": stored_bytes, "changes_summary": summary, "created_at": created_at}
+        for number, is_keyframe, content_length, stored_bytes, summary, created_at in cursor.fetchall()
+    ]
@@ -2,15 +2,13 @@ import sqlite3
 import os
 from contextlib import contextmanager
 
+from db_pool import get_pool
+
 def get_db_cursor():
-    """Get database connection with proper timeout and error handling"""
+    """Check out a pooled database connection; conn.close() hands it back to the pool"""
     try:
-        # Temporary SQLite connection while we fix Supabase
-        conn = sqlite3.connect('cv_updater.db', timeout=60.0, check_same_thread=False)
-        conn.execute("PRAGMA journal_mode=WAL")
-        conn.execute("PRAGMA synchronous=NORMAL")
-        conn.execute("PRAGMA cache_size=10000")
-        conn.execute("PRAGMA temp_store=memory")
+        # The pool serves whichever backend DATABASE_URL selects (SQLite or PostgreSQL)
+        conn = get_pool().acquire()
         cursor = conn.cursor()
         return cursor, conn
     except Exception as e:
@@ -36,4 +34,4 @@ def get_db_cursor_context():
         if cursor:
             cursor.close()
         if conn:
-            conn.close() 
\ No newline at end of file
+            conn.close()
@@ -0,0 +1,213 @@
+"""
+PostgreSQL backend, selected when DATABASE_URL is a postgres:// URL.
+
+Connections come from a psycopg2 ThreadedConnectionPool holding DB_POOL_SIZE
+connections that may grow by DB_MAX_OVERFLOW under load. Cursors translate the
+SQLite dialect the rest of the code is written in (`?` placeholders,
+AUTOINCREMENT, BLOB, NOCASE lookups, lastrowid) so queries run unchanged.
+"""
+
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import ThreadedConnectionPool
+
+from db_pool import PooledConnection, PoolTimeoutError
+
+# Tables with a SERIAL id; INSERTs into them get RETURNING id to fill lastrowid
+ID_TABLES = {"cvs", "chat_messages", "cv_updates", "manual_projects", "cv_versions"}
+
+# Keep timestamps as text, like SQLite returns them
+_TIMESTAMP_TEXT = psycopg2.extensions.new_type((1114, 1184), "TIMESTAMP_TEXT", lambda value, cursor: value)
+
+_DDL_REWRITES = (
+    (re.compile(r"\bINTEGER\s+PRIMARY\s+KEY\s+AUTOINCREMENT\b", re.I), "SERIAL PRIMARY KEY"),
+    (re.compile(r"\bBLOB\b", re.I), "BYTEA"),
+    (re.compile(r"\b([\w.]+)\s*=\s*\?\s+COLLATE\s+NOCASE\b", re.I), r"lower(\1) = lower(?)"),
+    (re.compile(r"\binstr\(", re.I), "strpos("),
+)
+_INSERT_TABLE = re.compile(r"^\s*INSERT\s+INTO\s+(\w+)", re.I)
+
+def _placeholders(sql: str) -> str:
+    """`?` -> `%s` and literal `%` -> `%%`, leaving quoted strings alone"""
+    out, quote = [], None
+    for char in sql:
+        if quote:
+            if char == quote:
+                quote = None
+            out.append('%%' if char == '%' else char)
+        elif char in ("'", '"'):
+            quote = char
+            out.append(char)
+        elif char == '?':
+            out.append('%s')
+        elif char == '%':
+            out.append('%%')
+        else:
+            out.append(char)
+    return ''.join(out)
+
+def translate_sql(sql: str) -> str:
+    for pattern, replacement in _DDL_REWRITES:
+        sql = pattern.sub(replacement, sql)
+    return _placeholders(sql)
+
+class TranslatingCursor:
+    """psycopg2 cursor that accepts SQLite-dialect SQL and reports lastrowid"""
+
+    dialect = "postgres"
+
+    def __init__(self, raw):
+        self._raw = raw
+        self.lastrowid = None
+
+    def execute(self, sql: str, params=()):
+        sql = translate_sql(sql)
+        match = _INSERT_TABLE.match(sql)
+        wants_id = bool(match) and match.group(1).lower() in ID_TABLES and "RETURNING" not in sql.upper()
+        if wants_id:
+            sql = sql.rstrip().rstrip(';') + " RETURNING id"
+        # Always pass a tuple so psycopg2 unescapes the `%%` written by translate_sql
+        self._raw.execute(sql, tuple(params))
+        if wants_id:
+            self.lastrowid = self._raw.fetchone()[0]
+        return self
+
+    def executemany(self, sql: str, seq_of_params):
+        self._raw.executemany(translate_sql(sql), [tuple(params) for params in seq_of_params])
+        return self
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+class PostgresPooledConnection(PooledConnection):
+    dialect = "postgres"
+
+    def cursor(self):
+        return TranslatingCursor(self._raw.cursor())
+
+class PostgresConnectionPool:
+    """ThreadedConnectionPool with the checkout timeout, stats and health check of the SQLite pool"""
+
+    def __init__(self, dsn: str, size: int, max_overflow: int = 0, timeout: float = 30.0):
+        self.dsn = dsn
+        self.size = max(1, size)
+        self.max_overflow = max(0, max_overflow)
+        self.timeout = timeout
+        self._pool = ThreadedConnectionPool(self.size, self.size + self.max_overflow, dsn)
+        # getconn() raises instead of waiting when the pool is exhausted; the semaphore makes callers queue
+        self._slots = threading.BoundedSemaphore(self.size + self.max_overflow)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "replaced": 0,
+            "leaked": 0,
+            "wait_total_ms": 0.0,
+            "wait_max_ms": 0.0,
+        }
+        self._in_use = 0
+        self._peak_in_use = 0
+
+    def _checkout(self):
+        raw = self._pool.getconn()
+        psycopg2.extensions.register_type(_TIMESTAMP_TEXT, raw)
+        return raw
+
+    def acquire(self, timeout: float = None) -> PostgresPooledConnection:
+        if self._closed:
+            raise PoolTimeoutError("Connection pool is closed")
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout if timeout is None else timeout):
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise PoolTimeoutError(f"No database connection available after {self.timeout}s "
+                                   f"(pool size {self.size} + overflow {self.max_overflow})")
+        try:
+            raw = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+        waited_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            self._stats["checkouts"] += 1
+            self._stats["wait_total_ms"] += waited_ms
+            self._stats["wait_max_ms"] = max(self._stats["wait_max_ms"], waited_ms)
+        return PostgresPooledConnection(self, raw)
+
+    def release(self, raw):
+        """Return a connection, discarding any uncommitted work left on it"""
+        broken = bool(raw.closed)
+        if not broken:
+            try:
+                if raw.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    raw.rollback()
+            except psycopg2.Error:
+                broken = True
+        if broken:
+            with self._lock:
+                self._stats["replaced"] += 1
+        try:
+            # Overflow connections beyond minconn are closed by putconn itself
+            self._pool.putconn(raw, close=broken or self._closed)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def leaked(self):
+        with self._lock:
+            self._stats["leaked"] += 1
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def health_check(self) -> dict:
+        """Round-trip SELECT 1 on a pooled connection"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                healthy = cursor.fetchone()[0] == 1
+            finally:
+                cursor.close()
+        return {"healthy": healthy, "checked": 1, "replaced": 0}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            in_use = self._in_use
+            peak = self._peak_in_use
+        checkouts = stats["checkouts"]
+        return {
+            "database": re.sub(r"//([^:/@]+):[^@]*@", r"//\1:***@", self.dsn),
+            "size": self.size,
+            "max_overflow": self.max_overflow,
+            "in_use": in_use,
+            "peak_in_use": peak,
+            "checkouts": checkouts,
+            "timeouts": stats["timeouts"],
+            "replaced": stats["replaced"],
+            "leaked": stats["leaked"],
+            "wait_avg_ms": round(stats["wait_total_ms"] / checkouts, 3) if checkouts else 0.0,
+            "wait_max_ms": round(stats["wait_max_ms"], 3),
+        }
+
+    def close(self):
+        self._closed = True
+        self._pool.closeall()
@@ -8,7 +8,10 @@ from pydantic import BaseModel
 from typing import List, Optional
 import json
 from datetime import datetime
-from contextlib import contextmanager
+
+from db import get_db_cursor_context
+from repositories import insert_projects
+from tenancy import current_user_id
 
 # Import the project extractor
 from project_extractor import extract_and_format_projects
@@ -42,12 +45,12 @@ class ProjectResponse(BaseModel):
     created_at: str
 
 @router.post("/projects/extract-from-cv")
-async def extract_projects_from_cv():
+def extract_projects_from_cv():
     """Extract projects from the current CV and store them in the database."""
     try:
         with get_db_cursor_context() as (cursor, conn):
             # Get current CV
-            cursor.execute("SELECT current_content FROM cvs WHERE is_active = TRUE LIMIT 1")
+            cursor.execute("SELECT current_content FROM cvs WHERE user_id = ? AND is_active = TRUE LIMIT 1", (current_user_id(),))
             cv_row = cursor.fetchone()
             
             if not cv_row:
@@ -59,11 +62,12 @@ async def extract_projects_from_cv():
             projects = extract_and_format_projects(cv_content)
             
             # Clear existing projects
-            cursor.execute("DELETE FROM manual_projects")
+            cursor.execute("DELETE FROM manual_projects WHERE user_id = ?", (current_user_id(),))
             
             # Store extracted projects
-            for project in projects:
-                project_data = {
+            created_at = datetime.now().isoformat()
+            insert_projects(cursor, [
+                {
                     'id': project['id'],
                     'title': project['title'],
                     'description': project['description'],
@@ -71,13 +75,10 @@ async def extract_projects_from_cv():
                     'technologies': project['technologies'],
                     'highlights': project['highlights'],
                     'role': project['role'],
-                    'created_at': datetime.now().isoformat()
+                    'created_at': created_at
                 }
-                
-                cursor.execute(
-                    "INSERT INTO manual_projects (project_data) VALUES (?)",
-                    (json.dumps(project_data),)
-                )
+                for project in projects
+            ])
             
             return {
                 "success": True,
@@ -89,11 +90,11 @@ async def extract_projects_from_cv():
         raise HTTPException(status_code=500, detail=f"Error extracting projects: {str(e)}")
 
 @router.get("/projects/all", response_model=List[ProjectResponse])
-async def get_all_projects():
+def get_all_projects():
     """Get all projects from the database."""
     try:
         with get_db_cursor_context() as (cursor, conn):
-            cursor.execute("SELECT project_data FROM manual_projects ORDER BY created_at DESC")
+            cursor.execute("SELECT project_data FROM manual_projects WHERE user_id = ? ORDER BY created_at DESC", (current_user_id(),))
             projects = cursor.fetchall()
             
             formatted_projects = []
@@ -110,7 +111,7 @@ async def get_all_projects():
         raise HTTPException(status_code=500, detail=f"Error fetching projects: {str(e)}")
 
 @router.post("/projects/create", response_model=ProjectResponse)
-async def create_project(project: ProjectCreate):
+def create_project(project: ProjectCreate):
     """Create a new project manually."""
     try:
         with get_db_cursor_context() as (cursor, conn):
@@ -125,23 +126,21 @@ async def create_project(project: ProjectCreate):
                 'created_at': datetime.now().isoformat()
             }
             
-            cursor.execute(
-                "INSERT INTO manual_projects (project_data) VALUES (?)",
-                (json.dumps(project_data),)
-            )
-            
+            insert_projects(cursor, [project_data])
+
             return ProjectResponse(**project_data)
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating project: {str(e)}")
 
 @router.put("/projects/{project_id}", response_model=ProjectResponse)
-async def update_project(project_id: str, project_update: ProjectUpdate):
+def update_project(project_id: str, project_update: ProjectUpdate):
     """Update an existing project."""
     try:
         with get_db_cursor_context() as (cursor, conn):
             # Get existing project
-            cursor.execute("SELECT project_data FROM manual_projects WHERE project_data LIKE ?", (f'%"id": "{project_id}"%',))
+            cursor.execute("SELECT project_data FROM manual_projects WHERE user_id = ? AND project_data LIKE ?",
+                           (current_user_id(), f'%"id": "{project_id}"%'))
             project_row = cursor.fetchone()
             
             if not project_row:
@@ -155,8 +154,8 @@ async def update_project(project_id: str, project_update: ProjectUpdate):
             
             # Update in database
             cursor.execute(
-                "UPDATE manual_projects SET project_data = ? WHERE project_data LIKE ?",
-                (json.dumps(existing_data), f'%"id": "{project_id}"%')
+                "UPDATE manual_projects SET project_data = ? WHERE user_id = ? AND project_data LIKE ?",
+                (json.dumps(existing_data), current_user_id(), f'%"id": "{project_id}"%')
             )
             
             return ProjectResponse(**existing_data)
@@ -165,11 +164,12 @@ async def update_project(project_id: str, project_update: ProjectUpdate):
         raise HTTPException(status_code=500, detail=f"Error updating project: {str(e)}")
 
 @router.delete("/projects/{project_id}")
-async def delete_project(project_id: str):
+def delete_project(project_id: str):
     """Delete a project by ID."""
     try:
         with get_db_cursor_context() as (cursor, conn):
-            cursor.execute("DELETE FROM manual_projects WHERE project_data LIKE ?", (f'%"id": "{project_id}"%',))
+            cursor.execute("DELETE FROM manual_projects WHERE user_id = ? AND project_data LIKE ?",
+                           (current_user_id(), f'%"id": "{project_id}"%'))
             
             if cursor.rowcount == 0:
                 raise HTTPException(status_code=404, detail="Project not found")
@@ -180,11 +180,12 @@ async def delete_project(project_id: str):
         raise HTTPException(status_code=500, detail=f"Error deleting project: {str(e)}")
 
 @router.delete("/projects/delete-by-title/{title}")
-async def delete_project_by_title(title: str):
+def delete_project_by_title(title: str):
     """Delete a project by title."""
     try:
         with get_db_cursor_context() as (cursor, conn):
-            cursor.execute("DELETE FROM manual_projects WHERE project_data LIKE ?", (f'%"title": "{title}"%',))
+            cursor.execute("DELETE FROM manual_projects WHERE user_id = ? AND project_data LIKE ?",
+                           (current_user_id(), f'%"title": "{title}"%'))
             
             if cursor.rowcount == 0:
                 raise HTTPException(status_code=404, detail="Project not found")
@@ -195,38 +196,22 @@ async def delete_project_by_title(title: str):
         raise HTTPException(status_code=500, detail=f"Error deleting project: {str(e)}")
 
 @router.post("/projects/cleanup")
-async def cleanup_projects():
+def cleanup_projects():
     """Clean up duplicate or invalid projects."""
     try:
         with get_db_cursor_context() as (cursor, conn):
-            # Get all projects
-            cursor.execute("SELECT project_data FROM manual_projects")
-            projects = cursor.fetchall()
-            
-            # Find duplicates and invalid entries
-            seen_titles = set()
-            valid_projects = []
-            
-            for (project_json,) in projects:
-                try:
-                    project_data = json.loads(project_json)
-                    title = project_data.get('title', '').strip()
-                    
-                    if title and title not in seen_titles:
-                        seen_titles.add(title)
-                        valid_projects.append(project_json)
-                except:
-                    continue
-            
-            # Clear and reinsert valid projects
-            cursor.execute("DELETE FROM manual_projects")
-            
-            for project_json in valid_projects:
-                cursor.execute("INSERT INTO manual_projects (project_data) VALUES (?)", (project_json,))
+            # Drop untitled/invalid projects and keep the oldest row for each title
+            user_id = current_user_id()
+            cursor.execute('''DELETE FROM manual_projects
+                             WHERE user_id = ? AND (COALESCE(trim(title), '') = ''
+                                OR id NOT IN (SELECT MIN(id) FROM manual_projects WHERE user_id = ? GROUP BY trim(title)))''',
+                           (user_id, user_id))
+            cursor.execute("SELECT COUNT(*) FROM manual_projects WHERE user_id = ?", (user_id,))
+            kept = cursor.fetchone()[0]
             
             return {
                 "success": True,
-                "message": f"Cleaned up projects. Kept {len(valid_projects)} valid projects."
+                "message": f"Cleaned up projects. Kept {kept} valid projects."
             }
             
     except Exception as e:
@@ -236,9 +221,3 @@ def generate_project_id(title: str) -> str:
     """Generate a unique ID for a project."""
     import re
     return re.sub(r'[^a-zA-Z0-9]', '_', title.lower()).strip('_')
-
-# Database context manager (import from main_enhanced.py)
-def get_db_cursor_context():
-    """Database context manager."""
-    # This should be imported from main_enhanced.py
-    pass 
\ No newline at end of file
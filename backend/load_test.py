@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Simple throughput benchmark for the backend.
+
+Start the OpenAI stub and the backend first, then run e.g.:
+    python openai_stub_server.py --port 8090 --latency lognormal:-1.6,0.4 --seed 42
+    OPENAI_BASE_URL=http://localhost:8090/v1 uvicorn main_enhanced:app --port 8081
+    python load_test.py --endpoint chat --requests 200 --concurrency 16
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ENDPOINTS = {
+    "chat": ("POST", "/chat/", {"message": "I learned Kubernetes and Terraform"}),
+    "blog": ("POST", "/blog/generate", {"project_title": "E-Commerce Platform"}),
+    "enhanced": ("GET", "/cv/enhanced/", None),
+    "history": ("GET", "/chat/history/", None),
+}
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def run(base_url: str, endpoint: str, total: int, concurrency: int):
+    method, path, body = ENDPOINTS[endpoint]
+    session = requests.Session()
+
+    def one(_):
+        started = time.perf_counter()
+        response = session.request(method, f"{base_url}{path}", json=body, timeout=120)
+        return time.perf_counter() - started, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for latency, _ in results]
+    errors = sum(1 for _, status in results if status >= 400)
+    print(f"📊 {endpoint}: {total} requests, concurrency {concurrency}")
+    print(f"   throughput: {total / elapsed:.1f} req/s  errors: {errors}")
+    print(f"   latency p50 {percentile(latencies, 50) * 1000:.0f}ms  "
+          f"p95 {percentile(latencies, 95) * 1000:.0f}ms  "
+          f"p99 {percentile(latencies, 99) * 1000:.0f}ms  "
+          f"mean {statistics.mean(latencies) * 1000:.0f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend throughput benchmark")
+    parser.add_argument("--base-url", default="http://localhost:8081")
+    parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="chat")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    run(args.base_url.rstrip('/'), args.endpoint, args.requests, args.concurrency)
+
+if __name__ == "__main__":
+    main()
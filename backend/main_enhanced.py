@@ -1,4 +1,4 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
@@ -15,16 +15,28 @@ from io import BytesIO
 import json
 import threading
 import io
+import asyncio
+import time
 from contextlib import contextmanager
 from typing import List, Optional, Dict
 from datetime import datetime
 from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 # Import database connection
 try:
-    from db import get_db_cursor
-    USE_SUPABASE = False  # Temporarily using SQLite
-    print("✅ Using SQLite database (temporary)")
+    from db import get_db_cursor, get_db_cursor_context
+    from db_pool import get_pool, DB_DIALECT
+    from migrations import migrate
+    from repositories import (
+        cv_repository, project_repository, chat_message_repository, run_db, insert_projects
+    )
+    from search import search as search_fts, SEARCH_SCOPES
+    from cv_versions import update_active_cv_content, record_cv_version
+    from tenancy import current_user_id, authenticate, is_admin, user_scope, AuthenticationError, DEFAULT_USER_ID
+    from render_cache import render_cache, render_cache_key
+    USE_SUPABASE = DB_DIALECT == "postgres"  # DATABASE_URL=postgres://... selects PostgreSQL
+    print(f"✅ Using {'PostgreSQL' if USE_SUPABASE else 'SQLite'} database")
 except ImportError:
     print("❌ ERROR: db.py not found. Please ensure the database configuration file exists.")
     raise ImportError("Database configuration file (db.py) is required")
@@ -377,167 +389,50 @@ def insert_content_in_section_enhanced(cv_content: str, section_name: str, new_c
     
     return '\n'.join(lines)
 
-def generate_enhanced_pdf(cv_content: str) -> BytesIO:
-    """
-    Generate a well-formatted PDF from CV content with enhanced styling.
-    """
-    # Clean the CV content before generating PDF
-    cv_content = clean_cv_text(cv_content)
-
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_auto_page_break(auto=True, margin=15)
-
-    # Always use a Unicode font for non-ASCII characters
-    use_custom_font = False
-    try:
-        pdf.add_font('DejaVu', '', 'DejaVuSansCondensed.ttf', uni=True)
-        pdf.add_font('DejaVu', 'B', 'DejaVuSansCondensed-Bold.ttf', uni=True)
-        use_custom_font = True
-    except Exception as e:
-        print(f"Warning: Could not load DejaVu font: {e}. Falling back to Arial.")
-        use_custom_font = False
-        # ASCII fallback: replace common non-ASCII characters with ASCII equivalents
-        replacements = {
-            '\u2022': '-',  # bullet
-            '\u2023': '-',  # triangular bullet
-            '\u25E6': '-',  # white bullet
-            '\u2043': '-',  # hyphen bullet
-            '\u2219': '-',  # bullet operator
-            '\u2013': '-',  # en dash
-            '\u2014': '-',  # em dash
-            '\uf0b7': '-',  # another bullet
-        }
-        for uni, ascii_char in replacements.items():
-            cv_content = cv_content.replace(uni, ascii_char)
-        # Also replace any other non-ASCII chars with '?'
-        cv_content = cv_content.encode('ascii', errors='replace').decode('ascii')
-
-    # Parse CV content
-    lines = cv_content.split('\n')
-
-    # Extract name and title (first few lines)
-    name = ""
-    title = ""
-    contact_info = []
-
-    for i, line in enumerate(lines[:10]):
-        line = line.strip()
-        if line and not re.match(r'^[_\-\=\s]*[A-Z][A-Z\s&]+[_\-\=\s]*$', line):
-            if not name:
-                name = line
-            elif not title and len(line) < 50:
-                title = line
-            elif '@' in line or re.match(r'^[\+]?\d', line) or 'www.' in line:
-                contact_info.append(line)
-
-    # Header section
-    if name:
-        if use_custom_font:
-            pdf.set_font('DejaVu', 'B', 20)
-        else:
-            pdf.set_font('Arial', 'B', 20)
-        pdf.cell(0, 10, name, ln=True, align='C')
-
-    if title:
-        if use_custom_font:
-            pdf.set_font('DejaVu', '', 14)
-        else:
-            pdf.set_font('Arial', '', 14)
-        pdf.cell(0, 8, title, ln=True, align='C')
+# Renderers live in pdf_renderer so render workers can import them without this app
+from pdf_renderer import (
+    ENHANCED_PDF_RENDERER, CV_PDF_RENDERER, HAS_PYMUPDF, generate_enhanced_pdf, generate_cv_pdf,
+    generate_cv_text_fallback_enhanced, generate_cv_text_fallback
+)
+from render_service import render_service, RenderQueueFullError, RenderTimeoutError, RenderWorkerLostError
+from cv_export import stream_cv_export
+from cv_precompute import CVPreparer, get_prepared_content, source_markers
+from cv_text import clean_cv_text
+from cv_sections import parse_cv_sections
 
-    # Contact info
-    if contact_info:
-        if use_custom_font:
-            pdf.set_font('DejaVu', '', 10)
-        else:
-            pdf.set_font('Arial', '', 10)
-        for contact in contact_info:
-            pdf.cell(0, 6, contact, ln=True, align='C')
+def render_pdf(template: str, content: str, projects: Optional[List[dict]] = None) -> bytes:
+    """Render a CV in the render worker pool; overload and timeouts become 503 / 504"""
+    return _in_render_pool(render_service.render, {"template": template, "content": content, "projects": projects or []})
 
-    pdf.ln(1)
+def rasterize_pdf_page(pdf_bytes: bytes, page_number: int, width: int) -> bytes:
+    """PNG of one page of a rendered PDF, made in the render worker pool"""
+    return _in_render_pool(render_service.rasterize, pdf_bytes, page_number, width)
 
-    # Improved section/heading detection and decoration
-    section_keywords = ['PROFILE', 'SUMMARY', 'SKILLS', 'EXPERIENCE', 'EDUCATION', 'PROJECTS', 'ABOUT', 'CERTIFICATIONS', 'ACHIEVEMENTS', 'CONTACT']
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        # Detect section headers: all uppercase and longer than 3 chars, or contains section keyword
-        is_header = (
-            (line.isupper() and len(line) > 3) or
-            any(kw in line.upper() for kw in section_keywords)
-        )
-        if is_header:
-            pdf.ln(1)  # Extra space before section
-            if use_custom_font:
-                pdf.set_font('DejaVu', 'B', 14)
-            else:
-                pdf.set_font('Arial', 'B', 14)
-            pdf.set_fill_color(230, 236, 245)
-            pdf.cell(0, 10, line.title(), ln=True, fill=True)
-            pdf.ln(1)
-        else:
-            # Bullet points
-            if line.startswith('-') or line.startswith('*'):
-                pdf.set_x(20)
-                if use_custom_font:
-                    pdf.set_font('DejaVu', '', 10)
-                else:
-                    pdf.set_font('Arial', '', 10)
-                pdf.cell(0, 8, line, ln=True)
-            else:
-                if use_custom_font:
-                    pdf.set_font('DejaVu', '', 10)
-                else:
-                    pdf.set_font('Arial', '', 10)
-                pdf.multi_cell(0, 8, line)
-
-    # Return PDF as bytes
-    pdf_bytes = BytesIO()
-    pdf_output = pdf.output(dest='S').encode('latin1') if not use_custom_font else pdf.output(dest='S').encode('utf-8', errors='replace')
-    pdf_bytes.write(pdf_output)
-    pdf_bytes.seek(0)
-    return pdf_bytes
-
-def _write_section_to_pdf(pdf, section_name: str, content_lines: list, use_custom_font: bool = False):
-    """Helper function to write a section to PDF with proper formatting."""
-    # Section header
-    if use_custom_font:
-        pdf.set_font('DejaVu', 'B', 14)
-    else:
-        pdf.set_font('Arial', 'B', 14)
-    pdf.set_fill_color(240, 240, 240)
-    pdf.cell(0, 8, section_name.upper(), ln=True, fill=True)
-    pdf.ln(1)
-    
-    # Section content
-    if use_custom_font:
-        pdf.set_font('DejaVu', '', 10)
-    else:
-        pdf.set_font('Arial', '', 10)
-    
-    for line in content_lines:
-        if line.strip():
-            # Check if this looks like a bullet point or subheading
-            if line.strip().startswith('•') or line.strip().startswith('-'):
-                pdf.cell(10, 6, '', ln=False)  # Indent
-                pdf.cell(0, 6, line.strip(), ln=True)
-            elif re.match(r'^[A-Z][A-Za-z\s]+:', line.strip()):
-                # Subheading (like "Company: ", "Duration: ")
-                if use_custom_font:
-                    pdf.set_font('DejaVu', 'B', 10)
-                else:
-                    pdf.set_font('Arial', 'B', 10)
-                pdf.cell(0, 6, line.strip(), ln=True)
-                if use_custom_font:
-                    pdf.set_font('DejaVu', '', 10)
-                else:
-                    pdf.set_font('Arial', '', 10)
-            else:
-                pdf.cell(0, 6, line.strip(), ln=True)
-    
-    pdf.ln(1)
+def _in_render_pool(job, *args) -> bytes:
+    try:
+        return job(*args)
+    except RenderQueueFullError as e:
+        print(f"⚠️ Render queue full: {e}")
+        raise HTTPException(status_code=503, detail="PDF renderer is busy, please retry shortly",
+                            headers={"Retry-After": "2"})
+    except RenderTimeoutError as e:
+        print(f"⚠️ {e}")
+        raise HTTPException(status_code=504, detail="PDF rendering timed out")
+    except RenderWorkerLostError as e:
+        print(f"⚠️ {e}")
+        raise HTTPException(status_code=503, detail="PDF renderer restarted, please retry",
+                            headers={"Retry-After": "1"})
+
+STREAM_CHUNK_BYTES = int(os.getenv("STREAM_CHUNK_BYTES", str(64 * 1024)))
+
+def _iter_byte_chunks(data: bytes, chunk_size: int = STREAM_CHUNK_BYTES):
+    """Yield a rendered document in fixed-size pieces for StreamingResponse"""
+    if len(data) <= chunk_size:
+        yield data  # the common case: no slicing, no copy
+        return
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield view[start:start + chunk_size].tobytes()
 
 # Advanced PDF Processing Libraries
 try:
@@ -579,20 +474,31 @@ except ImportError:
     HAS_OPENAI = False
     OpenAI = None
 
+from openai_guard import GuardedOpenAIClient
+
 # Initialize OpenAI client with API key
 OPENAI_API_KEY = os.getenv("VITE_OPENAI_API_KEY")
+# Optional OpenAI-compatible endpoint, e.g. openai_stub_server.py for offline load tests
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
 
 if not HAS_OPENAI:
     print("⚠️  Warning: OpenAI library not installed. Chat features will not work.")
     openai_client = None
-elif not OPENAI_API_KEY or not OPENAI_API_KEY.startswith('sk-'):
+elif not OPENAI_BASE_URL and (not OPENAI_API_KEY or not OPENAI_API_KEY.startswith('sk-')):
     print("⚠️  Warning: OpenAI API key not set or invalid. Chat features will not work.")
     print("💡 Set VITE_OPENAI_API_KEY environment variable with your API key")
     openai_client = None
 else:
     try:
-        openai_client = OpenAI(api_key=OPENAI_API_KEY)
-        print("✅ OpenAI client initialized successfully")
+        # Retries and timeouts are owned by the guard so a slow API fails fast
+        openai_client = GuardedOpenAIClient.from_env(
+            OpenAI(
+                api_key=OPENAI_API_KEY or "stub-key",
+                base_url=OPENAI_BASE_URL or None,
+                max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "0"))
+            )
+        )
+        print(f"✅ OpenAI client initialized successfully{f' ({OPENAI_BASE_URL})' if OPENAI_BASE_URL else ''}")
     except Exception as e:
         print(f"❌ Failed to initialize OpenAI client: {e}")
         openai_client = None
@@ -636,8 +542,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Before-Id", "X-Render-Cache", "X-CV-Prepared", "ETag"],
 )
 
+# Reachable without signing in: CORS preflights and the health check
+PUBLIC_PATHS = {"/"}
+
+@app.middleware("http")
+async def scope_request_to_user(request: Request, call_next):
+    """Run the request as the user its access token was issued to; every query filters on it"""
+    if request.method == "OPTIONS" or request.url.path in PUBLIC_PATHS:
+        user_id = DEFAULT_USER_ID
+    else:
+        try:
+            user_id = authenticate(request.headers.get("Authorization"))
+        except AuthenticationError as e:
+            return JSONResponse(status_code=401, content={"detail": str(e)},
+                                headers={"WWW-Authenticate": "Bearer"})
+    with user_scope(user_id):
+        response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS"):
+        # A write may have changed a CV or queued updates: prepare it now, not at the next poll
+        cv_preparer.wake()
+    return response
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on startup"""
@@ -648,6 +576,15 @@ async def startup_event():
     except Exception as e:
         print(f"❌ Database initialization failed: {e}")
         raise e
+    # Start the render workers (each parses fonts and compiles styles) before the first download
+    render_service.start()
+    cv_preparer.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the CV preparer and the render worker processes"""
+    cv_preparer.stop()
+    render_service.shutdown()
 
 class ChatRequest(BaseModel):
     message: str
@@ -663,53 +600,19 @@ class CVResponse(BaseModel):
 
 # Database setup
 def init_db():
-    # SQLite setup (temporary)
     try:
         cursor, conn = get_db_cursor()
         
-        # Create tables if they don't exist
-        cursor.execute('''CREATE TABLE IF NOT EXISTS cvs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL DEFAULT 'Untitled CV',
-            filename TEXT NOT NULL,
-            original_content TEXT NOT NULL,
-            current_content TEXT NOT NULL,
-            is_active BOOLEAN DEFAULT FALSE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )''')
-        
-        cursor.execute('''CREATE TABLE IF NOT EXISTS chat_messages (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            message TEXT NOT NULL,
-            message_type TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )''')
-        
-        cursor.execute('''CREATE TABLE IF NOT EXISTS cv_updates (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            update_type TEXT NOT NULL,
-            content TEXT NOT NULL,
-            original_message TEXT NOT NULL,
-            processed BOOLEAN DEFAULT FALSE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )''')
-        
-        cursor.execute('''CREATE TABLE IF NOT EXISTS manual_projects (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            project_data TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )''')
-        
-        conn.commit()
+        # Create or upgrade tables and indexes
+        migrate(conn)
         cursor.close()
         conn.close()
-        print("✅ SQLite database initialized successfully")
+        print(f"✅ {DB_DIALECT} database initialized successfully")
         
         # Add some test projects if none exist
         try:
             cursor, conn = get_db_cursor()
-            cursor.execute("SELECT COUNT(*) FROM manual_projects")
+            cursor.execute("SELECT COUNT(*) FROM manual_projects WHERE user_id = ?", (current_user_id(),))
             project_count = cursor.fetchone()[0]
             
             if project_count == 0:
@@ -753,10 +656,7 @@ def init_db():
                     }
                 ]
                 
-                for project in test_projects:
-                    cursor.execute("INSERT INTO manual_projects (project_data) VALUES (?)", 
-                                  (json.dumps(project),))
-                
+                insert_projects(cursor, test_projects)
                 conn.commit()
                 print(f"✅ Added {len(test_projects)} test projects to database")
             else:
@@ -772,79 +672,6 @@ def init_db():
         print(f"❌ Database initialization failed: {e}")
         raise Exception(f"Failed to initialize database: {e}")
 
-def init_sqlite_db():
-    """Initialize SQLite database"""
-    conn = sqlite3.connect('cv_updater.db', timeout=30.0)
-    conn.execute("PRAGMA journal_mode=WAL")
-    cursor = conn.cursor()
-    
-    cursor.execute('''CREATE TABLE IF NOT EXISTS cvs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        title TEXT NOT NULL DEFAULT 'Untitled CV',
-        filename TEXT NOT NULL,
-        original_content TEXT NOT NULL,
-        current_content TEXT NOT NULL,
-        is_active BOOLEAN DEFAULT FALSE,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )''')
-    
-    cursor.execute('''CREATE TABLE IF NOT EXISTS chat_messages (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        message TEXT NOT NULL,
-        message_type TEXT NOT NULL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )''')
-    
-    cursor.execute('''CREATE TABLE IF NOT EXISTS cv_updates (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        update_type TEXT NOT NULL,
-        content TEXT NOT NULL,
-        original_message TEXT NOT NULL,
-        processed BOOLEAN DEFAULT FALSE,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )''')
-    
-    cursor.execute('''CREATE TABLE IF NOT EXISTS manual_projects (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        project_data TEXT NOT NULL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )''')
-    
-    # Check if 'processed' column exists in cv_updates table and add it if not
-    try:
-        cursor.execute("PRAGMA table_info(cv_updates)")
-        columns = [row[1] for row in cursor.fetchall()]
-        if 'processed' not in columns:
-            cursor.execute("ALTER TABLE cv_updates ADD COLUMN processed BOOLEAN DEFAULT FALSE")
-            print("Added 'processed' column to cv_updates table")
-    except Exception as e:
-        print(f"Note: {e}")
-    
-    # Add new columns if they don't exist
-    try:
-        cursor.execute("PRAGMA table_info(cvs)")
-        columns = [row[1] for row in cursor.fetchall()]
-        if 'title' not in columns:
-            cursor.execute("ALTER TABLE cvs ADD COLUMN title TEXT NOT NULL DEFAULT 'Untitled CV'")
-            print("Added 'title' column to cvs table")
-        if 'is_active' not in columns:
-            cursor.execute("ALTER TABLE cvs ADD COLUMN is_active BOOLEAN DEFAULT FALSE")
-            print("Added 'is_active' column to cvs table")
-            
-            # Set the most recent CV as active if no CV is marked as active
-            cursor.execute("SELECT COUNT(*) FROM cvs WHERE is_active = TRUE")
-            active_count = cursor.fetchone()[0]
-            if active_count == 0:
-                cursor.execute("UPDATE cvs SET is_active = TRUE WHERE id = (SELECT id FROM cvs ORDER BY updated_at DESC LIMIT 1)")
-                print("Set most recent CV as active")
-    except Exception as e:
-        print(f"Note: {e}")
-    
-    conn.commit()
-    conn.close()
-    print("✅ SQLite database initialized successfully")
-
 init_db()
 
 import threading
@@ -854,43 +681,6 @@ from contextlib import contextmanager
 # Global database lock
 db_lock = threading.RLock()
 
-def get_db_connection():
-    """Get database connection with proper error handling"""
-    try:
-        # Try to use the imported get_db_cursor from db.py
-        from db import get_db_cursor
-        # This will return a connection from the db.py module
-        return None  # For now, we'll use SQLite fallback
-    except ImportError:
-        # Fallback to SQLite
-        import sqlite3
-        conn = sqlite3.connect('cv_updater.db', timeout=30.0)
-        conn.execute("PRAGMA journal_mode=WAL")
-        return conn
-
-@contextmanager
-def get_db_cursor_context():
-    """Context manager for database cursor with proper connection handling"""
-    cursor = None
-    conn = None
-    try:
-        import sqlite3
-        conn = sqlite3.connect('cv_updater.db', timeout=30.0)
-        conn.execute("PRAGMA journal_mode=WAL")
-        cursor = conn.cursor()
-        yield cursor, conn
-        conn.commit()
-    except Exception as e:
-        if conn:
-            conn.rollback()
-        print(f"Database operation error: {e}")
-        raise
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
-
 def extract_text_from_file(file: UploadFile) -> str:
     """Enhanced file text extraction with better error handling and validation"""
     try:
@@ -931,51 +721,6 @@ def extract_text_from_file(file: UploadFile) -> str:
         print(f"❌ Error extracting text from {file.filename}: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to process file: {str(e)}")
 
-def clean_cv_text(text: str) -> str:
-    """Clean and normalize CV text by removing problematic Unicode characters"""
-    import unicodedata
-    
-    # Remove or replace problematic Unicode characters
-    cleaned_text = text
-    
-    # Replace common Unicode icons with text equivalents
-    unicode_replacements = {
-        '\uf1ad': '',  # Remove problematic Unicode character
-        '\uf0f1': 'Phone: ',  # Phone icon
-        '\uf0e0': 'Email: ',  # Email icon
-        '\uf08c': 'LinkedIn: ',  # LinkedIn icon
-        '\uf3c5': 'Home: ',  # Home icon
-        '\uf1ad': '',  # Building/company icon
-        '\uf0b1': '',  # Other problematic characters
-        '\u2013': '-',  # En dash
-        '\u2014': '-',  # Em dash
-        '\u2018': "'",  # Left single quote
-        '\u2019': "'",  # Right single quote
-        '\u201c': '"',  # Left double quote
-        '\u201d': '"',  # Right double quote
-        '\u2022': '•',  # Bullet point
-        '\u2026': '...',  # Ellipsis
-    }
-    
-    for unicode_char, replacement in unicode_replacements.items():
-        cleaned_text = cleaned_text.replace(unicode_char, replacement)
-    
-    # Remove other problematic Unicode characters that can't be encoded in utf-8
-    # cleaned_text = ''.join(char for char in cleaned_text if ord(char) < 256 or char in '•')
-    
-    # Normalize Unicode characters
-    cleaned_text = unicodedata.normalize('NFKC', cleaned_text)
-    
-    # Clean up extra whitespace but preserve line breaks
-    # Replace multiple spaces with single space, but keep newlines
-    cleaned_text = re.sub(r'[ \t]+', ' ', cleaned_text)
-    # Clean up multiple newlines
-    cleaned_text = re.sub(r'\n\s*\n', '\n\n', cleaned_text)
-    # Remove trailing spaces from lines
-    cleaned_text = re.sub(r' +$', '', cleaned_text, flags=re.MULTILINE)
-    
-    return cleaned_text.strip()
-
 def extract_text_from_pdf(pdf_content: bytes) -> str:
     """Enhanced PDF text extraction with multiple fallback methods"""
     
@@ -3503,14 +3248,26 @@ def generate_cv_with_projects(cursor=None, conn=None) -> str:
         print(f"Error generating CV with projects: {e}")
         return "Error generating updated CV"
 
-def _generate_cv_with_projects_internal(cursor, conn) -> str:
+def build_cv_with_projects(cursor=None) -> str:
+    """Assemble the CV with all projects integrated without writing it back (for read-only endpoints)"""
+    try:
+        if cursor is None:
+            with get_db_cursor_context() as (cursor, conn):
+                return _generate_cv_with_projects_internal(cursor, conn, persist=False)
+        return _generate_cv_with_projects_internal(cursor, None, persist=False)
+
+    except Exception as e:
+        print(f"Error building CV with projects: {e}")
+        return "Error generating updated CV"
+
+def _generate_cv_with_projects_internal(cursor, conn, persist: bool = True) -> str:
     """Internal implementation of CV generation with projects"""
     # Get active CV
-    cursor.execute("SELECT current_content FROM cvs WHERE is_active = TRUE LIMIT 1")
+    cursor.execute("SELECT current_content FROM cvs WHERE user_id = ? AND is_active = TRUE LIMIT 1", (current_user_id(),))
     cv_row = cursor.fetchone()
     if not cv_row:
         # If no active CV, get the most recent one
-        cursor.execute("SELECT current_content FROM cvs ORDER BY updated_at DESC LIMIT 1")
+        cursor.execute("SELECT current_content FROM cvs WHERE user_id = ? ORDER BY updated_at DESC LIMIT 1", (current_user_id(),))
         cv_row = cursor.fetchone()
     
     if not cv_row:
@@ -3525,7 +3282,7 @@ def _generate_cv_with_projects_internal(cursor, conn) -> str:
     original_cv = clean_duplicate_project_sections(original_cv)
     
     # Get manual projects from database
-    cursor.execute("SELECT project_data FROM manual_projects ORDER BY created_at ASC")
+    cursor.execute("SELECT project_data FROM manual_projects WHERE user_id = ? ORDER BY created_at ASC", (current_user_id(),))
     manual_projects = cursor.fetchall()
     
     new_projects = []
@@ -3638,13 +3395,12 @@ def _generate_cv_with_projects_internal(cursor, conn) -> str:
     cv_lines.extend(projects_content)
     print(f"📝 Inserted {len(projects_content)} project lines after header")
     
+    # Old project sections were already removed above; cleaning again here would drop the new one
     updated_cv = '\n'.join(cv_lines)
     
-    # Final cleanup to remove any remaining duplicates
-    updated_cv = clean_duplicate_project_sections(updated_cv)
-    
     # Update in database
-    cursor.execute("UPDATE cvs SET current_content = ?, updated_at = CURRENT_TIMESTAMP WHERE is_active = TRUE", (updated_cv,))
+    if persist:
+        update_active_cv_content(cursor, updated_cv)
     
     return updated_cv
 
@@ -3786,131 +3542,6 @@ def extract_section_from_cv(cv_content: str, section_name: str) -> str:
     print(f"[DEBUG] No section header found for '{section_name}' (tried {len(patterns)} patterns).")
     return ''
 
-def parse_cv_sections(cv_content: str) -> dict:
-    """Parse CV content to identify sections and their positions"""
-    
-    sections = {}
-    cv_lines = cv_content.split('\n')
-    
-    # Enhanced section headers patterns to handle various formats
-    section_patterns = {
-        'profile': [
-            r'^\s*PROFILE\s+SUMMARY\s*$', r'^\s*PROFILE\s*$', r'^\s*SUMMARY\s*$', r'^\s*ABOUT\s+ME\s*$',
-            r'^\s*OBJECTIVE\s*$', r'^\s*PROFESSIONAL\s+SUMMARY\s*$', r'^\s*CAREER\s+OBJECTIVE\s*$',
-            r'^\s*_+\s*PROFILE\s+SUMMARY\s*_+\s*$', r'^\s*_+\s*PROFILE\s*_+\s*$'
-        ],
-        'skills': [
-            r'^\s*SKILLS?\s*$', r'^\s*TECHNICAL\s+SKILLS?\s*$', r'^\s*CORE\s+COMPETENCIES\s*$',
-            r'^\s*TECHNOLOGIES\s*$', r'^\s*TECHNICAL\s+COMPETENCIES\s*$', r'^\s*PROFESSIONAL\s+SKILLS?\s*$',
-            r'^\s*_+\s*SKILLS?\s*_+\s*$', r'^\s*_+\s*TECHNICAL\s+SKILLS?\s*_+\s*$'
-        ],
-        'experience': [
-            r'^\s*WORK\s+EXPERIENCE\s*$', r'^\s*EXPERIENCE\s*$', r'^\s*PROFESSIONAL\s+EXPERIENCE\s*$',
-            r'^\s*EMPLOYMENT\s+HISTORY\s*$', r'^\s*CAREER\s+HISTORY\s*$', r'^\s*WORK\s+HISTORY\s*$',
-            r'^\s*_+\s*WORK\s+EXPERIENCE\s*_+\s*$', r'^\s*_+\s*EXPERIENCE\s*_+\s*$'
-        ],
-        'education': [
-            r'^\s*EDUCATION\s*$', r'^\s*EDUCATIONAL\s+BACKGROUND\s*$', r'^\s*ACADEMIC\s+BACKGROUND\s*$',
-            r'^\s*QUALIFICATIONS\s*$', r'^\s*ACADEMIC\s+QUALIFICATIONS\s*$', r'^\s*DEGREES\s*$',
-            r'^\s*_+\s*EDUCATION\s*_+\s*$', r'^\s*_+\s*EDUCATIONAL\s+BACKGROUND\s*_+\s*$'
-        ],
-        'projects': [
-            r'^\s*PROJECTS?\s*$', r'^\s*KEY\s+PROJECTS?\s*$', r'^\s*NOTABLE\s+PROJECTS?\s*$',
-            r'^\s*PERSONAL\s+PROJECTS?\s*$', r'^\s*PORTFOLIO\s*$', r'^\s*SELECTED\s+PROJECTS?\s*$',
-            r'^\s*MAJOR\s+PROJECTS?\s*$', r'^\s*PROJECT\s+EXPERIENCE\s*$', r'^\s*PROFESSIONAL\s+PROJECTS?\s*$',
-            r'^\s*_+\s*PROJECTS?\s*_+\s*$'
-        ],
-        'contact': [
-            r'^\s*CONTACT\s*$', r'^\s*CONTACT\s+INFORMATION\s*$', r'^\s*CONTACT\s+DETAILS\s*$',
-            r'^\s*PERSONAL\s+INFORMATION\s*$', r'^\s*CONTACT\s+INFO\s*$',
-            r'^\s*_+\s*CONTACT\s*_+\s*$', r'^\s*_+\s*CONTACT\s+INFORMATION\s*_+\s*$'
-        ],
-        'objective': [
-            r'^\s*OBJECTIVE\s*$', r'^\s*CAREER\s+OBJECTIVE\s*$', r'^\s*PROFESSIONAL\s+OBJECTIVE\s*$',
-            r'^\s*GOAL\s*$', r'^\s*CAREER\s+GOAL\s*$',
-            r'^\s*_+\s*OBJECTIVE\s*_+\s*$', r'^\s*_+\s*CAREER\s+OBJECTIVE\s*_+\s*$'
-        ],
-        'certifications': [
-            r'^\s*CERTIFICATIONS\s*$', r'^\s*CERTIFICATES\s*$', r'^\s*PROFESSIONAL\s+CERTIFICATIONS\s*$',
-            r'^\s*LICENSES\s*$', r'^\s*CREDENTIALS\s*$', r'^\s*TRAINING\s*$',
-            r'^\s*_+\s*CERTIFICATIONS\s*_+\s*$'
-        ],
-        'research': [
-            r'^\s*RESEARCH\s*$', r'^\s*PUBLICATIONS\s*$', r'^\s*RESEARCH\s+PAPERS\s*$',
-            r'^\s*ACADEMIC\s+PUBLICATIONS\s*$', r'^\s*THESIS\s*$', r'^\s*DISSERTATION\s*$',
-            r'^\s*STUDIES\s*$', r'^\s*_+\s*RESEARCH\s*_+\s*$'
-        ],
-        'achievements': [
-            r'^\s*ACHIEVEMENTS\s*$', r'^\s*AWARDS\s*$', r'^\s*HONORS\s*$',
-            r'^\s*RECOGNITIONS\s*$', r'^\s*SCHOLARSHIPS\s*$', r'^\s*ACCOMPLISHMENTS\s*$',
-            r'^\s*_+\s*ACHIEVEMENTS\s*_+\s*$'
-        ],
-        'leadership': [
-            r'^\s*LEADERSHIP\s*$', r'^\s*MANAGEMENT\s*$', r'^\s*TEAM\s+LEADERSHIP\s*$',
-            r'^\s*SUPERVISION\s*$', r'^\s*DIRECTION\s*$',
-            r'^\s*_+\s*LEADERSHIP\s*_+\s*$'
-        ],
-        'volunteer': [
-            r'^\s*VOLUNTEER\s*$', r'^\s*VOLUNTEER\s+WORK\s*$', r'^\s*COMMUNITY\s+SERVICE\s*$',
-            r'^\s*CHARITY\s+WORK\s*$', r'^\s*PRO\s+BONO\s*$',
-            r'^\s*_+\s*VOLUNTEER\s*_+\s*$'
-        ],
-        'languages': [
-            r'^\s*LANGUAGES\s*$', r'^\s*LANGUAGE\s+SKILLS\s*$', r'^\s*SPOKEN\s+LANGUAGES\s*$',
-            r'^\s*LINGUISTIC\s+SKILLS\s*$',
-            r'^\s*_+\s*LANGUAGES\s*_+\s*$'
-        ],
-        'technologies': [
-            r'^\s*TECHNOLOGIES\s*$', r'^\s*TOOLS\s*$', r'^\s*SOFTWARE\s*$',
-            r'^\s*PLATFORMS\s*$', r'^\s*SYSTEMS\s*$',
-            r'^\s*_+\s*TECHNOLOGIES\s*_+\s*$'
-        ],
-        'interests': [
-            r'^\s*INTERESTS\s*$', r'^\s*HOBBIES\s*$', r'^\s*PERSONAL\s+INTERESTS\s*$',
-            r'^\s*PASSIONS\s*$',
-            r'^\s*_+\s*INTERESTS\s*_+\s*$'
-        ],
-        'references': [
-            r'^\s*REFERENCES\s*$', r'^\s*REFEREES\s*$', r'^\s*RECOMMENDATIONS\s*$',
-            r'^\s*ENDORSEMENTS\s*$',
-            r'^\s*_+\s*REFERENCES\s*_+\s*$'
-        ],
-        'additional': [
-            r'^\s*ADDITIONAL\s*$', r'^\s*MISCELLANEOUS\s*$', r'^\s*OTHER\s*$',
-            r'^\s*EXTRA\s*$',
-            r'^\s*_+\s*ADDITIONAL\s*_+\s*$'
-        ]
-    }
-    
-    for i, line in enumerate(cv_lines):
-        line_upper = line.upper().strip()
-        
-        # Check for section headers with enhanced pattern matching
-        for section_type, patterns in section_patterns.items():
-            for pattern in patterns:
-                if re.match(pattern, line_upper, re.IGNORECASE):
-                    sections[section_type] = {
-                        'start_line': i,
-                        'header': line.strip(),
-                        'content_start': i + 1
-                    }
-                    break
-            if section_type in sections:
-                    break
-    
-    # Find section end positions
-    section_names = list(sections.keys())
-    for i, section_name in enumerate(section_names):
-        if i < len(section_names) - 1:
-            # Next section starts where this one ends
-            next_section = sections[section_names[i + 1]]
-            sections[section_name]['end_line'] = next_section['start_line'] - 1
-        else:
-            # Last section goes to end of document
-            sections[section_name]['end_line'] = len(cv_lines) - 1
-    
-    return sections
-
 def insert_content_in_section(cv_lines: List[str], section_info: dict, new_content: List[str]) -> List[str]:
     """Insert new content at the end of a specific section"""
     if not section_info:
@@ -3952,8 +3583,8 @@ def enhance_cv_with_openai(original_cv: str, updates: List[tuple]) -> str:
         # Add education to education section
         if education:
             edu_content = []
-            for edu in education:
-                formatted_edu = extract_education_from_message(edu)
+            # Each entry is its own AI extraction, so they run concurrently
+            for edu, formatted_edu in zip(education, _run_per_section(extract_education_from_message, education)):
                 # Only add if it's properly formatted
                 if formatted_edu != edu.strip() or any(word in edu.lower() for word in ['degree', 'university', 'college', 'certification', 'phd', 'master', 'bachelor']):
                     edu_content.append(f"• {formatted_edu}")
@@ -4049,24 +3680,20 @@ async def root():
 async def test_endpoint():
     """Test endpoint to verify backend and database connectivity"""
     try:
-        with get_db_cursor_context() as (cursor, conn):
-            # Test database connection
-            cursor.execute("SELECT COUNT(*) FROM manual_projects")
-            project_count = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM cvs")
-            cv_count = cursor.fetchone()[0]
-            
-            return {
-                "status": "healthy",
-                "database": "connected",
-                "projects_count": project_count,
-                "cvs_count": cv_count,
-                "timestamp": datetime.now().isoformat(),
-                "cors_origins": os.getenv("CORS_ORIGINS", "not_set"),
-                "allowed_origins": allowed_origins,
-                "cors_fixed": "YES - All origins allowed"
-            }
+        # Test database connection
+        project_count = await project_repository.count()
+        cv_count = await cv_repository.count()
+        
+        return {
+            "status": "healthy",
+            "database": "connected",
+            "projects_count": project_count,
+            "cvs_count": cv_count,
+            "timestamp": datetime.now().isoformat(),
+            "cors_origins": os.getenv("CORS_ORIGINS", "not_set"),
+            "allowed_origins": allowed_origins,
+            "cors_fixed": "YES - All origins allowed"
+        }
     except Exception as e:
         return {
             "status": "error",
@@ -4096,7 +3723,7 @@ async def test_download_endpoint(request: ProjectSelectionRequest):
         }
 
 @app.post("/upload-cv/")
-async def upload_cv(
+def upload_cv(
     file: UploadFile = File(...),
     extracted_text: str = Form(None)
 ):
@@ -4118,41 +3745,33 @@ async def upload_cv(
             title = file.filename.replace('.pdf', '').replace('.docx', '').replace('.txt', '').replace('_', ' ').title()
             
             # Clear all existing projects when new CV is uploaded
-            cursor.execute("DELETE FROM manual_projects")
+            cursor.execute("DELETE FROM manual_projects WHERE user_id = ?", (current_user_id(),))
             print("🗑️ Cleared existing projects")
             
             # Set all other CVs as inactive
-            cursor.execute("UPDATE cvs SET is_active = FALSE")
+            cursor.execute("UPDATE cvs SET is_active = FALSE WHERE user_id = ?", (current_user_id(),))
             print("🔄 Set other CVs as inactive")
             
             # Insert new CV as active
-            cursor.execute('''INSERT INTO cvs (title, filename, original_content, current_content, is_active) 
-                             VALUES (?, ?, ?, ?, TRUE)''', 
-                          (title, file.filename, cv_text, cv_text))
+            cursor.execute('''INSERT INTO cvs (title, filename, original_content, current_content, is_active, user_id)
+                             VALUES (?, ?, ?, ?, TRUE, ?)''',
+                          (title, file.filename, cv_text, cv_text, current_user_id()))
+            record_cv_version(cursor, cursor.lastrowid, cv_text, "Uploaded CV")
             
             print(f"✅ Successfully stored CV in database. Content length: {len(cv_text)} characters")
             
-            # Verify the CV was stored correctly
-            cursor.execute("SELECT current_content FROM cvs WHERE is_active = TRUE LIMIT 1")
-            stored_cv = cursor.fetchone()
-            
-            if stored_cv and len(stored_cv[0]) > 0:
-                print("✅ CV content verified in database - chat system will have full access")
-            else:
-                print("⚠️ Warning: CV might not be properly stored")
-            
             # Extract and insert projects from CV
-            extracted_projects = extract_projects_from_cv(stored_cv[0])
+            extracted_projects = extract_projects_from_cv(cv_text)
             print(f"🔍 Extracted {len(extracted_projects)} projects from CV.")
-            for project in extracted_projects:
-                cursor.execute("INSERT INTO manual_projects (project_data) VALUES (?)", (json.dumps(project),))
-            print(f"✅ Inserted {len(extracted_projects)} projects into manual_projects table.")
+            project_ids = insert_projects(cursor, extracted_projects)
+            print(f"✅ Inserted {len(project_ids)} projects into manual_projects table.")
         
         return JSONResponse(status_code=200, content={
             "message": f"✅ CV uploaded successfully! Chat system now has full access to your {len(cv_text)} character CV content.", 
             "filename": file.filename,
             "title": title,
             "content_length": len(cv_text),
+            "project_ids": project_ids,
             "status": "ready_for_chat"
         })
         
@@ -4163,7 +3782,7 @@ async def upload_cv(
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 @app.post("/upload-cv-for-projects/")
-async def upload_cv_for_projects(
+def upload_cv_for_projects(
     file: UploadFile = File(...),
     extracted_text: str = Form(None)
 ):
@@ -4215,7 +3834,7 @@ async def upload_cv_for_projects(
             title = file.filename.replace('.pdf', '').replace('.docx', '').replace('.txt', '').replace('_', ' ').title()
             
             # Clear all existing projects when new CV is uploaded for project extraction
-            cursor.execute("DELETE FROM manual_projects")
+            cursor.execute("DELETE FROM manual_projects WHERE user_id = ?", (current_user_id(),))
             print("🗑️ Cleared existing projects for new CV upload")
             
             # Extract ONLY projects from CV using the enhanced project extractor
@@ -4250,14 +3869,8 @@ async def upload_cv_for_projects(
                 print(f"    Technologies: {project.get('technologies', [])}")
             
             # Insert extracted projects into database
-            for project in extracted_projects:
-                cursor.execute("INSERT INTO manual_projects (project_data) VALUES (?)", (json.dumps(project),))
-            print(f"✅ Inserted {len(extracted_projects)} projects into manual_projects table.")
-            
-            # Verify projects were inserted
-            cursor.execute("SELECT COUNT(*) FROM manual_projects")
-            inserted_count = cursor.fetchone()[0]
-            print(f"📊 Verified {inserted_count} projects in database")
+            project_ids = insert_projects(cursor, extracted_projects)
+            print(f"✅ Inserted {len(project_ids)} projects into manual_projects table.")
         
         return JSONResponse(status_code=200, content={
             "message": f"✅ Successfully extracted {len(extracted_projects)} projects from your CV!", 
@@ -4265,6 +3878,7 @@ async def upload_cv_for_projects(
             "title": title,
             "projects_extracted": len(extracted_projects),
             "extracted_projects": extracted_projects,  # Return the actual projects
+            "project_ids": project_ids,
             "status": "projects_extracted"
         })
         
@@ -4277,14 +3891,14 @@ async def upload_cv_for_projects(
         raise HTTPException(status_code=500, detail=f"Project extraction failed: {str(e)}")
 
 @app.post("/chat/", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+def chat(request: ChatRequest):
     try:
         with get_db_cursor_context() as (cursor, conn):
-            cursor.execute("INSERT INTO chat_messages (message, message_type) VALUES (?, ?)", 
-                          (request.message, "user"))
+            cursor.execute("INSERT INTO chat_messages (message, message_type, user_id) VALUES (?, ?, ?)",
+                          (request.message, "user", current_user_id()))
         
             # Get current CV content for context with enhanced debugging
-            cursor.execute("SELECT current_content, filename FROM cvs WHERE is_active = TRUE LIMIT 1")
+            cursor.execute("SELECT current_content, filename FROM cvs WHERE user_id = ? AND is_active = TRUE LIMIT 1", (current_user_id(),))
             cv_row = cursor.fetchone()
             
             if cv_row:
@@ -4347,7 +3961,7 @@ async def chat(request: ChatRequest):
                     
                     print(f"[DIAG] CV after update (excerpt): {updated_cv[updated_cv.lower().find(section_type):][:500] if section_type in updated_cv.lower() else updated_cv[:500]}")
                     if updated_cv != cv_content:
-                        cursor.execute("UPDATE cvs SET current_content = ?, updated_at = CURRENT_TIMESTAMP WHERE is_active = TRUE", (updated_cv,))
+                        update_active_cv_content(cursor, updated_cv)
                         cv_updated = True
                         print(f"[DIAG] DB updated with new {section_type} section.")
                         # Extract and return the updated section
@@ -4360,7 +3974,7 @@ async def chat(request: ChatRequest):
                     if category == "PROJECT_ADD":
                         try:
                             project_data = extract_project_from_message(extracted_content)
-                            cursor.execute("INSERT INTO manual_projects (project_data) VALUES (?)", (json.dumps(project_data),))
+                            insert_projects(cursor, [project_data])
                         except:
                             pass
             
@@ -4394,7 +4008,7 @@ async def chat(request: ChatRequest):
                     
                     # For projects, also check the projects database
                     if category == "PROJECT_SHOW":
-                        cursor.execute("SELECT project_data FROM manual_projects ORDER BY created_at DESC")
+                        cursor.execute("SELECT project_data FROM manual_projects WHERE user_id = ? ORDER BY created_at DESC", (current_user_id(),))
                         projects = cursor.fetchall()
                         if projects:
                             response_text += f"\n\n🗄️ **Projects Database ({len(projects)} projects):**\n"
@@ -4447,7 +4061,7 @@ async def chat(request: ChatRequest):
                     
                     print(f"[DIAG] CV after update (excerpt): {updated_cv[updated_cv.lower().find(section_type):][:500] if section_type in updated_cv.lower() else updated_cv[:500]}")
                     if updated_cv != cv_content:
-                        cursor.execute("UPDATE cvs SET current_content = ?, updated_at = CURRENT_TIMESTAMP WHERE is_active = TRUE", (updated_cv,))
+                        update_active_cv_content(cursor, updated_cv)
                         cv_updated = True
                         print(f"[DIAG] DB updated with new {section_type} section.")
                         updated_section = extract_section_from_cv(updated_cv, section_type)
@@ -4484,7 +4098,7 @@ async def chat(request: ChatRequest):
                     updated_cv, response_text = delete_cv_item(cv_content, section_type, extracted_info)
                     
                     if updated_cv != cv_content:
-                        cursor.execute("UPDATE cvs SET current_content = ?, updated_at = CURRENT_TIMESTAMP WHERE is_active = TRUE", (updated_cv,))
+                        update_active_cv_content(cursor, updated_cv)
                         cv_updated = True
                         response_text += f" The changes are now visible in your CV."
                     
@@ -4493,7 +4107,7 @@ async def chat(request: ChatRequest):
                         id_match = re.search(r'\b(\d+)\b', extracted_info)
                         if id_match:
                             project_id = int(id_match.group(1))
-                            cursor.execute("DELETE FROM manual_projects WHERE id = ?", (project_id,))
+                            cursor.execute("DELETE FROM manual_projects WHERE id = ? AND user_id = ?", (project_id, current_user_id()))
                             if cursor.rowcount > 0:
                                 response_text += f" Also removed project ID {project_id} from database."
             
@@ -4506,13 +4120,13 @@ async def chat(request: ChatRequest):
             elif category == "CV_CLEANUP":
                 response_text = "🧹 Cleaning up duplicate sections in your CV..."
                 cleaned_cv = clean_duplicate_project_sections(generate_cv_with_projects(cursor, conn))
-                cursor.execute("UPDATE cvs SET current_content = ?, updated_at = CURRENT_TIMESTAMP WHERE is_active = TRUE", (cleaned_cv,))
+                update_active_cv_content(cursor, cleaned_cv)
                 response_text += " ✅ CV cleaned up successfully! Your CV is now free of duplicate sections."
                 cv_updated = True
                 
             elif category == "LINKEDIN_BLOG":
-                # Get all projects from database
-                cursor.execute("SELECT id, project_data FROM manual_projects ORDER BY created_at DESC")
+                # Only the most recent project is used for the blog
+                cursor.execute("SELECT id, project_data FROM manual_projects WHERE user_id = ? ORDER BY created_at DESC LIMIT 1", (current_user_id(),))
                 projects = cursor.fetchall()
                 
                 if not projects:
@@ -4604,10 +4218,11 @@ async def chat(request: ChatRequest):
                     projects = extract_and_format_projects(cv_content)
                     
                     # Clear existing projects and store new ones
-                    cursor.execute("DELETE FROM manual_projects")
+                    cursor.execute("DELETE FROM manual_projects WHERE user_id = ?", (current_user_id(),))
                     
-                    for project in projects:
-                        project_data = {
+                    created_at = datetime.now().isoformat()
+                    insert_projects(cursor, [
+                        {
                             'id': project['id'],
                             'title': project['title'],
                             'description': project['description'],
@@ -4615,13 +4230,10 @@ async def chat(request: ChatRequest):
                             'technologies': project['technologies'],
                             'highlights': project['highlights'],
                             'role': project['role'],
-                            'created_at': datetime.now().isoformat()
+                            'created_at': created_at
                         }
-                        
-                        cursor.execute(
-                            "INSERT INTO manual_projects (project_data) VALUES (?)",
-                            (json.dumps(project_data),)
-                        )
+                        for project in projects
+                    ])
                     
                     response_text = f"✅ Extracted {len(projects)} projects from your CV!\n\n"
                     for i, project in enumerate(projects, 1):
@@ -4636,7 +4248,7 @@ async def chat(request: ChatRequest):
             
             elif category == "PROJECT_SHOW":
                 try:
-                    cursor.execute("SELECT project_data FROM manual_projects ORDER BY created_at DESC")
+                    cursor.execute("SELECT project_data FROM manual_projects WHERE user_id = ? ORDER BY created_at DESC", (current_user_id(),))
                     projects = cursor.fetchall()
                     
                     if not projects:
@@ -4664,7 +4276,7 @@ async def chat(request: ChatRequest):
                     # Extract project title or index from message
                     project_identifier = extracted_info.strip()
                     
-                    cursor.execute("SELECT project_data FROM manual_projects ORDER BY created_at DESC")
+                    cursor.execute("SELECT id, title FROM manual_projects WHERE user_id = ? ORDER BY created_at DESC", (current_user_id(),))
                     projects = cursor.fetchall()
                     
                     if not projects:
@@ -4676,19 +4288,18 @@ async def chat(request: ChatRequest):
                         try:
                             index = int(project_identifier) - 1
                             if 0 <= index < len(projects):
-                                project_json = projects[index][0]
-                                project = json.loads(project_json)
-                                project_id = project.get('id', '')
+                                project_id, project_title = projects[index]
                                 
-                                cursor.execute("DELETE FROM manual_projects WHERE project_data LIKE ?", (f'%"id": "{project_id}"%',))
-                                response_text = f"✅ Deleted project: {project['title']}"
+                                cursor.execute("DELETE FROM manual_projects WHERE id = ? AND user_id = ?", (project_id, current_user_id()))
+                                response_text = f"✅ Deleted project: {project_title}"
                                 deleted = True
                         except ValueError:
                             pass
                         
                         # Try to delete by title
                         if not deleted:
-                            cursor.execute("DELETE FROM manual_projects WHERE project_data LIKE ?", (f'%"title": "{project_identifier}"%',))
+                            cursor.execute("DELETE FROM manual_projects WHERE user_id = ? AND title = ? COLLATE NOCASE",
+                                           (current_user_id(), project_identifier))
                             if cursor.rowcount > 0:
                                 response_text = f"✅ Deleted project: {project_identifier}"
                                 deleted = True
@@ -4707,7 +4318,7 @@ async def chat(request: ChatRequest):
                     cleaned_cv = clean_cv_content(cv_content)
                     
                     if cleaned_cv != cv_content:
-                        cursor.execute("UPDATE cvs SET current_content = ?, updated_at = CURRENT_TIMESTAMP WHERE is_active = TRUE", (cleaned_cv,))
+                        update_active_cv_content(cursor, cleaned_cv)
                         cv_updated = True
                         response_text = "🧹 CV cleaned up successfully! Removed duplicates and formatting issues."
                     else:
@@ -4719,7 +4330,7 @@ async def chat(request: ChatRequest):
             elif category == "LINKEDIN_BLOG":
                 try:
                     # Get all projects
-                    cursor.execute("SELECT project_data FROM manual_projects ORDER BY created_at DESC")
+                    cursor.execute("SELECT project_data FROM manual_projects WHERE user_id = ? ORDER BY created_at DESC", (current_user_id(),))
                     projects = cursor.fetchall()
                     
                     if not projects:
@@ -4762,8 +4373,8 @@ async def chat(request: ChatRequest):
             debug_info = f"\n\n🔍 **Operation Details:** {category} ({operation})"
             print(f"💬 Chat Operation: {category} | Operation: {operation} | CV Updated: {cv_updated}")
             
-            cursor.execute("INSERT INTO chat_messages (message, message_type) VALUES (?, ?)", 
-                          (response_text, "bot"))
+            cursor.execute("INSERT INTO chat_messages (message, message_type, user_id) VALUES (?, ?, ?)",
+                          (response_text, "bot", current_user_id()))
             
             return ChatResponse(response=response_text, status="success")
     except Exception as e:
@@ -4772,25 +4383,18 @@ async def chat(request: ChatRequest):
 @app.get("/cv/current/", response_model=CVResponse)
 async def get_current_cv():
     try:
-        with get_db_cursor_context() as (cursor, conn):
-            # Get the active CV with current content (includes all updates)
-            cursor.execute("SELECT filename, current_content, updated_at FROM cvs WHERE is_active = TRUE LIMIT 1")
-            cv_row = cursor.fetchone()
-            
-            if not cv_row:
-                # If no active CV, get the most recent one
-                cursor.execute("SELECT filename, current_content, updated_at FROM cvs ORDER BY updated_at DESC LIMIT 1")
-                cv_row = cursor.fetchone()
-            
-            if not cv_row:
-                raise HTTPException(status_code=404, detail="No CV found. Please upload a CV first.")
-            
-            filename, current_content, updated_at = cv_row
-            
-            # Format the current CV for better display (this includes all updates)
-            formatted_cv = format_cv_for_display(current_content)
-            
-            return CVResponse(content=formatted_cv, filename=filename, last_updated=updated_at)
+        # Get the active CV with current content (includes all updates)
+        cv_row = await cv_repository.get_current()
+        
+        if not cv_row:
+            raise HTTPException(status_code=404, detail="No CV found. Please upload a CV first.")
+        
+        filename, current_content, updated_at = cv_row
+        
+        # Format the current CV for better display (this includes all updates)
+        formatted_cv = format_cv_for_display(current_content)
+        
+        return CVResponse(content=formatted_cv, filename=filename, last_updated=updated_at)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
@@ -4844,53 +4448,52 @@ def format_cv_for_display(cv_content: str) -> str:
 async def list_all_cvs():
     """Get list of all CVs with metadata"""
     try:
-        with get_db_cursor_context() as (cursor, conn):
-            cursor.execute('''SELECT id, title, filename, created_at, updated_at, is_active 
-                             FROM cvs ORDER BY updated_at DESC''')
-            cvs = cursor.fetchall()
-            
-            cv_list = []
-            for cv in cvs:
-                cv_id, title, filename, created_at, updated_at, is_active = cv
-                cv_list.append({
-                    "id": cv_id,
-                    "title": title,
-                    "filename": filename,
-                    "created_at": created_at,
-                    "updated_at": updated_at,
-                    "is_active": bool(is_active)
-                })
-            
-            return {"cvs": cv_list, "total_count": len(cv_list)}
+        cv_list = await cv_repository.list()
+        return {"cvs": cv_list, "total_count": len(cv_list)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+def _export_content(cv_id: int) -> Optional[str]:
+    """Text /cvs/{cv_id}/download renders for the current user's CV, or None if it is gone"""
+    with get_db_cursor_context() as (cursor, conn):
+        cv = _downloadable_cv(cursor, cv_id)
+    return cv[1] if cv else None
+
+def _export_response(cv_list: List[dict], prefix: str) -> StreamingResponse:
+    filename = f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    return StreamingResponse(stream_cv_export(cv_list, _export_content), media_type="application/zip",
+                             headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+@app.get("/cvs/export.zip")
+async def export_cvs_zip():
+    """Stream all of the user's stored CVs as PDFs in a ZIP archive, entry by entry as renders finish"""
+    try:
+        cv_list = [dict(cv, user_id=current_user_id()) for cv in await cv_repository.list()]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    return _export_response(cv_list, "cv_export")
+
+@app.get("/admin/cvs/export.zip")
+async def export_all_cvs_zip():
+    """Stream every tenant's CVs as a ZIP archive (users in ADMIN_USER_IDS only)"""
+    if not is_admin(current_user_id()):
+        raise HTTPException(status_code=403, detail="Exporting every user's CVs requires an admin account")
+    try:
+        cv_list = await cv_repository.list_all_tenants()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    return _export_response(cv_list, "cv_export_all")
 
 @app.get("/cvs/{cv_id}")
 async def get_cv_by_id(cv_id: int):
     """Get specific CV by ID"""
     try:
-        conn = sqlite3.connect('cv_updater.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''SELECT id, title, filename, current_content, created_at, updated_at, is_active 
-                         FROM cvs WHERE id = ?''', (cv_id,))
-        cv_row = cursor.fetchone()
-        conn.close()
+        cv = await cv_repository.get(cv_id)
         
-        if not cv_row:
+        if not cv:
             raise HTTPException(status_code=404, detail="CV not found")
         
-        cv_id, title, filename, content, created_at, updated_at, is_active = cv_row
-        
-        return {
-            "id": cv_id,
-            "title": title,
-            "filename": filename,
-            "content": content,
-            "created_at": created_at,
-            "updated_at": updated_at,
-            "is_active": bool(is_active)
-        }
+        return cv
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
@@ -4902,36 +4505,9 @@ class CVUpdateRequest(BaseModel):
 async def update_cv(cv_id: int, cv_data: CVUpdateRequest):
     """Update CV title and/or content"""
     try:
-        conn = sqlite3.connect('cv_updater.db')
-        cursor = conn.cursor()
-        
-        # Check if CV exists
-        cursor.execute("SELECT id FROM cvs WHERE id = ?", (cv_id,))
-        if not cursor.fetchone():
+        if not await cv_repository.update(cv_id, title=cv_data.title, content=cv_data.content):
             raise HTTPException(status_code=404, detail="CV not found")
         
-        # Update fields that are provided
-        update_fields = []
-        params = []
-        
-        if cv_data.title is not None:
-            update_fields.append("title = ?")
-            params.append(cv_data.title)
-            
-        if cv_data.content is not None:
-            update_fields.append("current_content = ?")
-            params.append(cv_data.content)
-        
-        if update_fields:
-            update_fields.append("updated_at = CURRENT_TIMESTAMP")
-            params.append(cv_id)
-            
-            query = f"UPDATE cvs SET {', '.join(update_fields)} WHERE id = ?"
-            cursor.execute(query, params)
-        
-        conn.commit()
-        conn.close()
-        
         return {"message": "CV updated successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
@@ -4940,29 +4516,10 @@ async def update_cv(cv_id: int, cv_data: CVUpdateRequest):
 async def delete_cv(cv_id: int):
     """Delete a CV"""
     try:
-        conn = sqlite3.connect('cv_updater.db')
-        cursor = conn.cursor()
-        
-        # Check if CV exists
-        cursor.execute("SELECT is_active FROM cvs WHERE id = ?", (cv_id,))
-        cv_row = cursor.fetchone()
-        
-        if not cv_row:
+        # If the deleted CV was active, the most recent CV becomes active
+        if not await cv_repository.delete(cv_id):
             raise HTTPException(status_code=404, detail="CV not found")
         
-        was_active = cv_row[0]
-        
-        # Delete the CV
-        cursor.execute("DELETE FROM cvs WHERE id = ?", (cv_id,))
-        
-        # If the deleted CV was active, make the most recent CV active
-        if was_active:
-            cursor.execute('''UPDATE cvs SET is_active = TRUE 
-                             WHERE id = (SELECT id FROM cvs ORDER BY updated_at DESC LIMIT 1)''')
-        
-        conn.commit()
-        conn.close()
-        
         return {"message": "CV deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
@@ -4971,64 +4528,85 @@ async def delete_cv(cv_id: int):
 async def activate_cv(cv_id: int):
     """Set a CV as the active one"""
     try:
-        conn = sqlite3.connect('cv_updater.db')
-        cursor = conn.cursor()
-        
-        # Check if CV exists
-        cursor.execute("SELECT id FROM cvs WHERE id = ?", (cv_id,))
-        if not cursor.fetchone():
+        if not await cv_repository.activate(cv_id):
             raise HTTPException(status_code=404, detail="CV not found")
         
-        # Set all CVs as inactive
-        cursor.execute("UPDATE cvs SET is_active = FALSE")
-        
-        # Set the specified CV as active
-        cursor.execute("UPDATE cvs SET is_active = TRUE WHERE id = ?", (cv_id,))
-        
-        conn.commit()
-        conn.close()
-        
         return {"message": "CV activated successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+@app.get("/cvs/{cv_id}/versions")
+async def list_versions_of_cv(cv_id: int):
+    """List the stored versions of a CV, newest first"""
+    try:
+        versions = await cv_repository.versions(cv_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    if versions is None:
+        raise HTTPException(status_code=404, detail="CV not found")
+    return {"cv_id": cv_id, "versions": versions, "total_count": len(versions)}
+
+@app.get("/cvs/{cv_id}/versions/{version_number}")
+async def get_version_of_cv(cv_id: int, version_number: int):
+    """Rebuild one version of a CV from its nearest keyframe"""
+    try:
+        content = await cv_repository.version_content(cv_id, version_number)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    if content is None:
+        raise HTTPException(status_code=404, detail="CV version not found")
+    return {"cv_id": cv_id, "version_number": version_number, "content": content}
+
+def _downloadable_cv(cursor, cv_id: int) -> Optional[tuple]:
+    """(title, content, prepared) of the current user's cv_id as downloads render it, None if not found.
+
+    content is the AI-formatted version prepared in the background; until it is ready
+    the active CV is assembled with its projects locally rather than waiting on OpenAI,
+    and any other CV is its stored text (a download asks the preparer to format it).
+    """
+    cursor.execute('''SELECT title, current_content, is_active FROM cvs WHERE id = ? AND user_id = ?''', (cv_id, current_user_id()))
+    cv_row = cursor.fetchone()
+    if not cv_row:
+        return None
+    title, content, is_active = cv_row
+    prepared = get_prepared_content(cursor, cv_id)
+    if prepared is not None:
+        return title, prepared, True
+    if is_active:
+        content = build_cv_with_projects(cursor)
+    return title, content or "", False
+
 @app.post("/cvs/{cv_id}/download")
-async def download_cv_by_id(cv_id: int):
+def download_cv_by_id(cv_id: int):
     """Download a specific CV as PDF"""
     try:
-        conn = sqlite3.connect('cv_updater.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''SELECT title, current_content FROM cvs WHERE id = ?''', (cv_id,))
-        cv_row = cursor.fetchone()
-        conn.close()
+        with get_db_cursor_context() as (cursor, conn):
+            cv = _downloadable_cv(cursor, cv_id)
         
-        if not cv_row:
+        if not cv:
             raise HTTPException(status_code=404, detail="CV not found")
         
-        title, content = cv_row
-        
-        # Format CV with AI for better structure
-        formatted_content = format_cv_with_ai(content)
-        
-        # Generate PDF file
-        pdf_buffer = generate_cv_pdf(formatted_content, [])
-        pdf_content = pdf_buffer.getvalue()
+        title, content, prepared = cv
+        if not prepared:
+            # Non-active CVs are only formatted once someone downloads them
+            cv_preparer.request(cv_id, current_user_id())
+
+        # The ReportLab footer carries the date, so the key does too (same key as a
+        # selected-projects download or export of this exact text)
+        cache_key = render_cache_key(content, [], renderer=CV_PDF_RENDERER,
+                                     extra={"projects": [], "date": datetime.now().date().isoformat()})
+        pdf_content, cache_source = render_cache.get_or_render(cache_key, lambda: render_pdf("cv", content))
         
         # Generate filename from title and determine file type
         safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
-        # Determine file type based on content
-        try:
-            # Try to decode as text to see if it's a text file
-            pdf_content.decode('utf-8')
-            # If successful, it's a text file
+        # Determine file type from the header (the renderer falls back to plain text)
+        if not pdf_content.startswith(b"%PDF"):
             filename = f"{safe_title}_{timestamp}.txt"
             media_type = "text/plain"
             content_type = "text/plain; charset=utf-8"
-        except UnicodeDecodeError:
-            # If decode fails, it's binary PDF content
+        else:
             filename = f"{safe_title}_{timestamp}.pdf"
             media_type = "application/pdf"
             content_type = "application/pdf"
@@ -5043,23 +4621,72 @@ async def download_cv_by_id(cv_id: int):
                 "Pragma": "no-cache",
                 "Expires": "0",
                 "Content-Type": content_type,
-                "X-Content-Type-Options": "nosniff"
+                "X-Content-Type-Options": "nosniff",
+                "X-Render-Cache": cache_source,
+                "X-CV-Prepared": "true" if prepared else "false"
             }
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error generating CV document: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error downloading CV: {str(e)}")
 
+CHAT_HISTORY_PAGE_SIZE = int(os.getenv("CHAT_HISTORY_PAGE_SIZE", "200"))
+CHAT_HISTORY_MAX_PAGE_SIZE = 1000
+CHAT_EXPORT_BATCH_SIZE = 500
+
+def _chat_message_json(msg) -> dict:
+    return {"id": msg[0], "message": msg[1], "type": msg[2], "timestamp": msg[3]}
+
 @app.get("/chat/history/")
-async def get_chat_history():
+async def get_chat_history(response: Response, before_id: Optional[int] = None,
+                           limit: int = CHAT_HISTORY_PAGE_SIZE):
+    """Latest chat messages (oldest first). When older messages exist, the
+    X-Next-Before-Id header holds the before_id for the previous page."""
     try:
-        conn = sqlite3.connect('cv_updater.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, message, message_type, created_at FROM chat_messages ORDER BY created_at")
-        messages = cursor.fetchall()
-        conn.close()
-        return [{"id": msg[0], "message": msg[1], "type": msg[2], "timestamp": msg[3]} for msg in messages]
+        limit = max(1, min(limit, CHAT_HISTORY_MAX_PAGE_SIZE))
+        # Fetch one extra row to learn whether an older page exists
+        messages = await chat_message_repository.page(before_id, limit + 1)
+        has_more = len(messages) > limit
+        messages = messages[:limit][::-1]
+        if has_more:
+            response.headers["X-Next-Before-Id"] = str(messages[0][0])
+        return [_chat_message_json(msg) for msg in messages]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+@app.get("/chat/history/export")
+async def export_chat_history():
+    """Stream the full chat history as NDJSON, oldest first, in keyset batches."""
+    async def lines():
+        last_id = 0
+        while True:
+            batch = await chat_message_repository.after(last_id, CHAT_EXPORT_BATCH_SIZE)
+            if not batch:
+                break
+            yield ''.join(json.dumps(_chat_message_json(msg)) + "\n" for msg in batch)
+            last_id = batch[-1][0]
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson",
+                             headers={"Content-Disposition": "attachment; filename=chat_history.ndjson"})
+
+SEARCH_MAX_RESULTS = 50
+
+@app.get("/search")
+async def search_everything(q: str, scope: Optional[str] = None, limit: int = 20):
+    """Ranked full-text search with highlighted snippets, grouped by scope with up to limit hits each.
+    scope is a comma-separated subset of cvs, projects, chat (default: all)."""
+    scopes = [s.strip() for s in scope.split(',') if s.strip()] if scope else list(SEARCH_SCOPES)
+    unknown = [s for s in scopes if s not in SEARCH_SCOPES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown search scope: {', '.join(unknown)}")
+    try:
+        limit = max(1, min(limit, SEARCH_MAX_RESULTS))
+        results = await run_db(search_fts, q, scopes, limit)
+        counts = {s: sum(1 for hit in results if hit["type"] == s) for s in scopes}
+        return {"query": q, "results": results, "counts": counts, "total_count": len(results)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
@@ -5073,26 +4700,9 @@ class ProjectRequest(BaseModel):
 @app.get("/projects/")
 async def get_projects():
     try:
-        with get_db_cursor_context() as (cursor, conn):
-            # First check for manually created projects - INCLUDE ID!
-            cursor.execute("SELECT id, project_data FROM manual_projects ORDER BY created_at DESC")
-            manual_projects = cursor.fetchall()
-            
-            projects = []
-            for project_row in manual_projects:
-                try:
-                    project_id = project_row[0]
-                    project_data = json.loads(project_row[1])
-                    # Add the ID to the project data
-                    project_data['id'] = project_id
-                    projects.append(project_data)
-                except:
-                    pass
-            
-            # Only return manual projects from database to ensure deleted projects are excluded
-            # Note: We skip CV extraction to avoid showing deleted projects
-            
-            return {"projects": projects, "total_count": len(projects)}
+        # Only return manual projects from database to ensure deleted projects are excluded
+        # Note: We skip CV extraction to avoid showing deleted projects
+        return Response(content=await project_repository.list_json(), media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
@@ -5100,7 +4710,7 @@ class ChatProjectRequest(BaseModel):
     message: str
 
 @app.post("/projects/create-from-chat")
-async def create_project_from_chat(request: ChatProjectRequest):
+def create_project_from_chat(request: ChatProjectRequest):
     """Create a project from natural language chat input"""
     try:
         # Extract project data from chat message
@@ -5114,20 +4724,11 @@ async def create_project_from_chat(request: ChatProjectRequest):
             }
 
         with get_db_cursor_context() as (cursor, conn):
-            # Create manual_projects table if it doesn't exist
-            cursor.execute('''CREATE TABLE IF NOT EXISTS manual_projects (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                project_data TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )''')
-            
-            cursor.execute("INSERT INTO manual_projects (project_data) VALUES (?)", 
-                          (json.dumps(project_data),))
-            project_id = cursor.lastrowid
+            project_id = insert_projects(cursor, [project_data])[0]
             
             # Update CV content after adding project
             updated_cv = generate_cv_with_projects(cursor, conn)
-            cursor.execute("UPDATE cvs SET current_content = ?, updated_at = CURRENT_TIMESTAMP WHERE is_active = TRUE", (updated_cv,))
+            update_active_cv_content(cursor, updated_cv)
             
             return {
                 "success": True,
@@ -5249,16 +4850,9 @@ def extract_project_from_chat_message(message: str) -> dict:
     return project_data
 
 @app.post("/projects/create")
-async def create_project(project: ProjectRequest):
+def create_project(project: ProjectRequest):
     try:
         with get_db_cursor_context() as (cursor, conn):
-            # Create manual_projects table if it doesn't exist
-            cursor.execute('''CREATE TABLE IF NOT EXISTS manual_projects (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                project_data TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )''')
-            
             project_data = {
                 "title": project.title,
                 "description": project.description,
@@ -5267,13 +4861,11 @@ async def create_project(project: ProjectRequest):
                 "highlights": project.highlights
             }
             
-            cursor.execute("INSERT INTO manual_projects (project_data) VALUES (?)", 
-                          (json.dumps(project_data),))
-            project_id = cursor.lastrowid
+            project_id = insert_projects(cursor, [project_data])[0]
             
             # Update CV content after adding project
             updated_cv = generate_cv_with_projects(cursor, conn)
-            cursor.execute("UPDATE cvs SET current_content = ?, updated_at = CURRENT_TIMESTAMP WHERE is_active = TRUE", (updated_cv,))
+            update_active_cv_content(cursor, updated_cv)
             
             # Add ID to returned project data
             project_with_id = {**project_data, "id": project_id}
@@ -5285,29 +4877,15 @@ async def create_project(project: ProjectRequest):
 async def clear_all_projects():
     """Clear all projects from the database"""
     try:
-        with get_db_cursor_context() as (cursor, conn):
-            cursor.execute("DELETE FROM manual_projects")
-            return {"message": "All projects cleared successfully"}
+        await project_repository.clear()
+        return {"message": "All projects cleared successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 @app.get("/projects/list")
 async def list_projects_with_ids():
     try:
-        with get_db_cursor_context() as (cursor, conn):
-            cursor.execute("SELECT id, project_data FROM manual_projects ORDER BY created_at DESC")
-            manual_projects = cursor.fetchall()
-            
-            projects = []
-            for project_row in manual_projects:
-                try:
-                    project_data = json.loads(project_row[1])
-                    project_data['id'] = project_row[0]
-                    projects.append(project_data)
-                except:
-                    pass
-            
-            return {"projects": projects, "total_count": len(projects)}
+        return Response(content=await project_repository.list_json(), media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
@@ -5320,9 +4898,9 @@ async def generate_project_blog_by_title():
         request_body = await request.json() if hasattr(request, 'json') else {}
         project_title = request_body.get('project_title', '').lower()
         
-        with get_db_cursor() as (cursor, conn):
+        with get_db_cursor_context() as (cursor, conn):
             # Get all projects and find by title
-            cursor.execute("SELECT id, project_data FROM manual_projects")
+            cursor.execute("SELECT id, project_data FROM manual_projects WHERE user_id = ?", (current_user_id(),))
             projects = cursor.fetchall()
             
             matching_project = None
@@ -5357,52 +4935,45 @@ async def generate_project_blog_by_title():
 @app.put("/projects/{project_id}")
 async def update_project(project_id: int, project: ProjectRequest):
     try:
-        with get_db_cursor() as (cursor, conn):
-            project_data = {
-                "title": project.title,
-                "description": project.description,
-                "duration": project.duration,
-                "technologies": project.technologies,
-                "highlights": project.highlights
-            }
-            
-            cursor.execute("UPDATE manual_projects SET project_data = ? WHERE id = ?", 
-                          (json.dumps(project_data), project_id))
-            
-            if cursor.rowcount == 0:
-                raise HTTPException(status_code=404, detail="Project not found")
-            
-            # Add ID to returned project data
-            project_with_id = {**project_data, "id": project_id}
-            return {"message": "Project updated successfully", "project": project_with_id}
+        project_data = {
+            "title": project.title,
+            "description": project.description,
+            "duration": project.duration,
+            "technologies": project.technologies,
+            "highlights": project.highlights
+        }
+        
+        if not await project_repository.update(project_id, project_data):
+            raise HTTPException(status_code=404, detail="Project not found")
+        
+        # Add ID to returned project data
+        project_with_id = {**project_data, "id": project_id}
+        return {"message": "Project updated successfully", "project": project_with_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 @app.delete("/projects/{project_id}")
 async def delete_project(project_id: int):
     try:
-        with get_db_cursor() as (cursor, conn):
-            cursor.execute("DELETE FROM manual_projects WHERE id = ?", (project_id,))
-            
-            if cursor.rowcount == 0:
-                raise HTTPException(status_code=404, detail="Project not found")
-            
-            return {"message": "Project deleted successfully"}
+        if not await project_repository.delete(project_id):
+            raise HTTPException(status_code=404, detail="Project not found")
+        
+        return {"message": "Project deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 @app.post("/cv/cleanup")
-async def cleanup_cv():
+def cleanup_cv():
     """Clean up duplicate sections in the CV"""
     try:
         with get_db_cursor_context() as (cursor, conn):
             # Get current active CV
-            cursor.execute("SELECT current_content FROM cvs WHERE is_active = TRUE LIMIT 1")
+            cursor.execute("SELECT current_content FROM cvs WHERE user_id = ? AND is_active = TRUE LIMIT 1", (current_user_id(),))
             cv_row = cursor.fetchone()
             
             if not cv_row:
                 # If no active CV, get the most recent one
-                cursor.execute("SELECT current_content FROM cvs ORDER BY updated_at DESC LIMIT 1")
+                cursor.execute("SELECT current_content FROM cvs WHERE user_id = ? ORDER BY updated_at DESC LIMIT 1", (current_user_id(),))
                 cv_row = cursor.fetchone()
             
             if not cv_row:
@@ -5417,7 +4988,7 @@ async def cleanup_cv():
             cleaned_cv = generate_cv_with_projects(cursor, conn)
             
             # Update in database
-            cursor.execute("UPDATE cvs SET current_content = ?, updated_at = CURRENT_TIMESTAMP WHERE is_active = TRUE", (cleaned_cv,))
+            update_active_cv_content(cursor, cleaned_cv)
             
             return {"message": "CV cleaned up successfully! All duplicate sections removed.", "cv_content": cleaned_cv}
         
@@ -5425,7 +4996,7 @@ async def cleanup_cv():
         raise HTTPException(status_code=500, detail=f"Error cleaning up CV: {str(e)}")
 
 @app.post("/cv/generate")
-async def generate_updated_cv():
+def generate_updated_cv():
     try:
         with get_db_cursor_context() as (cursor, conn):
             updated_cv = generate_cv_with_projects(cursor, conn)
@@ -5434,32 +5005,33 @@ async def generate_updated_cv():
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 @app.post("/cv/add-projects")
-async def add_projects_to_cv():
+def add_projects_to_cv():
     """Add all projects to the current CV"""
     try:
-        with get_db_cursor() as (cursor, conn):
+        with get_db_cursor_context() as (cursor, conn):
             # Check if there's an active CV
-            cursor.execute("SELECT current_content FROM cvs WHERE is_active = TRUE LIMIT 1")
+            cursor.execute("SELECT current_content FROM cvs WHERE user_id = ? AND is_active = TRUE LIMIT 1", (current_user_id(),))
             cv_row = cursor.fetchone()
             
             if not cv_row:
                 # If no active CV, get the most recent one
-                cursor.execute("SELECT current_content FROM cvs ORDER BY updated_at DESC LIMIT 1")
+                cursor.execute("SELECT current_content FROM cvs WHERE user_id = ? ORDER BY updated_at DESC LIMIT 1", (current_user_id(),))
                 cv_row = cursor.fetchone()
             
             if not cv_row:
                 # No CV exists, create a basic CV with projects
                 basic_cv = "PROFESSIONAL CV\n\nPROJECTS\n"
-                cursor.execute('''INSERT INTO cvs (title, filename, original_content, current_content, is_active) 
-                                 VALUES (?, ?, ?, ?, TRUE)''', 
-                              ("Generated CV", "generated_cv.txt", basic_cv, basic_cv))
+                cursor.execute('''INSERT INTO cvs (title, filename, original_content, current_content, is_active, user_id)
+                                 VALUES (?, ?, ?, ?, TRUE, ?)''',
+                              ("Generated CV", "generated_cv.txt", basic_cv, basic_cv, current_user_id()))
+                record_cv_version(cursor, cursor.lastrowid, basic_cv, "Generated CV")
                 print("📄 Created basic CV for projects")
             
             # Generate CV with all projects included
             updated_cv = generate_cv_with_projects(cursor, conn)
             
             # Update the active CV in the database
-            cursor.execute("UPDATE cvs SET current_content = ?, updated_at = CURRENT_TIMESTAMP WHERE is_active = TRUE", (updated_cv,))
+            update_active_cv_content(cursor, updated_cv)
             
             return {
                 "success": True,
@@ -5471,51 +5043,47 @@ async def add_projects_to_cv():
         raise HTTPException(status_code=500, detail=f"Error adding projects to CV: {str(e)}")
 
 @app.get("/cv/enhanced/", response_model=CVResponse)
-async def get_enhanced_cv():
-    """Get CV with all enhancements and projects included"""
+def get_enhanced_cv(response: Response):
+    """Get CV with all enhancements and projects included, as prepared in the background.
+
+    Pending updates and AI formatting are applied by the CV preparer; until it has
+    caught up with the latest change the CV is returned with its projects assembled
+    but not AI-formatted (X-CV-Prepared: false)."""
     try:
         with get_db_cursor_context() as (cursor, conn):
             # Get the active CV
-            cursor.execute("SELECT filename, current_content, updated_at FROM cvs WHERE is_active = TRUE LIMIT 1")
+            cursor.execute("SELECT id, filename, current_content, updated_at FROM cvs WHERE user_id = ? AND is_active = TRUE LIMIT 1", (current_user_id(),))
             cv_row = cursor.fetchone()
             
             if not cv_row:
                 # If no active CV, get the most recent one
-                cursor.execute("SELECT filename, current_content, updated_at FROM cvs ORDER BY updated_at DESC LIMIT 1")
+                cursor.execute("SELECT id, filename, current_content, updated_at FROM cvs WHERE user_id = ? ORDER BY updated_at DESC LIMIT 1", (current_user_id(),))
                 cv_row = cursor.fetchone()
             
             if not cv_row:
                 raise HTTPException(status_code=404, detail="No CV found. Please upload a CV first.")
             
-            filename, current_content, updated_at = cv_row
-            
-            # Apply any pending updates
-            cursor.execute("SELECT update_type, content FROM cv_updates WHERE processed = FALSE ORDER BY created_at")
-            updates = cursor.fetchall()
-            
-            if updates:
-                enhanced_cv = enhance_cv_with_openai(current_content, updates)
-                cursor.execute("UPDATE cv_updates SET processed = TRUE")
-                cursor.execute("UPDATE cvs SET current_content = ?, updated_at = CURRENT_TIMESTAMP WHERE is_active = TRUE", (enhanced_cv,))
-            else:
-                enhanced_cv = current_content
-            
-            # Generate CV with all projects and enhancements
-            enhanced_cv = generate_cv_with_projects(cursor, conn)
-            
-            # Format with AI for better presentation
-            formatted_cv = format_cv_with_ai(enhanced_cv)
-            
-            cursor.execute("UPDATE cvs SET current_content = ?, updated_at = CURRENT_TIMESTAMP WHERE is_active = TRUE", (formatted_cv,))
-            
-            return CVResponse(content=formatted_cv, filename=filename, last_updated=updated_at)
+            cv_id, filename, current_content, updated_at = cv_row
+            prepared = get_prepared_content(cursor, cv_id)
+            cursor.execute("SELECT 1 FROM cv_updates WHERE user_id = ? AND processed = FALSE LIMIT 1", (current_user_id(),))
+            has_pending_updates = cursor.fetchone() is not None
+            if prepared is None:
+                current_content = build_cv_with_projects(cursor)
+
+        ready = prepared is not None and not has_pending_updates
+        if not ready:
+            cv_preparer.wake()
+        response.headers["X-CV-Prepared"] = "true" if ready else "false"
+        return CVResponse(content=prepared if prepared is not None else current_content,
+                          filename=filename, last_updated=updated_at)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
-def generate_linkedin_blog(project_data: dict) -> str:
-    """Generate a LinkedIn blog post for a specific project"""
-    try:
-        prompt = f"""Create a professional LinkedIn blog post about this project:
+def _build_linkedin_blog_prompt(project_data: dict) -> str:
+    """Build the OpenAI prompt used for LinkedIn blog generation"""
+    return f"""Create a professional LinkedIn blog post about this project:
 
 Project Details:
 - Title: {project_data.get('title', 'Project')}
@@ -5537,9 +5105,12 @@ Create an engaging LinkedIn post that:
 
 Make it sound personal and authentic, as if the developer is sharing their experience."""
 
+def generate_linkedin_blog(project_data: dict) -> str:
+    """Generate a LinkedIn blog post for a specific project"""
+    try:
         response = openai_client.chat.completions.create(
             model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
+            messages=[{"role": "user", "content": _build_linkedin_blog_prompt(project_data)}],
             temperature=0.7,
             max_tokens=500
         )
@@ -5583,13 +5154,82 @@ What's your favorite part about building new projects? I'd love to hear about yo
 
     return blog_post
 
+BLOG_STREAM_CHUNK_WORDS = int(os.getenv("BLOG_STREAM_CHUNK_WORDS", "6"))
+
+def _iter_text_chunks(text: str, words_per_chunk: int = BLOG_STREAM_CHUNK_WORDS):
+    """Split text into small word groups (whitespace preserved) for streaming"""
+    tokens = re.findall(r'\S+\s*|\s+', text)
+    for i in range(0, len(tokens), words_per_chunk):
+        yield ''.join(tokens[i:i + words_per_chunk])
+
+def stream_linkedin_blog(project_data: dict):
+    """Yield a LinkedIn blog post for a project piece by piece.
+
+    Forwards OpenAI tokens as they arrive; without a client (or if the request
+    fails before any token was sent) the fallback post is yielded in chunks.
+    """
+    if openai_client:
+        emitted = False
+        try:
+            # The guarded stream holds an OpenAI slot until it is closed, even if the client disconnects
+            with openai_client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[{"role": "user", "content": _build_linkedin_blog_prompt(project_data)}],
+                temperature=0.7,
+                max_tokens=500,
+                stream=True
+            ) as stream:
+                for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        emitted = True
+                        yield delta
+            if emitted:
+                return
+        except Exception as e:
+            print(f"Error streaming LinkedIn blog with OpenAI: {e}")
+            if emitted:
+                # Part of the post already reached the client, don't append a second one
+                raise
+    yield from _iter_text_chunks(generate_linkedin_blog_fallback(project_data))
+
+def _format_sse(event: str, payload: dict) -> str:
+    """Format a payload as a single Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def _blog_event_stream(chunks, metadata: dict):
+    """Wrap blog text chunks into SSE 'token' events followed by a 'done' event"""
+    yield _format_sse("start", metadata)
+    parts = []
+    try:
+        for chunk in chunks:
+            parts.append(chunk)
+            yield _format_sse("token", {"delta": chunk})
+    except Exception as e:
+        yield _format_sse("error", {"message": f"Error generating blog: {str(e)}"})
+        return
+    blog_content = ''.join(parts).strip()
+    yield _format_sse("done", {**metadata, "blog_content": blog_content, "word_count": len(blog_content.split())})
+
+def _sse_response(events) -> StreamingResponse:
+    """Return an SSE StreamingResponse with proxy buffering disabled"""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
 @app.post("/projects/{project_id}/blog")
-async def generate_project_blog(project_id: int):
+def generate_project_blog(project_id: int):
     """Generate a LinkedIn blog post for a specific project"""
     try:
-        with get_db_cursor() as (cursor, conn):
+        with get_db_cursor_context() as (cursor, conn):
             # Get project data
-            cursor.execute("SELECT project_data FROM manual_projects WHERE id = ?", (project_id,))
+            cursor.execute("SELECT project_data FROM manual_projects WHERE id = ? AND user_id = ?", (project_id, current_user_id()))
             project_row = cursor.fetchone()
             
             if not project_row:
@@ -5609,6 +5249,86 @@ async def generate_project_blog(project_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating blog: {str(e)}")
 
+@app.post("/projects/{project_id}/blog/stream")
+def stream_project_blog(project_id: int):
+    """Stream a LinkedIn blog post for a specific project as Server-Sent Events"""
+    try:
+        with get_db_cursor_context() as (cursor, conn):
+            cursor.execute("SELECT project_data FROM manual_projects WHERE id = ? AND user_id = ?", (project_id, current_user_id()))
+            project_row = cursor.fetchone()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating blog: {str(e)}")
+    
+    if not project_row:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    project_data = json.loads(project_row[0])
+    metadata = {"project_title": project_data.get('title', 'Project')}
+    return _sse_response(_blog_event_stream(stream_linkedin_blog(project_data), metadata))
+
+BLOG_BATCH_MAX_CONCURRENCY = int(os.getenv("BLOG_BATCH_MAX_CONCURRENCY", "4"))
+
+class BlogBatchRequest(BaseModel):
+    project_ids: List[int]
+    max_concurrency: Optional[int] = None
+
+@app.post("/projects/blog/batch")
+async def generate_project_blogs_batch(request: BlogBatchRequest):
+    """Generate LinkedIn blog posts for several projects concurrently.
+    Results are streamed as NDJSON lines in completion order; a failing project
+    only produces an error line for that project."""
+    project_ids = list(dict.fromkeys(request.project_ids))
+    if not project_ids:
+        raise HTTPException(status_code=400, detail="No project ids provided")
+    
+    try:
+        project_rows = await project_repository.get_many(project_ids)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating blogs: {str(e)}")
+    
+    max_concurrency = min(request.max_concurrency or BLOG_BATCH_MAX_CONCURRENCY, BLOG_BATCH_MAX_CONCURRENCY)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    
+    async def generate(index: int, project_id: int) -> dict:
+        result = {"type": "result", "index": index, "project_id": project_id}
+        if project_id not in project_rows:
+            return {**result, "status": "error", "error": "Project not found"}
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                project_data = json.loads(project_rows[project_id])
+                blog_content = await asyncio.to_thread(generate_linkedin_blog, project_data)
+                return {
+                    **result,
+                    "status": "success",
+                    "project_title": project_data.get('title', 'Project'),
+                    "blog_content": blog_content,
+                    "elapsed_ms": round((time.perf_counter() - started) * 1000)
+                }
+            except Exception as e:
+                print(f"❌ Blog generation failed for project {project_id}: {e}")
+                return {**result, "status": "error", "error": str(e)}
+    
+    async def results():
+        tasks = [asyncio.create_task(generate(i, project_id)) for i, project_id in enumerate(project_ids)]
+        succeeded = failed = 0
+        try:
+            for finished in asyncio.as_completed(tasks):
+                item = await finished
+                if item["status"] == "success":
+                    succeeded += 1
+                else:
+                    failed += 1
+                yield json.dumps(item) + "\n"
+            yield json.dumps({"type": "summary", "requested": len(project_ids), "succeeded": succeeded,
+                              "failed": failed, "max_concurrency": max_concurrency}) + "\n"
+        finally:
+            # Client went away: don't keep generating posts nobody will read
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
 class CVBuilderRequest(BaseModel):
     personal_info: dict
     profile_summary: str
@@ -5618,7 +5338,7 @@ class CVBuilderRequest(BaseModel):
     projects: List[dict]
 
 @app.post("/cv/create-from-builder")
-async def create_cv_from_builder(cv_data: CVBuilderRequest):
+def create_cv_from_builder(cv_data: CVBuilderRequest):
     """Create a new CV from the CV Builder data"""
     try:
         # Generate CV text from structured data
@@ -5630,29 +5350,24 @@ async def create_cv_from_builder(cv_data: CVBuilderRequest):
         filename = f"cv_builder_{personal_info.get('full_name', 'professional').lower().replace(' ', '_')}.txt"
         
         # Store in database
-        conn = sqlite3.connect('cv_updater.db')
-        cursor = conn.cursor()
-        
-        # Set all other CVs as inactive
-        cursor.execute("UPDATE cvs SET is_active = FALSE")
-        
-        # Insert new CV as active
-        cursor.execute('''INSERT INTO cvs (title, filename, original_content, current_content, is_active) 
-                         VALUES (?, ?, ?, ?, TRUE)''', 
-                      (title, filename, cv_text, cv_text))
-        
-        # Store projects separately
-        for project in cv_data.projects:
-            project_json = json.dumps(project)
-            cursor.execute('INSERT INTO manual_projects (project_data) VALUES (?)', (project_json,))
-        
-        conn.commit()
-        conn.close()
+        with get_db_cursor_context() as (cursor, conn):
+            # Set all other CVs as inactive
+            cursor.execute("UPDATE cvs SET is_active = FALSE WHERE user_id = ?", (current_user_id(),))
+            
+            # Insert new CV as active
+            cursor.execute('''INSERT INTO cvs (title, filename, original_content, current_content, is_active, user_id)
+                             VALUES (?, ?, ?, ?, TRUE, ?)''',
+                          (title, filename, cv_text, cv_text, current_user_id()))
+            record_cv_version(cursor, cursor.lastrowid, cv_text, "Created with CV Builder")
+            
+            # Store projects separately
+            project_ids = insert_projects(cursor, cv_data.projects)
         
         return {
             "message": "CV created successfully from CV Builder",
             "cv_content": cv_text,
             "title": title,
+            "project_ids": project_ids,
             "status": "success"
         }
         
@@ -5747,40 +5462,38 @@ def generate_cv_text_from_data(cv_data: dict) -> str:
 class BlogRequest(BaseModel):
     project_title: str
 
-@app.post("/blog/generate")
-async def generate_blog_post(request: BlogRequest):
-    """Generate a LinkedIn blog post for a project by title"""
-    try:
-        conn = sqlite3.connect('cv_updater.db')
-        cursor = conn.cursor()
-        
-        # Get all projects and find by title
-        cursor.execute("SELECT id, project_data FROM manual_projects")
-        projects = cursor.fetchall()
-        
-        matching_project = None
-        for project_id, project_json in projects:
-            try:
-                project_data = json.loads(project_json)
-                project_title = project_data.get('title', '').lower()
-                search_title = request.project_title.lower()
-                
-                # Try exact match first, then partial match
-                if search_title == project_title or search_title in project_title or project_title in search_title:
-                    matching_project = project_data
-                    break
-            except:
-                continue
-        
+def find_project_by_title(cursor, search_title: str) -> Optional[dict]:
+    """Find a stored project whose title matches (exactly or partially) the search title.
+    Falls back to the first stored project when nothing matches."""
+    search_title = search_title.lower()
+    user_id = current_user_id()
+    lookups = [
+        # Exact match through the title index
+        ("SELECT project_data FROM manual_projects WHERE user_id = ? AND title = ? COLLATE NOCASE ORDER BY id LIMIT 1",
+         (user_id, search_title)),
+        # Partial match either way round
+        ('''SELECT project_data FROM manual_projects
+            WHERE user_id = ? AND (instr(lower(COALESCE(title, '')), ?) > 0 OR instr(?, lower(COALESCE(title, ''))) > 0)
+            ORDER BY id LIMIT 1''', (user_id, search_title, search_title)),
         # If no match found and we have projects, use the first one
-        if not matching_project and projects:
+        ("SELECT project_data FROM manual_projects WHERE user_id = ? ORDER BY id LIMIT 1", (user_id,)),
+    ]
+    for sql, params in lookups:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+        if row:
             try:
-                project_data = json.loads(projects[0][1])
-                matching_project = project_data
+                return json.loads(row[0])
             except:
-                pass
-        
-        conn.close()
+                return None
+    return None
+
+@app.post("/blog/generate")
+def generate_blog_post(request: BlogRequest):
+    """Generate a LinkedIn blog post for a project by title"""
+    try:
+        with get_db_cursor_context() as (cursor, conn):
+            matching_project = find_project_by_title(cursor, request.project_title)
         
         if not matching_project:
             return {
@@ -5808,8 +5521,111 @@ async def generate_blog_post(request: BlogRequest):
             "project_title": request.project_title
         }
 
-def format_cv_with_ai(cv_content: str) -> str:
+@app.post("/blog/generate/stream")
+def stream_blog_post(request: BlogRequest):
+    """Stream a LinkedIn blog post for a project by title as Server-Sent Events"""
+    try:
+        with get_db_cursor_context() as (cursor, conn):
+            matching_project = find_project_by_title(cursor, request.project_title)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating blog: {str(e)}")
+    
+    if not matching_project:
+        raise HTTPException(
+            status_code=404,
+            detail=f"I couldn't find a project matching '{request.project_title}'. Please check the project name and try again."
+        )
+    
+    metadata = {"project_title": matching_project.get('title', 'Project')}
+    return _sse_response(_blog_event_stream(stream_linkedin_blog(matching_project), metadata))
+
+# Section-parallel AI processing: each CV section becomes its own request so
+# long CVs are not truncated by a single max_tokens budget
+CV_AI_SECTION_PARALLEL = os.getenv("CV_AI_SECTION_PARALLEL", "false").lower() == "true"
+CV_AI_SECTION_WORKERS = int(os.getenv("CV_AI_SECTION_WORKERS", "6"))
+
+def split_cv_into_sections(cv_content: str) -> tuple:
+    """Split CV text into (preamble_lines, [(section_type, header, body_lines), ...]) using the section parser.
+    Sections are returned in document order."""
+    cv_lines = cv_content.split('\n')
+    sections = parse_cv_sections(cv_content)
+    starts = sorted((info['start_line'], section_type, info['header']) for section_type, info in sections.items())
+    
+    if not starts:
+        return cv_lines, []
+    
+    preamble = cv_lines[:starts[0][0]]
+    parts = []
+    for i, (start_line, section_type, header) in enumerate(starts):
+        end_line = starts[i + 1][0] if i + 1 < len(starts) else len(cv_lines)
+        parts.append((section_type, header, cv_lines[start_line + 1:end_line]))
+    return preamble, parts
+
+def stitch_cv_sections(preamble: List[str], parts: List[tuple]) -> str:
+    """Rebuild CV text from split sections, keeping the order they have in the document"""
+    lines = [line for line in preamble]
+    while lines and not lines[-1].strip():
+        lines.pop()
+    for section_type, header, body in parts:
+        body = list(body)
+        while body and not body[-1].strip():
+            body.pop()
+        if lines:
+            lines.append('')
+        lines.append(header)
+        lines.extend(body)
+    return '\n'.join(lines)
+
+def _run_per_section(func, items: list) -> list:
+    """Run func over items concurrently (bounded by CV_AI_SECTION_WORKERS), preserving order"""
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(CV_AI_SECTION_WORKERS, len(items)))) as executor:
+        return list(executor.map(func, items))
+
+def format_cv_section_with_ai(section: tuple) -> tuple:
+    """Format a single (section_type, header, body_lines) section with AI; returns it unchanged on failure"""
+    section_type, header, body = section
+    section_text = '\n'.join(body).strip()
+    if not section_text:
+        return section
+    try:
+        prompt = f"""Format this CV section professionally. Keep every fact, use consistent bullet points and professional language.
+
+Section: {header}
+
+Section Content:
+{section_text}
+
+Return only the formatted section content without the section header and without additional commentary."""
+
+        # Budget tokens per section instead of one 2000-token budget for the whole CV
+        response = openai_client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.2,
+            max_tokens=min(4000, max(300, len(section_text) // 2))
+        )
+        formatted = response.choices[0].message.content.strip()
+        return (section_type, header, formatted.split('\n'))
+    except Exception as e:
+        print(f"AI formatting failed for section {header}: {e}")
+        return section
+
+def format_cv_with_ai_by_section(cv_content: str) -> str:
+    """Format each CV section as its own concurrent AI request and stitch the results back in document order"""
+    preamble, parts = split_cv_into_sections(cv_content)
+    if not parts:
+        return format_cv_with_ai(cv_content, section_parallel=False)
+    formatted_parts = _run_per_section(format_cv_section_with_ai, parts)
+    return stitch_cv_sections(preamble, formatted_parts)
+
+def format_cv_with_ai(cv_content: str, section_parallel: bool = None) -> str:
     """Use AI to format CV content into well-structured sections"""
+    if section_parallel is None:
+        section_parallel = CV_AI_SECTION_PARALLEL
+    if section_parallel and openai_client:
+        return format_cv_with_ai_by_section(cv_content)
     try:
         prompt = f"""Format this CV content into a professional, well-structured format with clear sections. Organize the content properly and ensure consistent formatting.
 
@@ -5842,6 +5658,10 @@ Return only the formatted CV content, no additional commentary."""
         print(f"AI formatting failed: {e}")
         return reorganize_cv_content(cv_content)  # Use fallback reorganization
 
+# Pending updates and AI formatting run here, in the background, never inside a download
+cv_preparer = CVPreparer(enhance=enhance_cv_with_openai, format_cv=format_cv_with_ai,
+                         assemble=lambda cursor: _generate_cv_with_projects_internal(cursor, None, persist=False))
+
 def reorganize_cv_content(cv_content: str) -> str:
     """Reorganize CV content to ensure proper section placement"""
     try:
@@ -5938,393 +5758,43 @@ def reorganize_cv_content(cv_content: str) -> str:
         print(f"CV reorganization failed: {e}")
         return cv_content
 
-def generate_cv_pdf(cv_content: str, projects: List[dict]) -> BytesIO:
-    """Generate a modern, professional PDF using ReportLab"""
-    buffer = BytesIO()
-    try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
-        from reportlab.lib.colors import HexColor, black, white
-        from reportlab.lib.units import inch
-        
-        # Create PDF document
-        doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
-        
-        # Get base styles
-        styles = getSampleStyleSheet()
-        
-        # Define custom styles
-        accent_color = HexColor('#667eea')
-        
-        header_style = ParagraphStyle(
-            'Header', parent=styles['Heading1'], fontSize=24, spaceAfter=8, alignment=TA_CENTER, textColor=accent_color
-        )
-        
-        contact_style = ParagraphStyle(
-            'Contact', parent=styles['Normal'], fontSize=10, spaceAfter=8, alignment=TA_CENTER, textColor=black
-        )
-        
-        section_style = ParagraphStyle(
-            'Section', parent=styles['Heading2'], fontSize=16, spaceAfter=6, spaceBefore=8, textColor=accent_color
-        )
-        
-        job_title_style = ParagraphStyle(
-            'JobTitle', parent=styles['Heading3'], fontSize=14, spaceAfter=6, textColor=black
-        )
-        
-        date_style = ParagraphStyle(
-            'Date', parent=styles['Normal'], fontSize=10, spaceAfter=8, textColor=accent_color
-        )
-        
-        body_style = ParagraphStyle(
-            'Body', parent=styles['Normal'], fontSize=11, spaceAfter=4, alignment=TA_JUSTIFY
-        )
-        
-        skill_style = ParagraphStyle(
-            'Skill', parent=styles['Normal'], fontSize=10, spaceAfter=3, textColor=accent_color
-        )
-        
-        bullet_style = ParagraphStyle(
-            'Bullet', parent=styles['Normal'], fontSize=10, spaceAfter=2, leftIndent=20
-        )
-        
-        # Build PDF content
-        story = []
-        
-        # Parse CV content
-        lines = cv_content.split('\n')
-        name = "PROFESSIONAL CV"
-        contact_info = []
-        sections = []
-        current_section = []
-        
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if not line:
-                continue
-            if line.startswith('📋') or '─' in line or line.startswith('='):
-                continue
-            if i == 0 and not any(keyword in line.upper() for keyword in ['PROFILE', 'SUMMARY', 'SKILLS', 'EXPERIENCE', 'EDUCATION', 'PROJECTS']):
-                name = line.upper()
-            elif '@' in line or 'http' in line or any(char.isdigit() for char in line):
-                contact_info.append(line)
-            elif (line.isupper() and len(line) > 3) or any(keyword in line.upper() for keyword in ['PROFILE', 'SUMMARY', 'SKILLS', 'EXPERIENCE', 'EDUCATION', 'PROJECTS', 'ABOUT']):
-                if current_section:
-                    sections.append(current_section)
-                current_section = [line]
-            else:
-                if current_section:
-                    current_section.append(line)
-                else:
-                    sections.append([line])
-        
-        if current_section:
-            sections.append(current_section)
-        
-        # Add header
-        story.append(Paragraph(name, header_style))
-        if contact_info:
-            contact_text = " | ".join(contact_info)
-            story.append(Paragraph(contact_text, contact_style))
-        story.append(Spacer(1, 12))
-        
-        # Add divider
-        divider_style = ParagraphStyle(
-            'Divider', parent=styles['Normal'], fontSize=2, spaceAfter=8, spaceBefore=8, alignment=TA_CENTER, textColor=accent_color
-        )
-        story.append(Paragraph("_" * 60, divider_style))
-        
-        # Process sections
-        inserted_projects = False
-        for section in sections:
-            if not section:
-                continue
-            section_title = section[0]
-            section_content = section[1:] if len(section) > 1 else []
-            
-            if 'PROJECTS' in section_title.upper():
-                if projects and len(projects) > 0:
-                    # Replace this section with the selected projects
-                    story.append(Paragraph('Projects', section_style))
-                    underline_style = ParagraphStyle(
-                        'Underline', parent=styles['Normal'], fontSize=1, spaceAfter=15, spaceBefore=0, alignment=TA_LEFT, textColor=accent_color
-                    )
-                    story.append(Paragraph("_" * 50, underline_style))
-                    
-                    for i, project in enumerate(projects, 1):
-                        title = project.get('title', f'Project {i}')
-                        duration = project.get('duration', '')
-                        description = project.get('description', '')
-                        technologies = project.get('technologies', [])
-                        highlights = project.get('highlights', [])
-                        
-                        story.append(Paragraph(f"{i}. {title}", job_title_style))
-                        if duration:
-                            story.append(Paragraph(f"Duration: {duration}", date_style))
-                        if description:
-                            story.append(Paragraph(f"{description}", body_style))
-                        if technologies:
-                            tech_str = ', '.join(technologies) if isinstance(technologies, list) else str(technologies)
-                            story.append(Paragraph(f"Technologies: {tech_str}", skill_style))
-                        if highlights:
-                            story.append(Paragraph("Key Highlights:", body_style))
-                            if isinstance(highlights, list):
-                                for highlight in highlights:
-                                    story.append(Paragraph(f"• {highlight}", bullet_style))
-                            else:
-                                story.append(Paragraph(f"• {highlights}", bullet_style))
-                        story.append(Spacer(1, 8))
-                    story.append(Spacer(1, 15))
-                    inserted_projects = True
-                # If projects are provided, skip the original section_content
-                continue
-            else:
-                # Add other sections
-                section_text = section_title.replace('_', ' ').title()
-                story.append(Paragraph(section_text, section_style))
-                underline_style = ParagraphStyle(
-                    'Underline', parent=styles['Normal'], fontSize=1, spaceAfter=15, spaceBefore=0, alignment=TA_LEFT, textColor=accent_color
-                )
-                story.append(Paragraph("_" * 50, underline_style))
-                
-                for line in section_content:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    if line.startswith('•') or line.startswith('-') or line.startswith('*'):
-                        clean_line = line[1:].strip()
-                        if clean_line:
-                            story.append(Paragraph(f"• {clean_line}", bullet_style))
-                    elif line.startswith('1.') or line.startswith('2.') or line.startswith('3.'):
-                        story.append(Paragraph(line, bullet_style))
-                    elif ':' in line and len(line.split(':')) == 2:
-                        key, value = line.split(':', 1)
-                        if key.strip() and value.strip():
-                            story.append(Paragraph(f"<b>{key.strip()}:</b> {value.strip()}", body_style))
-                        else:
-                            story.append(Paragraph(line, body_style))
-                    else:
-                        if line and not line.startswith('Generated on'):
-                            story.append(Paragraph(line, body_style))
-                story.append(Spacer(1, 15))
-        # If there was no projects section but projects are provided, add it at the end
-        if projects and len(projects) > 0 and not inserted_projects:
-            story.append(Paragraph('Projects', section_style))
-            underline_style = ParagraphStyle(
-                'Underline', parent=styles['Normal'], fontSize=1, spaceAfter=15, spaceBefore=0, alignment=TA_LEFT, textColor=accent_color
-            )
-            story.append(Paragraph("_" * 50, underline_style))
-            for i, project in enumerate(projects, 1):
-                title = project.get('title', f'Project {i}')
-                duration = project.get('duration', '')
-                description = project.get('description', '')
-                technologies = project.get('technologies', [])
-                highlights = project.get('highlights', [])
-                story.append(Paragraph(f"{i}. {title}", job_title_style))
-                if duration:
-                    story.append(Paragraph(f"Duration: {duration}", date_style))
-                if description:
-                    story.append(Paragraph(f"{description}", body_style))
-                if technologies:
-                    tech_str = ', '.join(technologies) if isinstance(technologies, list) else str(technologies)
-                    story.append(Paragraph(f"Technologies: {tech_str}", skill_style))
-                if highlights:
-                    story.append(Paragraph("Key Highlights:", body_style))
-                    if isinstance(highlights, list):
-                        for highlight in highlights:
-                            story.append(Paragraph(f"• {highlight}", bullet_style))
-                    else:
-                        story.append(Paragraph(f"• {highlights}", bullet_style))
-                story.append(Spacer(1, 8))
-            story.append(Spacer(1, 15))
-        
-        # Add footer
-        story.append(Spacer(1, 40))
-        footer_style = ParagraphStyle(
-            'Footer',
-            parent=styles['Normal'],
-            fontSize=10,
-            alignment=TA_CENTER,
-            textColor=accent_color,
-        )
-        story.append(Paragraph(f"Generated on {datetime.now().strftime('%B %d, %Y')}", footer_style))
-        
-        # Build PDF
-        doc.build(story)
-        buffer.seek(0)
-        return buffer
-        
-    except Exception as e:
-        print(f"Error generating PDF: {e}")
-        # Fallback to simple text PDF
-        return generate_cv_text_fallback_enhanced(cv_content, buffer)
-
-def generate_cv_text_fallback_enhanced(cv_content: str, buffer: BytesIO) -> BytesIO:
-    """Generate enhanced formatted text file as PDF fallback"""
-    try:
-        # Parse CV content for better formatting
-        lines = cv_content.split('\n')
-        
-        # Extract name and contact info
-        name = "PROFESSIONAL CV"
-        contact_info = []
-        sections = []
-        current_section = []
-        
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Skip formatting artifacts
-            if line.startswith('📋') or '─' in line or line.startswith('='):
-                continue
-                
-            # First non-empty line is usually the name
-            if i == 0 and not any(keyword in line.upper() for keyword in ['PROFILE', 'SUMMARY', 'SKILLS', 'EXPERIENCE', 'EDUCATION', 'PROJECTS']):
-                name = line.upper()
-            elif '@' in line or 'http' in line or any(char.isdigit() for char in line):
-                # Contact information
-                contact_info.append(line)
-            elif (line.isupper() and len(line) > 3) or any(keyword in line.upper() for keyword in 
-                ['PROFILE', 'SUMMARY', 'SKILLS', 'EXPERIENCE', 'EDUCATION', 'PROJECTS', 'ABOUT']):
-                # Section header
-                if current_section:
-                    sections.append(current_section)
-                current_section = [line]
-            else:
-                if current_section:
-                    current_section.append(line)
-                else:
-                    sections.append([line])
-        
-        if current_section:
-            sections.append(current_section)
-        
-        # Create enhanced formatted content
-        formatted_content = f"""
-{'='*80}
-{name:^80}
-{'='*80}
-
-"""
-        
-        # Add contact information
-        if contact_info:
-            contact_text = " | ".join(contact_info)
-            formatted_content += f"{contact_text:^80}\n\n"
-        
-        # Add sections with modern formatting
-        for section in sections:
-            if not section:
-                continue
-                
-            section_title = section[0]
-            section_content = section[1:] if len(section) > 1 else []
-            
-            # Format section header
-            formatted_content += f"\n{'-'*80}\n"
-            formatted_content += f"{section_title.replace('_', ' ').title():^80}\n"
-            formatted_content += f"{'-'*80}\n\n"
-            
-            # Format section content
-            for line in section_content:
-                if line.startswith('•') or line.startswith('-') or line.startswith('*'):
-                    formatted_content += f"  {line}\n"
-                elif line.startswith('1.') or line.startswith('2.') or line.startswith('3.'):
-                    formatted_content += f"  {line}\n"
-                elif ':' in line and len(line.split(':')) == 2:
-                    key, value = line.split(':', 1)
-                    if key.strip() and value.strip():
-                        formatted_content += f"  {key.strip()}: {value.strip()}\n"
-                    else:
-                        formatted_content += f"  {line}\n"
-                else:
-                    formatted_content += f"  {line}\n"
-        
-        # Add footer
-        formatted_content += f"\n{'='*80}\n"
-        formatted_content += f"Generated on {datetime.now().strftime('%B %d, %Y')} | CV Updater Platform\n"
-        formatted_content += f"{'='*80}\n"
-        
-        # Save as text content
-        buffer.write(formatted_content.encode('utf-8'))
-        buffer.seek(0)
-        print("✅ Enhanced CV text document generated successfully")
-        return buffer
-            
-    except Exception as e:
-        print(f"Enhanced CV generation error: {e}")
-        # Fallback to simple format
-        return generate_cv_text_fallback(cv_content, buffer)
-
-def generate_cv_text_fallback(cv_content: str, buffer: BytesIO) -> BytesIO:
-    """Generate basic formatted text file as final fallback"""
-    try:
-        # Simple but clean formatting
-        formatted_content = f"""
-CURRICULUM VITAE
-{'='*60}
-
-{cv_content}
-
-{'='*60}
-Generated on {datetime.now().strftime('%B %d, %Y')} | CV Updater Platform
-        """
-        
-        # Save as text content
-        buffer.write(formatted_content.encode('utf-8'))
-        buffer.seek(0)
-        print("✅ Basic CV text document generated successfully")
-        return buffer
-            
-    except Exception as e:
-        print(f"CV generation error: {e}")
-        # Minimal fallback
-        try:
-            buffer = BytesIO()
-            simple_content = f"CURRICULUM VITAE\n\n{cv_content}\n\nGenerated on {datetime.now().strftime('%B %d, %Y')}"
-            buffer.write(simple_content.encode('utf-8'))
-            buffer.seek(0)
-            return buffer
-        except Exception as fallback_error:
-            print(f"Fallback CV generation failed: {fallback_error}")
-            raise HTTPException(status_code=500, detail="Could not generate CV document. Please try again.")
-
 @app.post("/cv/download")
-async def download_cv():
+def download_cv():
     """Download CV as enhanced PDF with proper formatting."""
     try:
-        with get_db_cursor() as (cursor, conn):
-            cursor.execute("SELECT current_content, filename FROM cvs WHERE is_active = TRUE LIMIT 1")
+        with get_db_cursor_context() as (cursor, conn):
+            cursor.execute("SELECT current_content, filename FROM cvs WHERE user_id = ? AND is_active = TRUE LIMIT 1", (current_user_id(),))
             cv_row = cursor.fetchone()
             
             if not cv_row:
                 raise HTTPException(status_code=404, detail="No active CV found")
             
             cv_content, filename = cv_row
+
+        # Generate enhanced PDF once the connection is released (the renderer only sees the cleaned text)
+        cache_key = render_cache_key(clean_cv_text(cv_content), renderer=ENHANCED_PDF_RENDERER)
+        pdf_content, cache_source = render_cache.get_or_render(
+            cache_key, lambda: render_pdf("enhanced", cv_content))
+
+        # Create filename for download
+        base_name = os.path.splitext(filename)[0] if filename else "cv"
+        download_filename = f"{base_name}_updated.pdf"
+
+        return Response(
+            content=pdf_content,
+            media_type="application/pdf",
+            headers={"Content-Disposition": f"attachment; filename={download_filename}",
+                     "X-Render-Cache": cache_source}
+        )
             
-            # Generate enhanced PDF
-            pdf_bytes = generate_enhanced_pdf(cv_content)
-            
-            # Create filename for download
-            base_name = os.path.splitext(filename)[0] if filename else "cv"
-            download_filename = f"{base_name}_updated.pdf"
-            
-            return Response(
-                content=pdf_bytes.getvalue(),
-                media_type="application/pdf",
-                headers={"Content-Disposition": f"attachment; filename={download_filename}"}
-            )
-            
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error generating PDF: {e}")
         raise HTTPException(status_code=500, detail=f"Error generating PDF: {str(e)}")
 
 @app.post("/cv/download-with-selected-projects")
-async def download_cv_with_selected_projects(request: ProjectSelectionRequest):
+def download_cv_with_selected_projects(request: ProjectSelectionRequest):
     print(f"🔍 Received request: {request}")
     print(f"🔍 Selected project IDs: {request.selected_project_ids}")
     
@@ -6332,22 +5802,22 @@ async def download_cv_with_selected_projects(request: ProjectSelectionRequest):
     selected_project_ids = request.selected_project_ids or []
     print(f"🔍 Processed project IDs: {selected_project_ids}")
     try:
+        # Read-only: the CV is assembled with its projects as generate_cv_with_projects
+        # would store it, but a download never writes anything
         with get_db_cursor_context() as (cursor, conn):
-            # Always update CV before download
-            updated_cv = generate_cv_with_projects(cursor, conn)
-            cursor.execute("SELECT current_content FROM cvs WHERE is_active = TRUE LIMIT 1")
-            cv_row = cursor.fetchone()
-            
-            if not cv_row:
+            cursor.execute("SELECT 1 FROM cvs WHERE user_id = ? AND is_active = TRUE LIMIT 1", (current_user_id(),))
+            if not cursor.fetchone():
                 raise HTTPException(status_code=404, detail="No active CV found")
             
-            cv_content = cv_row[0]
+            cv_content = _generate_cv_with_projects_internal(cursor, None, persist=False)
             
             # Get only selected projects
             selected_projects = []
+            project_rows = []
             if selected_project_ids:
                 placeholders = ','.join(['?' for _ in selected_project_ids])
-                cursor.execute(f"SELECT project_data FROM manual_projects WHERE id IN ({placeholders}) ORDER BY created_at DESC", selected_project_ids)
+                cursor.execute(f"SELECT project_data FROM manual_projects WHERE user_id = ? AND id IN ({placeholders}) ORDER BY created_at DESC",
+                               [current_user_id()] + list(selected_project_ids))
                 project_rows = cursor.fetchall()
                 for row in project_rows:
                     try:
@@ -6358,15 +5828,22 @@ async def download_cv_with_selected_projects(request: ProjectSelectionRequest):
                         continue
             
             print(f"Selected {len(selected_projects)} projects for CV download")
-            
-            # Generate PDF with selected projects
-            pdf_buffer = generate_cv_pdf(cv_content, selected_projects)
-            
-            return StreamingResponse(
-                io.BytesIO(pdf_buffer.getvalue()),
-                media_type="application/pdf",
-                headers={"Content-Disposition": f"attachment; filename=cv_selected_projects_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"}
-            )
+
+        # Generate PDF with selected projects, after the connection is released. The key covers
+        # the projects' stored data as well as their ids, so editing a selected project re-renders.
+        cache_key = render_cache_key(
+            cv_content, selected_project_ids, renderer=CV_PDF_RENDERER,
+            extra={"projects": sorted(row[0] for row in project_rows), "date": datetime.now().date().isoformat()})
+        pdf_content, cache_source = render_cache.get_or_render(
+            cache_key, lambda: render_pdf("cv", cv_content, selected_projects))
+
+        return StreamingResponse(
+            _iter_byte_chunks(pdf_content),
+            media_type="application/pdf",
+            headers={"Content-Disposition": f"attachment; filename=cv_selected_projects_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                     "Content-Length": str(len(pdf_content)),
+                     "X-Render-Cache": cache_source}
+        )
             
     except HTTPException:
         raise
@@ -6377,12 +5854,12 @@ async def download_cv_with_selected_projects(request: ProjectSelectionRequest):
         raise HTTPException(status_code=500, detail=f"Download failed: {str(e)}")
 
 @app.post("/projects/create-linkedin-blog")
-async def create_linkedin_blog_from_projects():
+def create_linkedin_blog_from_projects():
     """Create LinkedIn blog post based on selected projects"""
     try:
         with get_db_cursor_context() as (cursor, conn):
             # Get all projects
-            cursor.execute("SELECT project_data FROM manual_projects ORDER BY created_at DESC")
+            cursor.execute("SELECT project_data FROM manual_projects WHERE user_id = ? ORDER BY created_at DESC", (current_user_id(),))
             project_rows = cursor.fetchall()
             projects = []
             for row in project_rows:
@@ -6411,53 +5888,93 @@ async def create_linkedin_blog_from_projects():
         print(f"❌ LinkedIn blog creation error: {e}")
         raise HTTPException(status_code=500, detail=f"Blog creation failed: {str(e)}")
 
+@app.post("/projects/create-linkedin-blog/stream")
+def stream_linkedin_blog_from_projects():
+    """Stream a LinkedIn blog post based on all projects as Server-Sent Events"""
+    try:
+        with get_db_cursor_context() as (cursor, conn):
+            cursor.execute("SELECT project_data FROM manual_projects WHERE user_id = ? ORDER BY created_at DESC", (current_user_id(),))
+            project_rows = cursor.fetchall()
+    except Exception as e:
+        print(f"❌ LinkedIn blog creation error: {e}")
+        raise HTTPException(status_code=500, detail=f"Blog creation failed: {str(e)}")
+    
+    if not project_rows:
+        raise HTTPException(status_code=404, detail="No projects found to create blog from")
+    
+    blog_content = generate_linkedin_blog_from_projects(project_rows)
+    metadata = {"projects_used": len(project_rows)}
+    return _sse_response(_blog_event_stream(_iter_text_chunks(blog_content), metadata))
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True when an If-None-Match header lists etag (or is "*"); weak validators compare by opaque tag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or etag in [tag[2:] if tag.startswith('W/') else tag for tag in candidates]
+
 @app.get("/cv/pdf-preview")
-async def get_cv_pdf_preview():
-    """Get CV as PDF for preview (not download)."""
+def get_cv_pdf_preview(request: Request):
+    """Get CV as PDF for preview (not download).
+
+    Preview is read-only: the CV is assembled with its projects in memory and
+    never written back. The response carries a strong ETag built from cheap
+    markers (the CV's latest version and the user's projects revision), so a
+    polling client gets a 304 without the CV being assembled or rendered.
+    """
     try:
         with get_db_cursor_context() as (cursor, conn):
-            # Always update CV before preview
-            updated_cv = generate_cv_with_projects(cursor, conn)
-            cursor.execute("SELECT current_content FROM cvs WHERE is_active = TRUE LIMIT 1")
+            cursor.execute("SELECT id FROM cvs WHERE user_id = ? AND is_active = TRUE LIMIT 1", (current_user_id(),))
             cv_row = cursor.fetchone()
-            
             if not cv_row:
                 raise HTTPException(status_code=404, detail="No active CV found")
-            
-            cv_content = cv_row[0]
-            
-            # Clean the CV content before generating PDF
-            cv_content = clean_cv_text(cv_content)
-            
-            # Generate enhanced PDF
-            pdf_bytes = generate_enhanced_pdf(cv_content)
-            
-            # Get the PDF content
-            pdf_content = pdf_bytes.getvalue()
-            
-            # Check if PDF was generated successfully
-            if len(pdf_content) == 0:
-                print("Warning: Generated PDF is empty, using fallback")
-                # Use a simple text-based fallback
-                pdf_content = f"CV Content:\n\n{cv_content}".encode('utf-8')
-                return Response(
-                    content=pdf_content,
-                    media_type="text/plain",
-                    headers={"Content-Disposition": "inline; filename=cv.txt"}
-                )
-            
+
+            version, projects_revision = source_markers(cursor, cv_row[0], current_user_id())
+            etag = '"{}"'.format(render_cache_key(
+                "", renderer=f"{ENHANCED_PDF_RENDERER}/preview",
+                extra={"cv": cv_row[0], "version": version, "projects": projects_revision}))
+            validators = {"ETag": etag, "Cache-Control": "no-cache"}
+            if _etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers=validators)
+
+            # Assemble the CV with projects exactly as a download would, without persisting it,
+            # in the same read as the markers so the ETag describes this text
+            cv_content = build_cv_with_projects(cursor)
+
+        # Clean the CV content before generating PDF
+        cv_content = clean_cv_text(cv_content)
+
+        # Generate enhanced PDF, or reuse the one rendered for this exact content
+        cache_key = render_cache_key(cv_content, renderer=ENHANCED_PDF_RENDERER)
+        pdf_content, cache_source = render_cache.get_or_render(
+            cache_key, lambda: render_pdf("enhanced", cv_content))
+        
+        # Check if PDF was generated successfully
+        if len(pdf_content) == 0:
+            print("Warning: Generated PDF is empty, using fallback")
+            # Use a simple text-based fallback
+            pdf_content = f"CV Content:\n\n{cv_content}".encode('utf-8')
             return Response(
                 content=pdf_content,
-                media_type="application/pdf",
-                headers={"Content-Disposition": "inline; filename=cv.pdf"}
+                media_type="text/plain",
+                headers={"Content-Disposition": "inline; filename=cv.txt"}
             )
+        
+        return Response(
+            content=pdf_content,
+            media_type="application/pdf",
+            headers={"Content-Disposition": "inline; filename=cv.pdf", "X-Render-Cache": cache_source,
+                     **validators}
+        )
             
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error generating PDF preview: {e}")
         # Fallback to text response
         try:
             with get_db_cursor_context() as (cursor, conn):
-                cursor.execute("SELECT current_content FROM cvs WHERE is_active = TRUE LIMIT 1")
+                cursor.execute("SELECT current_content FROM cvs WHERE user_id = ? AND is_active = TRUE LIMIT 1", (current_user_id(),))
                 cv_row = cursor.fetchone()
                 if cv_row:
                     cv_content = cv_row[0]
@@ -6469,96 +5986,70 @@ async def get_cv_pdf_preview():
         except:
             pass
         raise HTTPException(status_code=500, detail=f"Error generating PDF: {str(e)}")
+
+PREVIEW_PNG_DEFAULT_WIDTH = 600
+PREVIEW_PNG_MIN_WIDTH = 32
+PREVIEW_PNG_MAX_WIDTH = 2000
+
+@app.get("/cv/preview/page/{page}.png")
+def get_cv_page_png(page: int, request: Request, width: int = PREVIEW_PNG_DEFAULT_WIDTH, cv_id: Optional[int] = None):
+    """PNG of one page of the CV, width pixels wide, for thumbnails and light-weight previews.
+
+    Without cv_id this is the active CV as /cv/pdf-preview shows it; with
+    cv_id it is that stored CV. Images are cached by content hash, page and
+    width, and carry an ETag for conditional requests.
+    """
+    if not HAS_PYMUPDF:
+        raise HTTPException(status_code=501, detail="PNG previews need PyMuPDF")
+    if page < 1:
+        raise HTTPException(status_code=400, detail="Pages are numbered from 1")
+    if not PREVIEW_PNG_MIN_WIDTH <= width <= PREVIEW_PNG_MAX_WIDTH:
+        raise HTTPException(status_code=400,
+                            detail=f"width must be between {PREVIEW_PNG_MIN_WIDTH} and {PREVIEW_PNG_MAX_WIDTH}")
     try:
-        # Generate updated CV with all projects and pending updates
-        with get_db_cursor() as (cursor, conn):
-            # Get current CV content
-            cursor.execute("SELECT current_content FROM cvs WHERE is_active = TRUE LIMIT 1")
-            cv_row = cursor.fetchone()
-            
-            if not cv_row:
-                # If no active CV, get the most recent one
-                cursor.execute("SELECT current_content FROM cvs ORDER BY updated_at DESC LIMIT 1")
+        with get_db_cursor_context() as (cursor, conn):
+            if cv_id is None:
+                cursor.execute("SELECT 1 FROM cvs WHERE user_id = ? AND is_active = TRUE LIMIT 1", (current_user_id(),))
+                if not cursor.fetchone():
+                    raise HTTPException(status_code=404, detail="No active CV found")
+                cv_content = build_cv_with_projects(cursor)
+            else:
+                cursor.execute("SELECT current_content FROM cvs WHERE id = ? AND user_id = ?", (cv_id, current_user_id()))
                 cv_row = cursor.fetchone()
-            
-            if not cv_row:
-                raise HTTPException(status_code=404, detail="No CV found. Please upload a CV first.")
-            
-            current_cv = cv_row[0]
-            
-            # Check for pending updates and apply them
-            cursor.execute("SELECT update_type, content FROM cv_updates WHERE processed = FALSE ORDER BY created_at")
-            updates = cursor.fetchall()
-            
-            if updates:
-                # Apply pending updates
-                updated_cv = enhance_cv_with_openai(current_cv, updates)
-                # Mark updates as processed
-                cursor.execute("UPDATE cv_updates SET processed = TRUE")
-                # Update CV in database
-                cursor.execute("UPDATE cvs SET current_content = ?, updated_at = CURRENT_TIMESTAMP WHERE is_active = TRUE", (updated_cv,))
-                current_cv = updated_cv
-            
-            # Regenerate CV with current projects to ensure everything is up to date
-            final_cv = generate_cv_with_projects(cursor, conn)
-            
-            # Ensure we have the most complete CV content
-            if len(final_cv) > len(current_cv):
-                current_cv = final_cv
-            
-            # Format CV with AI for better structure
-            formatted_cv = format_cv_with_ai(current_cv)
-            
-            # Update the database with the final CV
-            cursor.execute("UPDATE cvs SET current_content = ?, updated_at = CURRENT_TIMESTAMP WHERE is_active = TRUE", (formatted_cv,))
-            
-            # Generate comprehensive PDF file with all content
-            pdf_buffer = generate_cv_pdf(formatted_cv, [])
-            pdf_content = pdf_buffer.getvalue()
-            
-            # Determine file type and media type based on content
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            
-            # Check if we generated an actual PDF (binary content) or text fallback
-            try:
-                # Try to decode as text to see if it's a text file
-                pdf_content.decode('utf-8')
-                # If successful, it's a text file
-                filename = f"Enhanced_CV_Complete_{timestamp}.txt"
-                media_type = "text/plain"
-                content_type = "text/plain; charset=utf-8"
-                print("📄 Serving complete CV as text file")
-            except UnicodeDecodeError:
-                # If decode fails, it's binary PDF content
-                filename = f"Enhanced_CV_Complete_{timestamp}.pdf"
-                media_type = "application/pdf"
-                content_type = "application/pdf"
-                print("📄 Serving complete CV as PDF file")
-            
-            return Response(
-                content=pdf_content,
-                media_type=media_type,
-                headers={
-                    "Content-Disposition": f"attachment; filename=\"{filename}\"",
-                    "Content-Length": str(len(pdf_content)),
-                    "Cache-Control": "no-cache, no-store, must-revalidate",
-                    "Pragma": "no-cache",
-                    "Expires": "0",
-                    "Content-Type": content_type,
-                    "X-Content-Type-Options": "nosniff"
-                }
-            )
-        
+                if not cv_row:
+                    raise HTTPException(status_code=404, detail="CV not found")
+                cv_content = cv_row[0] or ""
+        cv_content = clean_cv_text(cv_content)
+
+        pdf_key = render_cache_key(cv_content, renderer=ENHANCED_PDF_RENDERER)
+        png_key = render_cache_key(cv_content, renderer=f"{ENHANCED_PDF_RENDERER}/png",
+                                   extra={"page": page, "width": width})
+        etag = f'"{png_key}"'
+        validators = {"ETag": etag, "Cache-Control": "no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=validators)
+
+        def rasterize():
+            pdf_content, _ = render_cache.get_or_render(pdf_key, lambda: render_pdf("enhanced", cv_content))
+            return rasterize_pdf_page(pdf_content, page, width)
+
+        png_content, cache_source = render_cache.get_or_render(png_key, rasterize)
+        return Response(content=png_content, media_type="image/png",
+                        headers={"X-Render-Cache": cache_source, **validators})
+    except HTTPException:
+        raise
+    except IndexError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        print(f"Error generating complete CV document: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error downloading complete CV: {str(e)}")
+        print(f"Error rendering page preview: {e}")
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 @app.post("/diagnostics/education-update-test")
-async def education_update_test():
+def education_update_test():
     """Simulate an education update and return before/after CV content and update status for diagnostics."""
     try:
-        with get_db_cursor() as (cursor, conn):
-            cursor.execute("SELECT current_content FROM cvs WHERE is_active = TRUE LIMIT 1")
+        with get_db_cursor_context() as (cursor, conn):
+            cursor.execute("SELECT current_content FROM cvs WHERE user_id = ? AND is_active = TRUE LIMIT 1", (current_user_id(),))
             cv_row = cursor.fetchone()
             if not cv_row:
                 return {"success": False, "message": "No active CV found."}
@@ -6568,7 +6059,7 @@ async def education_update_test():
             updated_cv = insert_in_education_section(before_cv, test_message)
             update_made = updated_cv != before_cv
             if update_made:
-                cursor.execute("UPDATE cvs SET current_content = ?, updated_at = CURRENT_TIMESTAMP WHERE is_active = TRUE", (updated_cv,))
+                update_active_cv_content(cursor, updated_cv)
                 print("[DIAG] Education section updated in DB.")
             else:
                 print("[DIAG] No changes made to education section.")
@@ -6583,26 +6074,39 @@ async def education_update_test():
         print(f"[DIAG] Error in education update test: {e}")
         return {"success": False, "error": str(e)}
 
+@app.get("/diagnostics/openai")
+async def openai_diagnostics():
+    """Report OpenAI client configuration, in-flight calls and circuit breaker state."""
+    if not openai_client:
+        return {"configured": False, "message": "OpenAI client not configured, all AI features use fallbacks"}
+    return {"configured": True, **openai_client.snapshot()}
+
+@app.get("/diagnostics/db-pool")
+async def db_pool_diagnostics():
+    """Report SQLite pool occupancy and checkout wait times after pinging idle connections."""
+    pool = get_pool()
+    return {"health": pool.health_check(), **pool.snapshot()}
+
+@app.get("/diagnostics/render-cache")
+async def render_cache_diagnostics():
+    """Report rendered-document cache hits, misses and tier sizes."""
+    return render_cache.snapshot()
+
+@app.get("/diagnostics/render-service")
+async def render_service_diagnostics():
+    """Report render worker load, rejected/timed-out jobs and wait/render time histograms."""
+    return render_service.snapshot()
+
+@app.get("/diagnostics/cv-preparer")
+def cv_preparer_diagnostics():
+    """Report background CV preparation: CVs and users still waiting, passes run and failures."""
+    return cv_preparer.snapshot()
+
 @app.get("/diagnostics/db-cv-dump")
 async def db_cv_dump():
     """Return all rows from the cvs table for diagnostics."""
-    import sqlite3
     try:
-        conn = sqlite3.connect('cv_updater.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, filename, current_content, updated_at, is_active FROM cvs ORDER BY updated_at DESC")
-        rows = cursor.fetchall()
-        conn.close()
-        result = [
-            {
-                "id": row[0],
-                "filename": row[1],
-                "current_content": row[2],
-                "updated_at": row[3],
-                "is_active": bool(row[4])
-            }
-            for row in rows
-        ]
+        result = await cv_repository.list_contents()
         return JSONResponse(content={"cvs": result})
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)
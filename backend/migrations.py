@@ -0,0 +1,350 @@
+"""
+Numbered schema migrations.
+
+Each migration runs once, in order, inside its own transaction and is
+recorded in the schema_version table. Append new migrations to MIGRATIONS
+(and the PostgreSQL equivalent to POSTGRES_MIGRATIONS under the same version);
+never edit one that has already shipped.
+"""
+
+from typing import Callable, List, Union
+
+from cv_versions import record_cv_version
+from db_pool import dialect_of
+from search import PG_SEARCH_DOCUMENTS
+from tenancy import DEFAULT_USER_ID
+
+Step = Union[str, Callable]
+
+class Migration:
+    def __init__(self, version: int, description: str, steps: List[Step]):
+        self.version = version
+        self.description = description
+        self.steps = steps
+
+def _columns(cursor, table: str) -> List[str]:
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in cursor.fetchall()]
+
+def _backfill_legacy_columns(cursor):
+    """Columns added after the first releases; old databases may lack them"""
+    if 'processed' not in _columns(cursor, 'cv_updates'):
+        cursor.execute("ALTER TABLE cv_updates ADD COLUMN processed BOOLEAN DEFAULT FALSE")
+        print("Added 'processed' column to cv_updates table")
+
+    cv_columns = _columns(cursor, 'cvs')
+    if 'title' not in cv_columns:
+        cursor.execute("ALTER TABLE cvs ADD COLUMN title TEXT NOT NULL DEFAULT 'Untitled CV'")
+        print("Added 'title' column to cvs table")
+    if 'is_active' not in cv_columns:
+        cursor.execute("ALTER TABLE cvs ADD COLUMN is_active BOOLEAN DEFAULT FALSE")
+        print("Added 'is_active' column to cvs table")
+        # Set the most recent CV as active
+        cursor.execute("UPDATE cvs SET is_active = TRUE WHERE id = (SELECT id FROM cvs ORDER BY updated_at DESC LIMIT 1)")
+
+def _json_field(path: str) -> str:
+    # Malformed rows yield NULL instead of failing every read and index update
+    return f"CASE WHEN json_valid(project_data) THEN json_extract(project_data, '$.{path}') END"
+
+# Flattened JSON values of a project row: indexing the raw JSON would make every
+# key ("title", "description", ...) a search hit
+def _project_text(row: str) -> str:
+    return (f"CASE WHEN json_valid({row}.project_data) THEN "
+            f"(SELECT group_concat(value, ' ') FROM json_tree({row}.project_data) WHERE type NOT IN ('object', 'array')) "
+            f"ELSE {row}.project_data END")
+
+def _seed_cv_versions(cursor):
+    """Existing CVs start their history with their current content as version 1"""
+    cursor.execute("SELECT id, current_content FROM cvs")
+    for cv_id, content in cursor.fetchall():
+        record_cv_version(cursor, cv_id, content, "Initial version")
+
+_USER_TABLES = ("cvs", "manual_projects", "chat_messages", "cv_updates")
+
+def _user_partition_steps(title_key: str) -> List[Step]:
+    """user_id on every per-user table; existing rows belong to the default user. The
+    composite indexes lead with user_id and replace the global ones from migrations 3 and 4."""
+    return [
+        f"ALTER TABLE {table} ADD COLUMN user_id TEXT NOT NULL DEFAULT '{DEFAULT_USER_ID}'" for table in _USER_TABLES
+    ] + [
+        "DROP INDEX IF EXISTS idx_cvs_active",
+        "DROP INDEX IF EXISTS idx_cvs_updated_at",
+        "DROP INDEX IF EXISTS idx_chat_messages_created",
+        "DROP INDEX IF EXISTS idx_manual_projects_created",
+        "DROP INDEX IF EXISTS idx_manual_projects_title",
+        "DROP INDEX IF EXISTS idx_cv_updates_pending",
+        "CREATE INDEX IF NOT EXISTS idx_cvs_user_active ON cvs(user_id, updated_at) WHERE is_active = TRUE",
+        "CREATE INDEX IF NOT EXISTS idx_cvs_user_updated_at ON cvs(user_id, updated_at)",
+        "CREATE INDEX IF NOT EXISTS idx_chat_messages_user ON chat_messages(user_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_manual_projects_user_created ON manual_projects(user_id, created_at)",
+        f"CREATE INDEX IF NOT EXISTS idx_manual_projects_user_title ON manual_projects(user_id, {title_key})",
+        "CREATE INDEX IF NOT EXISTS idx_cv_updates_user_pending ON cv_updates(user_id, processed, created_at)",
+    ]
+
+MIGRATIONS = [
+    Migration(1, "initial schema", [
+        '''CREATE TABLE IF NOT EXISTS cvs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL DEFAULT 'Untitled CV',
+            filename TEXT NOT NULL,
+            original_content TEXT NOT NULL,
+            current_content TEXT NOT NULL,
+            is_active BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )''',
+        '''CREATE TABLE IF NOT EXISTS chat_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            message TEXT NOT NULL,
+            message_type TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )''',
+        '''CREATE TABLE IF NOT EXISTS cv_updates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            update_type TEXT NOT NULL,
+            content TEXT NOT NULL,
+            original_message TEXT NOT NULL,
+            processed BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )''',
+        '''CREATE TABLE IF NOT EXISTS manual_projects (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_data TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )''',
+    ]),
+    Migration(2, "backfill legacy columns", [_backfill_legacy_columns]),
+    Migration(3, "hot-path indexes", [
+        # `WHERE is_active = TRUE` runs on almost every request; the partial index
+        # only holds the active row(s). Queries must spell the predicate the same way.
+        "CREATE INDEX IF NOT EXISTS idx_cvs_active ON cvs(updated_at) WHERE is_active = TRUE",
+        "CREATE INDEX IF NOT EXISTS idx_cvs_updated_at ON cvs(updated_at)",
+        "CREATE INDEX IF NOT EXISTS idx_chat_messages_created ON chat_messages(created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_manual_projects_created ON manual_projects(created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_cv_updates_pending ON cv_updates(processed, created_at)",
+    ]),
+    Migration(4, "project columns generated from project_data", [
+        f"ALTER TABLE manual_projects ADD COLUMN title TEXT GENERATED ALWAYS AS ({_json_field('title')}) VIRTUAL",
+        f"ALTER TABLE manual_projects ADD COLUMN duration TEXT GENERATED ALWAYS AS ({_json_field('duration')}) VIRTUAL",
+        f"ALTER TABLE manual_projects ADD COLUMN role TEXT GENERATED ALWAYS AS ({_json_field('role')}) VIRTUAL",
+        # JSON array text, e.g. '["React","Node.js"]'; query with json_each(technologies)
+        f"ALTER TABLE manual_projects ADD COLUMN technologies TEXT GENERATED ALWAYS AS ({_json_field('technologies')}) VIRTUAL",
+        "CREATE INDEX IF NOT EXISTS idx_manual_projects_title ON manual_projects(title COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS idx_manual_projects_duration ON manual_projects(duration)",
+        "CREATE INDEX IF NOT EXISTS idx_manual_projects_role ON manual_projects(role)",
+    ]),
+    Migration(5, "full-text search", [
+        # CVs and chat messages are external-content tables over the source rows;
+        # projects keep their own flattened copy of project_data
+        "CREATE VIRTUAL TABLE IF NOT EXISTS cvs_fts USING fts5(title, current_content, "
+        "content='cvs', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS chat_messages_fts USING fts5(message, "
+        "content='chat_messages', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS manual_projects_fts USING fts5(title, body, tokenize='porter unicode61')",
+
+        '''CREATE TRIGGER IF NOT EXISTS cvs_fts_insert AFTER INSERT ON cvs BEGIN
+            INSERT INTO cvs_fts(rowid, title, current_content) VALUES (new.id, new.title, new.current_content);
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS cvs_fts_delete AFTER DELETE ON cvs BEGIN
+            INSERT INTO cvs_fts(cvs_fts, rowid, title, current_content) VALUES ('delete', old.id, old.title, old.current_content);
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS cvs_fts_update AFTER UPDATE OF title, current_content ON cvs BEGIN
+            INSERT INTO cvs_fts(cvs_fts, rowid, title, current_content) VALUES ('delete', old.id, old.title, old.current_content);
+            INSERT INTO cvs_fts(rowid, title, current_content) VALUES (new.id, new.title, new.current_content);
+        END''',
+
+        '''CREATE TRIGGER IF NOT EXISTS chat_messages_fts_insert AFTER INSERT ON chat_messages BEGIN
+            INSERT INTO chat_messages_fts(rowid, message) VALUES (new.id, new.message);
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS chat_messages_fts_delete AFTER DELETE ON chat_messages BEGIN
+            INSERT INTO chat_messages_fts(chat_messages_fts, rowid, message) VALUES ('delete', old.id, old.message);
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS chat_messages_fts_update AFTER UPDATE OF message ON chat_messages BEGIN
+            INSERT INTO chat_messages_fts(chat_messages_fts, rowid, message) VALUES ('delete', old.id, old.message);
+            INSERT INTO chat_messages_fts(rowid, message) VALUES (new.id, new.message);
+        END''',
+
+        f'''CREATE TRIGGER IF NOT EXISTS manual_projects_fts_insert AFTER INSERT ON manual_projects BEGIN
+            INSERT INTO manual_projects_fts(rowid, title, body) VALUES (new.id, COALESCE(new.title, ''), {_project_text('new')});
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS manual_projects_fts_delete AFTER DELETE ON manual_projects BEGIN
+            DELETE FROM manual_projects_fts WHERE rowid = old.id;
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS manual_projects_fts_update AFTER UPDATE OF project_data ON manual_projects BEGIN
+            DELETE FROM manual_projects_fts WHERE rowid = old.id;
+            INSERT INTO manual_projects_fts(rowid, title, body) VALUES (new.id, COALESCE(new.title, ''), {_project_text('new')});
+        END''',
+
+        # Index the rows that already exist
+        "INSERT INTO cvs_fts(cvs_fts) VALUES ('rebuild')",
+        "INSERT INTO chat_messages_fts(chat_messages_fts) VALUES ('rebuild')",
+        f"INSERT INTO manual_projects_fts(rowid, title, body) "
+        f"SELECT id, COALESCE(title, ''), {_project_text('manual_projects')} FROM manual_projects",
+    ]),
+    Migration(6, "cv version history", [
+        # payload: zlib-compressed JSON, full content for keyframes, line-diff opcodes otherwise
+        '''CREATE TABLE IF NOT EXISTS cv_versions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cv_id INTEGER NOT NULL REFERENCES cvs(id) ON DELETE CASCADE,
+            version_number INTEGER NOT NULL,
+            is_keyframe BOOLEAN NOT NULL,
+            payload BLOB NOT NULL,
+            content_hash TEXT NOT NULL,
+            content_length INTEGER NOT NULL,
+            changes_summary TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (cv_id, version_number)
+        )''',
+        # foreign_keys is off on our connections, so cascade by trigger
+        '''CREATE TRIGGER IF NOT EXISTS cv_versions_cascade AFTER DELETE ON cvs BEGIN
+            DELETE FROM cv_versions WHERE cv_id = old.id;
+        END''',
+        _seed_cv_versions,
+    ]),
+    Migration(7, "per-user partitioning", _user_partition_steps("title COLLATE NOCASE")),
+    Migration(8, "prepared cvs", [
+        # AI-formatted content of a CV, made in the background from version source_version
+        '''CREATE TABLE IF NOT EXISTS prepared_cvs (
+            cv_id INTEGER PRIMARY KEY REFERENCES cvs(id) ON DELETE CASCADE,
+            user_id TEXT NOT NULL,
+            source_version INTEGER NOT NULL,
+            formatted_content TEXT NOT NULL,
+            prepared_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )''',
+        '''CREATE TRIGGER IF NOT EXISTS prepared_cvs_cascade AFTER DELETE ON cvs BEGIN
+            DELETE FROM prepared_cvs WHERE cv_id = old.id;
+        END''',
+        # The preparer looks for users with unprocessed updates across all users
+        "CREATE INDEX IF NOT EXISTS idx_cv_updates_unprocessed ON cv_updates(user_id) WHERE processed = FALSE",
+    ]),
+    Migration(9, "project revisions", [
+        # Bumped on every change to a user's manual projects; a prepared CV records the
+        # revision it was assembled from, so adding or editing a project makes it stale
+        '''CREATE TABLE IF NOT EXISTS project_revisions (
+            user_id TEXT PRIMARY KEY,
+            revision INTEGER NOT NULL DEFAULT 0
+        )''',
+        "INSERT INTO project_revisions (user_id, revision) SELECT DISTINCT user_id, 1 FROM manual_projects",
+        "ALTER TABLE prepared_cvs ADD COLUMN source_projects_revision INTEGER NOT NULL DEFAULT 0",
+    ] + [
+        f'''CREATE TRIGGER IF NOT EXISTS manual_projects_revision_{event.lower()} AFTER {event} ON manual_projects BEGIN
+            INSERT INTO project_revisions (user_id, revision) VALUES ({row}.user_id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1;
+        END'''
+        for event, row in (("INSERT", "new"), ("UPDATE", "new"), ("DELETE", "old"))
+    ]),
+    Migration(10, "project listing index", [
+        # The listing keeps only rows with a title; with title in the index the
+        # generated column is read from it instead of re-parsing every project_data
+        "DROP INDEX IF EXISTS idx_manual_projects_user_created",
+        "CREATE INDEX IF NOT EXISTS idx_manual_projects_user_listing ON manual_projects(user_id, created_at, title)",
+    ]),
+]
+
+# SQL shared by both backends runs through the Postgres cursor's dialect translation
+# (SERIAL ids, BYTEA); JSON1, FTS5 and trigger-based steps have native replacements.
+_PG_SEARCH_TABLES = {"cvs": "cvs", "projects": "manual_projects", "chat": "chat_messages"}
+
+def _pg_json_field(path: str, as_text: bool = True) -> str:
+    return f"try_jsonb(project_data) ->> '{path}'" if as_text else f"(try_jsonb(project_data) -> '{path}')::text"
+
+POSTGRES_MIGRATIONS = [
+    MIGRATIONS[0],
+    Migration(2, "backfill legacy columns", []),
+    MIGRATIONS[2],
+    Migration(4, "project columns generated from project_data", [
+        # Malformed rows yield NULL instead of failing the insert
+        '''CREATE OR REPLACE FUNCTION try_jsonb(doc TEXT) RETURNS JSONB
+           LANGUAGE plpgsql IMMUTABLE AS $$
+           BEGIN
+               RETURN doc::jsonb;
+           EXCEPTION WHEN others THEN
+               RETURN NULL;
+           END $$''',
+        f"ALTER TABLE manual_projects ADD COLUMN title TEXT GENERATED ALWAYS AS ({_pg_json_field('title')}) STORED",
+        f"ALTER TABLE manual_projects ADD COLUMN duration TEXT GENERATED ALWAYS AS ({_pg_json_field('duration')}) STORED",
+        f"ALTER TABLE manual_projects ADD COLUMN role TEXT GENERATED ALWAYS AS ({_pg_json_field('role')}) STORED",
+        f"ALTER TABLE manual_projects ADD COLUMN technologies TEXT GENERATED ALWAYS AS "
+        f"({_pg_json_field('technologies', as_text=False)}) STORED",
+        # Serves `lower(title) = lower(?)`, the translation of `title = ? COLLATE NOCASE`
+        "CREATE INDEX IF NOT EXISTS idx_manual_projects_title ON manual_projects(lower(title))",
+        "CREATE INDEX IF NOT EXISTS idx_manual_projects_duration ON manual_projects(duration)",
+        "CREATE INDEX IF NOT EXISTS idx_manual_projects_role ON manual_projects(role)",
+    ]),
+    Migration(5, "full-text search", [
+        f"CREATE INDEX IF NOT EXISTS idx_{table}_fts ON {table} USING GIN (({PG_SEARCH_DOCUMENTS[scope][0]}))"
+        for scope, table in _PG_SEARCH_TABLES.items()
+    ]),
+    Migration(6, "cv version history", [
+        # Postgres enforces the ON DELETE CASCADE itself, no trigger needed
+        MIGRATIONS[5].steps[0],
+        _seed_cv_versions,
+    ]),
+    Migration(7, "per-user partitioning", _user_partition_steps("lower(title)")),
+    Migration(8, "prepared cvs", [MIGRATIONS[7].steps[0], MIGRATIONS[7].steps[2]]),
+    Migration(9, "project revisions", MIGRATIONS[8].steps[:3] + [
+        '''CREATE OR REPLACE FUNCTION bump_project_revision() RETURNS trigger
+           LANGUAGE plpgsql AS $$
+           DECLARE
+               owner TEXT := CASE WHEN TG_OP = 'DELETE' THEN OLD.user_id ELSE NEW.user_id END;
+           BEGIN
+               INSERT INTO project_revisions (user_id, revision) VALUES (owner, 1)
+               ON CONFLICT (user_id) DO UPDATE SET revision = project_revisions.revision + 1;
+               RETURN NULL;
+           END $$''',
+        '''CREATE TRIGGER manual_projects_revision AFTER INSERT OR UPDATE OR DELETE ON manual_projects
+           FOR EACH ROW EXECUTE FUNCTION bump_project_revision()''',
+    ]),
+    Migration(10, "project listing index", MIGRATIONS[9].steps),
+]
+
+def migrations_for(conn) -> List[Migration]:
+    return POSTGRES_MIGRATIONS if dialect_of(conn) == "postgres" else MIGRATIONS
+
+def current_version(cursor) -> int:
+    cursor.execute('''CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''')
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cursor.fetchone()[0]
+
+def migrate(conn, migrations: List[Migration] = None) -> List[int]:
+    """Apply pending migrations in order; returns the versions applied"""
+    migrations = sorted(migrations or migrations_for(conn), key=lambda m: m.version)
+    postgres = dialect_of(conn) == "postgres"
+    cursor = conn.cursor()
+    version = current_version(cursor)
+    conn.commit()
+
+    applied = []
+    for migration in migrations:
+        if migration.version <= version:
+            continue
+        try:
+            # Take the write lock up front so concurrent workers apply each migration once
+            if postgres:
+                cursor.execute("LOCK TABLE schema_version IN EXCLUSIVE MODE")
+            else:
+                cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT 1 FROM schema_version WHERE version = ?", (migration.version,))
+            if cursor.fetchone():
+                conn.rollback()
+                continue
+            for step in migration.steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+            cursor.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                           (migration.version, migration.description))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            print(f"❌ Migration {migration.version} ({migration.description}) failed")
+            raise
+        print(f"🧱 Applied migration {migration.version}: {migration.description}")
+        applied.append(migration.version)
+    cursor.close()
+    return applied
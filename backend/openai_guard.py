@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+OpenAI client guard: per-call deadlines, a cap on concurrent in-flight calls
+and a circuit breaker that fails fast while OpenAI is unhealthy.
+
+Every call site in main_enhanced.py already catches exceptions and switches to
+its *_fallback function, so a rejected call simply raises and the caller
+falls back immediately instead of waiting on SDK timeouts and retries.
+"""
+
+import os
+import threading
+import time
+from types import SimpleNamespace
+from typing import Optional
+
+class OpenAIGuardError(Exception):
+    """Base class for calls rejected by the guard before reaching OpenAI"""
+
+class CircuitOpenError(OpenAIGuardError):
+    """Raised while the circuit breaker is open"""
+
+class ConcurrencyLimitError(OpenAIGuardError):
+    """Raised when no in-flight slot frees up within the queue timeout"""
+
+class GuardedStream:
+    """A streamed completion that holds its in-flight slot until it is drained, fails or is closed.
+
+    close() releases the slot even if iteration never started; it runs on
+    `with` exit and, as a last resort, when an abandoned stream is collected.
+    """
+
+    def __init__(self, stream, on_finish):
+        self._stream = stream
+        self._iterator = None
+        self._on_finish = on_finish
+        self._finished = False
+        self._lock = threading.Lock()
+
+    def _finish(self, outcome: str, error: Exception = None):
+        with self._lock:
+            if self._finished:
+                return
+            self._finished = True
+        self._on_finish(outcome, error)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._finished:
+            raise StopIteration
+        try:
+            if self._iterator is None:
+                self._iterator = iter(self._stream)
+            return next(self._iterator)
+        except StopIteration:
+            self._finish("drained")
+            raise
+        except Exception as e:
+            self._finish("failed", e)
+            raise
+
+    def close(self):
+        try:
+            close = getattr(self._iterator if self._iterator is not None else self._stream, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self._finish("closed")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        if not self._finished:
+            self.close()
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a cool-down window.
+
+    closed    -> calls pass through, failures are counted
+    open      -> calls are rejected until the cool-down elapses
+    half_open -> a single trial call is let through; success closes the
+                 breaker, failure opens it for another cool-down
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, cooldown_seconds: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._last_error = None
+        self._stats = {"successes": 0, "failures": 0, "rejected": 0, "times_opened": 0}
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown_seconds:
+                    self._stats["rejected"] += 1
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    self._stats["rejected"] += 1
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._stats["successes"] += 1
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+            self._state = self.CLOSED
+
+    def record_failure(self, error: Exception = None):
+        with self._lock:
+            self._stats["failures"] += 1
+            self._consecutive_failures += 1
+            self._trial_in_flight = False
+            if error is not None:
+                self._last_error = f"{type(error).__name__}: {error}"
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._stats["times_opened"] += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def release_trial(self):
+        """Give back a half-open trial slot for a call that never reached OpenAI"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+                return self.HALF_OPEN
+            return self._state
+
+    def snapshot(self) -> dict:
+        state = self.state
+        with self._lock:
+            retry_in = None
+            if state == self.OPEN:
+                retry_in = round(max(0.0, self.cooldown_seconds - (time.monotonic() - self._opened_at)), 2)
+            return {
+                "state": state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "cooldown_seconds": self.cooldown_seconds,
+                "retry_in_seconds": retry_in,
+                "last_error": self._last_error,
+                **self._stats
+            }
+
+def _counts_as_failure(error: Exception) -> bool:
+    """Client-side errors (bad request, auth, ...) say nothing about OpenAI's health"""
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        return True  # timeouts, connection errors, ...
+    return status_code == 429 or status_code >= 500
+
+class GuardedOpenAIClient:
+    """Drop-in wrapper exposing client.chat.completions.create(...)"""
+
+    def __init__(self, client, timeout: float = 10.0, max_concurrency: int = 8,
+                 queue_timeout: float = 2.0, breaker: Optional[CircuitBreaker] = None):
+        self._client = client
+        self.timeout = timeout
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_timeout = queue_timeout
+        self.breaker = breaker or CircuitBreaker()
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create_chat_completion))
+
+    @classmethod
+    def from_env(cls, client) -> "GuardedOpenAIClient":
+        return cls(
+            client,
+            timeout=float(os.getenv("OPENAI_TIMEOUT_SECONDS", "10")),
+            max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")),
+            queue_timeout=float(os.getenv("OPENAI_QUEUE_TIMEOUT_SECONDS", "2")),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("OPENAI_BREAKER_FAILURES", "5")),
+                cooldown_seconds=float(os.getenv("OPENAI_BREAKER_COOLDOWN_SECONDS", "30"))
+            )
+        )
+
+    def _acquire_slot(self):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise ConcurrencyLimitError(
+                f"{self.max_concurrency} OpenAI calls already in flight, gave up after {self.queue_timeout}s"
+            )
+        with self._in_flight_lock:
+            self._in_flight += 1
+
+    def _release_slot(self):
+        with self._in_flight_lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def create_chat_completion(self, **kwargs):
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("OpenAI circuit breaker is open, using fallback")
+        try:
+            self._acquire_slot()
+        except ConcurrencyLimitError:
+            self.breaker.release_trial()
+            raise
+
+        kwargs.setdefault("timeout", self.timeout)
+        try:
+            result = self._client.chat.completions.create(**kwargs)
+        except Exception as e:
+            self._release_slot()
+            if _counts_as_failure(e):
+                self.breaker.record_failure(e)
+            else:
+                self.breaker.release_trial()
+            raise
+
+        if kwargs.get("stream"):
+            # Keep the slot until the stream is drained, fails or is closed
+            return GuardedStream(result, self._finish_stream)
+        self._release_slot()
+        self.breaker.record_success()
+        return result
+
+    def _finish_stream(self, outcome: str, error: Exception = None):
+        try:
+            if outcome == "drained":
+                self.breaker.record_success()
+            elif outcome == "failed":
+                self.breaker.record_failure(error)
+            else:
+                self.breaker.release_trial()
+        finally:
+            self._release_slot()
+
+    def snapshot(self) -> dict:
+        with self._in_flight_lock:
+            in_flight = self._in_flight
+        return {
+            "timeout_seconds": self.timeout,
+            "max_concurrency": self.max_concurrency,
+            "queue_timeout_seconds": self.queue_timeout,
+            "in_flight": in_flight,
+            "breaker": self.breaker.snapshot()
+        }
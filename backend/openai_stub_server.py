@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible stub server for offline load testing.
+
+Speaks the /v1/chat/completions wire format (plain and streaming) with
+configurable latency, error rate and rule-generated answers shaped like the
+ones the backend expects (classify_message JSON, project JSON, blog text, ...).
+
+Run it and point the backend at it:
+    python openai_stub_server.py --port 8090 --latency lognormal:-1.6,0.4 --error-rate 0.02 --seed 42
+    OPENAI_BASE_URL=http://localhost:8090/v1 uvicorn main_enhanced:app --port 8081
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+import uuid
+from typing import List, Optional
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+class LatencyModel:
+    """Latency distribution parsed from a spec string.
+
+    fixed:0.2 | uniform:0.1,0.5 | normal:0.3,0.05 | lognormal:-1.6,0.4 (mu, sigma of ln seconds)
+    """
+
+    def __init__(self, spec: str = "fixed:0", rng: random.Random = None):
+        self.spec = spec
+        self.rng = rng or random.Random()
+        kind, _, params = spec.partition(':')
+        self.kind = kind.strip().lower()
+        self.params = [float(p) for p in params.split(',') if p.strip()] or [0.0]
+        if self.kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self) -> float:
+        p = self.params
+        if self.kind == "fixed":
+            value = p[0]
+        elif self.kind == "uniform":
+            value = self.rng.uniform(p[0], p[1])
+        elif self.kind == "normal":
+            value = self.rng.gauss(p[0], p[1])
+        else:
+            value = self.rng.lognormvariate(p[0], p[1])
+        return max(0.0, value)
+
+class StubConfig:
+    def __init__(self, latency: str = "fixed:0", token_delay: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 500, seed: Optional[int] = None, responses_file: Optional[str] = None):
+        self.rng = random.Random(seed)
+        self.latency = LatencyModel(latency, self.rng)
+        self.token_delay = token_delay
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.canned = []
+        if responses_file:
+            # [{"match": "regex on the last message", "content": "answer" or {...}}, ...]
+            with open(responses_file, 'r', encoding='utf-8') as f:
+                for entry in json.load(f):
+                    content = entry["content"]
+                    if not isinstance(content, str):
+                        content = json.dumps(content)
+                    self.canned.append((re.compile(entry["match"], re.IGNORECASE | re.DOTALL), content))
+
+    @classmethod
+    def from_env(cls) -> "StubConfig":
+        seed = os.getenv("STUB_SEED")
+        return cls(
+            latency=os.getenv("STUB_LATENCY", "fixed:0"),
+            token_delay=float(os.getenv("STUB_TOKEN_DELAY", "0")),
+            error_rate=float(os.getenv("STUB_ERROR_RATE", "0")),
+            error_status=int(os.getenv("STUB_ERROR_STATUS", "500")),
+            seed=int(seed) if seed else None,
+            responses_file=os.getenv("STUB_RESPONSES_FILE")
+        )
+
+# Ordered keyword rules mirroring the categories classify_message asks for
+CLASSIFICATION_RULES = [
+    (["help", "what can you do", "commands"], "CV_HELP", "READ"),
+    (["linkedin", "blog", "social media post"], "LINKEDIN_BLOG", "CREATE"),
+    (["generate cv", "create cv", "build cv", "make cv"], "CV_GENERATE", "CREATE"),
+    (["clean cv", "fix duplicates", "organize cv"], "CV_CLEANUP", "UPDATE"),
+    (["show cv", "display cv", "my cv", "current cv"], "CV_SHOW", "READ"),
+    (["remove", "delete", "don't have"], "SKILL_DELETE", "DELETE"),
+    (["update", "change", "modify"], "SKILL_UPDATE", "UPDATE"),
+    (["show", "list", "what skills", "my skills"], "SKILL_SHOW", "READ"),
+    (["objective", "career goal"], "OBJECTIVE_ADD", "CREATE"),
+    (["certified", "certification", "license"], "CERTIFICATION_ADD", "CREATE"),
+    (["volunteer", "charity", "community service"], "VOLUNTEER_ADD", "CREATE"),
+    (["speak", "fluent in", "language"], "LANGUAGE_ADD", "CREATE"),
+    (["award", "recognition", "honor"], "ACHIEVEMENT_ADD", "CREATE"),
+    (["email", "phone", "linkedin.com", "github"], "CONTACT_ADD", "CREATE"),
+    (["studied", "graduated", "degree", "university"], "EDUCATION_ADD", "CREATE"),
+    (["worked", "employed", "job at", "worked as"], "EXPERIENCE_ADD", "CREATE"),
+    (["built", "created", "developed", "project"], "PROJECT_ADD", "CREATE"),
+    (["learned", "i know", "skill", "skilled in"], "SKILL_ADD", "CREATE"),
+]
+
+def classify(message: str) -> dict:
+    msg = message.lower()
+    for keywords, category, operation in CLASSIFICATION_RULES:
+        if any(kw in msg for kw in keywords):
+            section = category.split('_')[0]
+            return {"category": category, "extracted_info": message.strip(), "target_item": "",
+                    "target_section": section, "operation": operation}
+    return {"category": "OTHER", "extracted_info": message.strip(), "target_item": "",
+            "target_section": "", "operation": "READ"}
+
+def generate_answer(messages: List[dict], config: StubConfig) -> str:
+    system = " ".join(m.get("content", "") for m in messages if m.get("role") == "system")
+    last = messages[-1].get("content", "") if messages else ""
+
+    for pattern, content in config.canned:
+        if pattern.search(last):
+            return content
+
+    if "Classify messages" in system:
+        return json.dumps(classify(last))
+    if "Extract project information" in last:
+        message = last.split("Message:", 1)[-1].split("Extract:", 1)[0].strip()
+        words = re.findall(r"[A-Za-z][\w.+#-]*", message)
+        return json.dumps({
+            "title": " ".join(words[:4]).title() or "Stub Project",
+            "description": message[:200],
+            "technologies": [w for w in words if w[0].isupper()][:5],
+            "duration": "",
+            "highlights": ["Implemented core functionality"]
+        })
+    if "LinkedIn blog post" in last:
+        title = re.search(r"Title: (.*)", last)
+        title = title.group(1).strip() if title else "my latest project"
+        return (f"🚀 Excited to share {title}!\n\nBuilding it taught me a lot about shipping "
+                "reliable software under real constraints.\n\n#SoftwareEngineering #Projects")
+    if "CV Content:" in last:
+        # Formatting / enhancement prompts: hand the CV back unchanged
+        return last.split("CV Content:", 1)[1].split("\n\nPlease format", 1)[0].strip()
+    return "Stub response."
+
+def completion_payload(model: str, content: str) -> dict:
+    prompt_tokens, completion_tokens = 0, len(content.split())
+    return {
+        "id": f"chatcmpl-stub-{uuid.uuid4().hex[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens}
+    }
+
+def chunk_payload(completion_id: str, model: str, delta: dict, finish_reason: Optional[str] = None) -> str:
+    payload = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+class ChatMessage(BaseModel):
+    role: str
+    content: Optional[str] = ""
+
+class ChatCompletionRequest(BaseModel):
+    model: str = "gpt-3.5-turbo"
+    messages: List[ChatMessage]
+    temperature: Optional[float] = None
+    max_tokens: Optional[int] = None
+    stream: bool = False
+
+def create_app(config: StubConfig = None) -> FastAPI:
+    config = config or StubConfig.from_env()
+    stub = FastAPI(title="OpenAI stub")
+    stub.state.config = config
+    stub.state.stats = {"requests": 0, "errors": 0}
+
+    @stub.get("/health")
+    async def health():
+        return {"status": "ok", "latency": config.latency.spec, "error_rate": config.error_rate,
+                **stub.state.stats}
+
+    @stub.post("/v1/chat/completions")
+    async def chat_completions(request: ChatCompletionRequest):
+        stub.state.stats["requests"] += 1
+        await asyncio.sleep(config.latency.sample())
+
+        if config.error_rate and config.rng.random() < config.error_rate:
+            stub.state.stats["errors"] += 1
+            return JSONResponse(status_code=config.error_status, content={
+                "error": {"message": "Injected stub failure", "type": "server_error", "param": None, "code": None}
+            })
+
+        messages = [m.dict() for m in request.messages]
+        content = generate_answer(messages, config)
+        if not request.stream:
+            return completion_payload(request.model, content)
+
+        async def events():
+            completion_id = f"chatcmpl-stub-{uuid.uuid4().hex[:24]}"
+            yield chunk_payload(completion_id, request.model, {"role": "assistant", "content": ""})
+            for token in re.findall(r'\S+\s*|\s+', content):
+                if config.token_delay:
+                    await asyncio.sleep(config.token_delay)
+                yield chunk_payload(completion_id, request.model, {"content": token})
+            yield chunk_payload(completion_id, request.model, {}, "stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return stub
+
+app = create_app()
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub server for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", default=os.getenv("STUB_LATENCY", "fixed:0"),
+                        help="fixed:S | uniform:A,B | normal:MU,SD | lognormal:MU,SIGMA")
+    parser.add_argument("--token-delay", type=float, default=float(os.getenv("STUB_TOKEN_DELAY", "0")),
+                        help="delay between streamed tokens in seconds")
+    parser.add_argument("--error-rate", type=float, default=float(os.getenv("STUB_ERROR_RATE", "0")))
+    parser.add_argument("--error-status", type=int, default=int(os.getenv("STUB_ERROR_STATUS", "500")))
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--responses-file", default=os.getenv("STUB_RESPONSES_FILE"),
+                        help="JSON list of {match, content} canned answers")
+    args = parser.parse_args()
+
+    import uvicorn
+    config = StubConfig(latency=args.latency, token_delay=args.token_delay, error_rate=args.error_rate,
+                        error_status=args.error_status, seed=args.seed, responses_file=args.responses_file)
+    print(f"🧪 OpenAI stub listening on http://{args.host}:{args.port}/v1 "
+          f"(latency={args.latency}, error_rate={args.error_rate})")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
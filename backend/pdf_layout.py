@@ -0,0 +1,381 @@
+"""
+Layout engine for the enhanced (fpdf2) CV template.
+
+A render runs in three passes:
+
+1. Blocks: the section parser (cv_sections) splits the text into a preamble
+   (name, title, contact lines) and its sections; a short all-caps line
+   after a blank line also starts a section, for headings the parser does
+   not know. Every line becomes a typed block (header, bullet, paragraph, ...).
+2. Layout: each block is measured and word-wrapped exactly once against
+   glyph widths read from the font's width table and cached per process.
+3. Flow and emit: lines are placed top to bottom with explicit page breaks
+   (fpdf2's automatic page break is off), a header never ends a page, and
+   every line is written with a single cell() call, switching fonts only
+   when the style changes.
+
+Each pass is linear in the length of the text, and where a page breaks
+depends only on the laid-out line heights.
+
+Laid-out sections and flow states are cached per process (LayoutCache), so
+after an edit to one section only that section is wrapped again, and only
+the pages from the first changed section on are re-flowed. The caches live
+in each render worker process.
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from cv_sections import find_section_headers
+
+PDF_LAYOUT_CACHE_SECTIONS = int(os.getenv("PDF_LAYOUT_CACHE_SECTIONS", "1024"))
+PDF_LAYOUT_CACHE_FLOWS = int(os.getenv("PDF_LAYOUT_CACHE_FLOWS", "256"))
+
+class BlockStyle(NamedTuple):
+    font_style: str
+    size: float          # points
+    line_height: float   # mm
+    align: str = "L"
+    indent: float = 0.0  # mm from the left margin
+    fill: bool = False
+    space_before: float = 0.0
+    space_after: float = 0.0
+    keep_with_next: bool = False
+
+BLOCK_STYLES = {
+    "name": BlockStyle("B", 20, 10, align="C"),
+    "title": BlockStyle("", 14, 8, align="C"),
+    "contact": BlockStyle("", 10, 6, align="C"),
+    "header": BlockStyle("B", 14, 10, fill=True, space_before=1, space_after=1, keep_with_next=True),
+    "bullet": BlockStyle("", 10, 8, indent=10),
+    "paragraph": BlockStyle("", 10, 8),
+}
+HEADER_FILL_COLOR = (230, 236, 245)
+BOTTOM_MARGIN = 15
+BULLET_PREFIXES = ("-", "*", "•")
+
+class Block(NamedTuple):
+    kind: str
+    text: str
+
+class LaidOutBlock(NamedTuple):
+    kind: str
+    lines: Tuple[str, ...]
+
+class PageGeometry(NamedTuple):
+    left: float
+    top: float
+    width: float        # between the left and right margins
+    bottom: float       # lowest y a line may reach
+    cell_margin: float  # padding cell() puts on both sides of its text
+
+    @classmethod
+    def of(cls, pdf, bottom_margin: float = BOTTOM_MARGIN) -> "PageGeometry":
+        return cls(pdf.l_margin, pdf.t_margin, pdf.w - pdf.l_margin - pdf.r_margin,
+                   pdf.h - bottom_margin, pdf.c_margin)
+
+class PlacedLine(NamedTuple):
+    kind: str
+    x: float
+    y: float
+    width: float
+    text: str
+
+class FontMetrics:
+    """Advance widths of one font's glyphs (1/1000 em), looked up once per character"""
+
+    def __init__(self, font):
+        self._cw = font.cw
+        # TrueType width tables are indexed by code point, core font tables by character
+        self._by_code_point = not isinstance(next(iter(font.cw), 0), str)
+        self._widths: Dict[str, float] = {}
+
+    def _lookup(self, char: str) -> float:
+        try:
+            return self._cw[ord(char) if self._by_code_point else char] or 0
+        except (KeyError, IndexError, TypeError):
+            return 0
+
+    def units(self, text: str) -> float:
+        widths = self._widths
+        total = 0
+        for char in text:
+            width = widths.get(char)
+            if width is None:
+                width = widths[char] = self._lookup(char)
+            total += width
+        return total
+
+_metrics_cache: Dict[tuple, FontMetrics] = {}
+
+def metrics_for(font) -> FontMetrics:
+    """Process-wide metrics of a font face, shared by every document that uses it.
+
+    Keyed on the face itself (font file, PostScript name and style key), so the cache
+    holds one entry per distinct font however many documents are rendered.
+    """
+    key = (str(getattr(font, "ttffile", "") or ""), font.name, font.fontkey)
+    metrics = _metrics_cache.get(key)
+    if metrics is None:
+        metrics = _metrics_cache[key] = FontMetrics(font)
+    return metrics
+
+# Up to five words of capitals, e.g. ABOUT MYSELF or EDUCATION AND TRAINING
+_FALLBACK_HEADING = re.compile(r"^[A-Z][A-Z&/'-]*(?: [A-Z&/'-]+){0,4}$")
+
+def _section_starts(lines: List[str]) -> List[int]:
+    """Lines the parser recognises as headings, plus short all-caps lines that open a new
+    block after a blank line (a job title under a heading has no blank line before it)"""
+    starts = {i for i, _ in find_section_headers(lines)}
+    first = next((i for i, line in enumerate(lines) if line.strip()), len(lines))
+    for i in range(first + 1, len(lines) - 1):
+        text = lines[i].strip()
+        if (len(text) <= 40 and _FALLBACK_HEADING.match(text) and not lines[i - 1].strip()
+                and lines[i + 1].strip()):
+            starts.add(i)
+    return sorted(starts)
+
+def split_sections(cv_content: str) -> List[List[str]]:
+    """The preamble's lines, then each section's lines starting with its heading"""
+    lines = cv_content.split('\n')
+    starts = _section_starts(lines)
+    bounds = [0] + starts + [len(lines)]
+    # An empty preamble stays as the first entry, so sections[0] is always the preamble
+    return [lines[start:end] for start, end in zip(bounds, bounds[1:])]
+
+def _body_block(line: str) -> Block:
+    return Block("bullet" if line.startswith(BULLET_PREFIXES) else "paragraph", line)
+
+def section_blocks(lines: List[str], preamble: bool) -> List[Block]:
+    """Typed blocks of one section; the preamble's first lines become the name, title and contact details"""
+    content = [line.strip() for line in lines if line.strip()]
+    if not preamble:
+        heading = content[0].strip(" _-=") or content[0]
+        return [Block("header", heading.title())] + [_body_block(line) for line in content[1:]]
+
+    blocks = []
+    for line in content:
+        if not blocks:
+            blocks.append(Block("name", line))
+        elif '@' in line or line[:1] == '+' or line[:1].isdigit() or 'www.' in line:
+            blocks.append(Block("contact", line))
+        elif len(blocks) == 1 and len(line) < 50:
+            # A short line straight after the name is the job title
+            blocks.append(Block("title", line))
+        else:
+            blocks.append(_body_block(line))
+    return blocks
+
+def wrap_text(text: str, metrics: FontMetrics, size: float, width: float, k: float) -> Tuple[str, ...]:
+    """Greedy word wrap of text into lines no wider than width (mm) at size points"""
+    limit = width * k * 1000 / size  # width in font units
+    space = metrics.units(" ")
+    lines = []
+    current, current_units = [], 0.0
+    for word in text.split():
+        units = metrics.units(word)
+        if units > limit:
+            # A word wider than the line is broken between characters
+            if current:
+                lines.append(" ".join(current))
+                current, current_units = [], 0.0
+            piece, piece_units = "", 0.0
+            for char in word:
+                char_units = metrics.units(char)
+                if piece and piece_units + char_units > limit:
+                    lines.append(piece)
+                    piece, piece_units = "", 0.0
+                piece += char
+                piece_units += char_units
+            current, current_units = [piece], piece_units
+        elif current and current_units + space + units > limit:
+            lines.append(" ".join(current))
+            current, current_units = [word], units
+        else:
+            current_units += (space if current else 0) + units
+            current.append(word)
+    if current:
+        lines.append(" ".join(current))
+    return tuple(lines) or ("",)
+
+def layout_blocks(blocks: List[Block], metrics: Dict[str, FontMetrics], geometry: PageGeometry,
+                  k: float) -> Tuple[LaidOutBlock, ...]:
+    """Wrap every block to its column width"""
+    laid_out = []
+    for block in blocks:
+        style = BLOCK_STYLES[block.kind]
+        width = geometry.width - style.indent - 2 * geometry.cell_margin
+        laid_out.append(LaidOutBlock(block.kind, wrap_text(block.text, metrics[style.font_style], style.size, width, k)))
+    return tuple(laid_out)
+
+class FlowState(NamedTuple):
+    """Pagination so far: finished pages, the lines on the current page and the next free y"""
+    pages: Tuple[Tuple[PlacedLine, ...], ...]
+    page: Tuple[PlacedLine, ...]
+    y: float
+
+def start_flow(geometry: PageGeometry) -> FlowState:
+    return FlowState((), (), geometry.top)
+
+def flow_blocks(state: FlowState, blocks: Tuple[LaidOutBlock, ...], geometry: PageGeometry) -> FlowState:
+    """Place blocks after state, breaking pages where the next line would pass the bottom margin"""
+    pages, page, y = list(state.pages), list(state.page), state.y
+
+    def new_page():
+        nonlocal page, y
+        pages.append(tuple(page))
+        page, y = [], geometry.top
+
+    for index, block in enumerate(blocks):
+        style = BLOCK_STYLES[block.kind]
+        if page:
+            y += style.space_before
+        if style.keep_with_next and page:
+            needed = len(block.lines) * style.line_height + style.space_after
+            if index + 1 < len(blocks):
+                needed += BLOCK_STYLES[blocks[index + 1].kind].line_height
+            if y + needed > geometry.bottom:
+                new_page()
+        for text in block.lines:
+            if page and y + style.line_height > geometry.bottom:
+                new_page()
+            page.append(PlacedLine(block.kind, geometry.left + style.indent, y, geometry.width - style.indent, text))
+            y += style.line_height
+        y += style.space_after
+    return FlowState(tuple(pages), tuple(page), y)
+
+def finish_flow(state: FlowState) -> Tuple[Tuple[PlacedLine, ...], ...]:
+    return state.pages + ((state.page,) if state.page or not state.pages else ())
+
+def emit_pages(pdf, pages: Tuple[Tuple[PlacedLine, ...], ...], family: str):
+    """Write placed lines into pdf, one cell per line"""
+    pdf.set_fill_color(*HEADER_FILL_COLOR)
+    current_font = None
+    for page in pages:
+        pdf.add_page()
+        for line in page:
+            style = BLOCK_STYLES[line.kind]
+            font = (style.font_style, style.size)
+            if font != current_font:
+                pdf.set_font(family, style.font_style, style.size)
+                current_font = font
+            pdf.set_xy(line.x, line.y)
+            pdf.cell(line.width, style.line_height, line.text, fill=style.fill, align=style.align)
+
+def load_metrics(pdf, family: str) -> Dict[str, FontMetrics]:
+    """Metrics of the regular and bold faces of family (already registered on pdf)"""
+    metrics = {}
+    for font_style in {style.font_style for style in BLOCK_STYLES.values()}:
+        pdf.set_font(family, font_style, 10)
+        metrics[font_style] = metrics_for(pdf.current_font)
+    return metrics
+
+def _digest(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+class LayoutCache:
+    """LRU caches of laid-out sections and of the flow state after each run of sections.
+
+    A section's blocks are keyed by a hash of its text (plus fonts and page
+    geometry), so an unchanged section is never wrapped again. The flow state
+    after sections 0..i is keyed by a hash chained over those sections' keys:
+    when an edit touches section i, flowing resumes from the state cached
+    after section i - 1, and only section i onwards is placed again.
+    """
+
+    def __init__(self, max_sections: int = PDF_LAYOUT_CACHE_SECTIONS, max_flows: int = PDF_LAYOUT_CACHE_FLOWS):
+        self.max_sections = max_sections
+        self.max_flows = max_flows
+        self._sections = OrderedDict()
+        self._flows = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"sections_laid_out": 0, "sections_reused": 0, "sections_flowed": 0, "sections_skipped": 0}
+
+    def _get(self, table: OrderedDict, key: str):
+        with self._lock:
+            value = table.get(key)
+            if value is not None:
+                table.move_to_end(key)
+            return value
+
+    def _put(self, table: OrderedDict, key: str, value, limit: int):
+        with self._lock:
+            table[key] = value
+            table.move_to_end(key)
+            while len(table) > limit:
+                table.popitem(last=False)
+
+    def get_section(self, key: str) -> Optional[Tuple[LaidOutBlock, ...]]:
+        return self._get(self._sections, key)
+
+    def put_section(self, key: str, blocks: Tuple[LaidOutBlock, ...]):
+        self._put(self._sections, key, blocks, self.max_sections)
+
+    def get_flow(self, key: str) -> Optional[FlowState]:
+        return self._get(self._flows, key)
+
+    def put_flow(self, key: str, state: FlowState):
+        self._put(self._flows, key, state, self.max_flows)
+
+    def record(self, **counts: int):
+        with self._lock:
+            for name, count in counts.items():
+                self._stats[name] += count
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._stats, sections=len(self._sections), flows=len(self._flows))
+
+    def clear(self):
+        with self._lock:
+            self._sections.clear()
+            self._flows.clear()
+
+layout_cache = LayoutCache()
+
+def layout_document(pdf, cv_content: str, family: str,
+                    cache: Optional[LayoutCache] = None) -> Tuple[Tuple[PlacedLine, ...], ...]:
+    """Pages of placed lines for cv_content on pdf's page size, reusing cached sections and flow"""
+    cache = layout_cache if cache is None else cache
+    geometry = PageGeometry.of(pdf)
+    sections = split_sections(cv_content)
+
+    # Everything besides the text that changes a layout: fonts, sizes and page geometry
+    context = _digest(family, repr(geometry), repr(pdf.k), repr(sorted(BLOCK_STYLES.items())))
+    keys, chain = [], context
+    for index, lines in enumerate(sections):
+        section_key = _digest(context, "preamble" if index == 0 else "section", "\n".join(lines))
+        chain = _digest(chain, section_key)
+        keys.append((section_key, chain))
+
+    # Resume after the longest run of leading sections whose flow is cached
+    start, state = 0, start_flow(geometry)
+    for index in range(len(keys) - 1, -1, -1):
+        cached = cache.get_flow(keys[index][1])
+        if cached is not None:
+            start, state = index + 1, cached
+            break
+
+    metrics = None
+    laid_out = 0
+    for index in range(start, len(sections)):
+        section_key, chain = keys[index]
+        blocks = cache.get_section(section_key)
+        if blocks is None:
+            metrics = metrics or load_metrics(pdf, family)
+            blocks = layout_blocks(section_blocks(sections[index], preamble=index == 0), metrics, geometry, pdf.k)
+            cache.put_section(section_key, blocks)
+            laid_out += 1
+        state = flow_blocks(state, blocks, geometry)
+        cache.put_flow(chain, state)
+    cache.record(sections_laid_out=laid_out, sections_reused=len(sections) - laid_out,
+                 sections_flowed=len(sections) - start, sections_skipped=start)
+    return finish_flow(state)
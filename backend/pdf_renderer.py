@@ -0,0 +1,548 @@
+"""
+PDF renderers for CV documents.
+
+Everything a render needs that does not depend on the CV itself -- parsed
+TrueType fonts, their glyph width tables and the compiled ReportLab
+paragraph styles -- lives in a RendererContext that is built once per
+process (get_renderer_context) and shared by every render in it.
+"""
+
+import copy
+import os
+import re
+import threading
+from datetime import datetime
+from io import BytesIO
+from typing import BinaryIO, Dict, List, Optional
+
+from fastapi import HTTPException
+from fpdf import FPDF, __version__ as FPDF_VERSION
+
+from cv_text import clean_cv_text
+from pdf_layout import layout_document, emit_pages
+
+try:
+    from fontTools import ttLib
+    from fpdf.fonts import SubsetMap, TTFFont
+    HAS_FONT_TEMPLATES = True
+except ImportError:
+    HAS_FONT_TEMPLATES = False
+
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
+    from reportlab.lib.colors import HexColor, black
+    HAS_REPORTLAB = True
+except ImportError:
+    HAS_REPORTLAB = False
+    print("ReportLab not available")
+
+try:
+    import fitz  # PyMuPDF, for PNG page previews
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+
+# Renderer ids are part of every render-cache key: bump the suffix whenever a
+# renderer's output changes so stale cached documents are not served
+ENHANCED_PDF_RENDERER = f"fpdf2-{FPDF_VERSION}/enhanced-v4"
+CV_PDF_RENDERER = "reportlab/cv-v1"
+
+PDF_FONT_DIR = os.getenv("PDF_FONT_DIR", "")
+DEJAVU_FONT_FILES = {"": "DejaVuSansCondensed.ttf", "B": "DejaVuSansCondensed-Bold.ttf"}
+
+def build_cv_styles() -> Dict[str, "ParagraphStyle"]:
+    """Compile the ReportLab paragraph styles used by generate_cv_pdf"""
+    base = getSampleStyleSheet()
+    accent_color = HexColor('#667eea')
+    return {
+        'Header': ParagraphStyle('Header', parent=base['Heading1'], fontSize=24, spaceAfter=8, alignment=TA_CENTER, textColor=accent_color),
+        'Contact': ParagraphStyle('Contact', parent=base['Normal'], fontSize=10, spaceAfter=8, alignment=TA_CENTER, textColor=black),
+        'Section': ParagraphStyle('Section', parent=base['Heading2'], fontSize=16, spaceAfter=6, spaceBefore=8, textColor=accent_color),
+        'JobTitle': ParagraphStyle('JobTitle', parent=base['Heading3'], fontSize=14, spaceAfter=6, textColor=black),
+        'Date': ParagraphStyle('Date', parent=base['Normal'], fontSize=10, spaceAfter=8, textColor=accent_color),
+        'Body': ParagraphStyle('Body', parent=base['Normal'], fontSize=11, spaceAfter=4, alignment=TA_JUSTIFY),
+        'Skill': ParagraphStyle('Skill', parent=base['Normal'], fontSize=10, spaceAfter=3, textColor=accent_color),
+        'Bullet': ParagraphStyle('Bullet', parent=base['Normal'], fontSize=10, spaceAfter=2, leftIndent=20),
+        'Divider': ParagraphStyle('Divider', parent=base['Normal'], fontSize=2, spaceAfter=8, spaceBefore=8, alignment=TA_CENTER, textColor=accent_color),
+        'Underline': ParagraphStyle('Underline', parent=base['Normal'], fontSize=1, spaceAfter=15, spaceBefore=0, alignment=TA_LEFT, textColor=accent_color),
+        'Footer': ParagraphStyle('Footer', parent=base['Normal'], fontSize=10, alignment=TA_CENTER, textColor=accent_color),
+    }
+
+class RendererContext:
+    """Fonts and styles shared by all renders in a process"""
+
+    def __init__(self, font_family: str = 'DejaVu', font_files: Optional[Dict[str, str]] = None,
+                 font_dir: str = PDF_FONT_DIR):
+        self.font_family = font_family
+        self.font_files = {style: os.path.join(font_dir, name)
+                           for style, name in (font_files or DEJAVU_FONT_FILES).items()}
+        self._font_bytes = {}      # style -> raw TTF file, so renders never touch the disk
+        self._font_templates = {}  # style -> TTFFont with glyph widths and cmap already parsed
+        self.fonts_available = self._load_fonts()
+        self.styles = build_cv_styles() if HAS_REPORTLAB else None
+
+    def _load_fonts(self) -> bool:
+        try:
+            template_pdf = FPDF()
+            for style, path in self.font_files.items():
+                with open(path, "rb") as f:
+                    self._font_bytes[style] = f.read()
+                if HAS_FONT_TEMPLATES:
+                    self._font_templates[style] = TTFFont(
+                        template_pdf, path, f"{self.font_family.lower()}{style}", style)
+            return True
+        except Exception as e:
+            print(f"Warning: Could not load {self.font_family} font: {e}. Falling back to Arial.")
+            self._font_bytes.clear()
+            self._font_templates.clear()
+            return False
+
+    def _clone_font(self, pdf: FPDF, style: str) -> "TTFFont":
+        """A per-document copy of a parsed font: width tables are shared, the subset is fresh.
+
+        fpdf2 subsets the fontTools object in place when the document is
+        written, so every document gets its own (lazily loaded) TTFont.
+        """
+        font = copy.copy(self._font_templates[style])
+        font.i = len(pdf.fonts) + 1
+        font.ttfont = ttLib.TTFont(BytesIO(self._font_bytes[style]), recalcTimestamp=False, fontNumber=0, lazy=True)
+        font.missing_glyphs = []
+        reserved = "\x00 \r\n"
+        if pdf.str_alias_nb_pages:
+            reserved += "0123456789" + pdf.str_alias_nb_pages
+        font.subset = SubsetMap(font, [ord(char) for char in reserved])
+        return font
+
+    def install_fonts(self, pdf: FPDF) -> bool:
+        """Register the Unicode fonts on pdf; False when they are unavailable"""
+        if not self.fonts_available:
+            return False
+        for style, path in self.font_files.items():
+            fontkey = f"{self.font_family.lower()}{style}"
+            try:
+                pdf.fonts[fontkey] = self._clone_font(pdf, style)
+            except Exception as e:
+                # Template cloning leans on fpdf2 internals; parsing the file is always correct
+                print(f"Warning: Could not reuse parsed {fontkey} font: {e}")
+                pdf.add_font(self.font_family, style, path)
+        return True
+
+_context: Optional[RendererContext] = None
+_context_lock = threading.Lock()
+
+def get_renderer_context() -> RendererContext:
+    """The process-wide renderer context, built on first use"""
+    global _context
+    if _context is None:
+        with _context_lock:
+            if _context is None:
+                _context = RendererContext()
+    return _context
+
+def rasterize_page(pdf_bytes: bytes, page_number: int, width: int) -> bytes:
+    """PNG of one page (1-based) of a PDF, scaled to width pixels; IndexError if there is no such page"""
+    if not HAS_PYMUPDF:
+        raise RuntimeError("PyMuPDF is not installed")
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        if not 1 <= page_number <= doc.page_count:
+            raise IndexError(f"Page {page_number} does not exist, the document has {doc.page_count}")
+        page = doc[page_number - 1]
+        zoom = width / page.rect.width
+        return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False).tobytes("png")
+    finally:
+        doc.close()
+
+def generate_enhanced_pdf(cv_content: str, out: Optional[BinaryIO] = None) -> BinaryIO:
+    """
+    Generate a well-formatted PDF from CV content with enhanced styling.
+
+    The document is written straight into out (a new BytesIO by default),
+    which is returned rewound.
+    """
+    # Clean the CV content before generating PDF
+    cv_content = clean_cv_text(cv_content)
+
+    pdf = FPDF()
+    # Page breaks are placed by the layout pass
+    pdf.set_auto_page_break(auto=False)
+
+    # Always use a Unicode font for non-ASCII characters (parsed once per process)
+    use_custom_font = get_renderer_context().install_fonts(pdf)
+    if not use_custom_font:
+        # ASCII fallback: replace common non-ASCII characters with ASCII equivalents
+        replacements = {
+            '\u2022': '-',  # bullet
+            '\u2023': '-',  # triangular bullet
+            '\u25E6': '-',  # white bullet
+            '\u2043': '-',  # hyphen bullet
+            '\u2219': '-',  # bullet operator
+            '\u2013': '-',  # en dash
+            '\u2014': '-',  # em dash
+            '\uf0b7': '-',  # another bullet
+        }
+        for uni, ascii_char in replacements.items():
+            cv_content = cv_content.replace(uni, ascii_char)
+        # Also replace any other non-ASCII chars with '?'
+        cv_content = cv_content.encode('ascii', errors='replace').decode('ascii')
+
+    # Measure, wrap and paginate first, then write each line with one cell() call
+    family = get_renderer_context().font_family if use_custom_font else 'Helvetica'
+    emit_pages(pdf, layout_document(pdf, cv_content, family), family)
+
+    # fpdf2 serialises the document into out directly; there is no str/bytes round trip
+    pdf_bytes = out if out is not None else BytesIO()
+    pdf.output(pdf_bytes)
+    pdf_bytes.seek(0)
+    return pdf_bytes
+
+def _write_section_to_pdf(pdf, section_name: str, content_lines: list, use_custom_font: bool = False):
+    """Helper function to write a section to PDF with proper formatting."""
+    # Section header
+    if use_custom_font:
+        pdf.set_font('DejaVu', 'B', 14)
+    else:
+        pdf.set_font('Arial', 'B', 14)
+    pdf.set_fill_color(240, 240, 240)
+    pdf.cell(0, 8, section_name.upper(), ln=True, fill=True)
+    pdf.ln(1)
+    
+    # Section content
+    if use_custom_font:
+        pdf.set_font('DejaVu', '', 10)
+    else:
+        pdf.set_font('Arial', '', 10)
+    
+    for line in content_lines:
+        if line.strip():
+            # Check if this looks like a bullet point or subheading
+            if line.strip().startswith('•') or line.strip().startswith('-'):
+                pdf.cell(10, 6, '', ln=False)  # Indent
+                pdf.cell(0, 6, line.strip(), ln=True)
+            elif re.match(r'^[A-Z][A-Za-z\s]+:', line.strip()):
+                # Subheading (like "Company: ", "Duration: ")
+                if use_custom_font:
+                    pdf.set_font('DejaVu', 'B', 10)
+                else:
+                    pdf.set_font('Arial', 'B', 10)
+                pdf.cell(0, 6, line.strip(), ln=True)
+                if use_custom_font:
+                    pdf.set_font('DejaVu', '', 10)
+                else:
+                    pdf.set_font('Arial', '', 10)
+            else:
+                pdf.cell(0, 6, line.strip(), ln=True)
+    
+    pdf.ln(1)
+
+def generate_cv_pdf(cv_content: str, projects: List[dict], out: Optional[BinaryIO] = None) -> BinaryIO:
+    """Generate a modern, professional PDF using ReportLab, written straight into out (a new BytesIO by default)"""
+    buffer = out if out is not None else BytesIO()
+    try:
+        styles = get_renderer_context().styles
+        if styles is None:
+            raise RuntimeError("ReportLab is not available")
+
+        # Create PDF document
+        doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
+        
+        # Styles are compiled once per process by the renderer context
+        header_style = styles['Header']
+        contact_style = styles['Contact']
+        section_style = styles['Section']
+        job_title_style = styles['JobTitle']
+        date_style = styles['Date']
+        body_style = styles['Body']
+        skill_style = styles['Skill']
+        bullet_style = styles['Bullet']
+        underline_style = styles['Underline']
+        
+        # Build PDF content
+        story = []
+        
+        # Parse CV content
+        lines = cv_content.split('\n')
+        name = "PROFESSIONAL CV"
+        contact_info = []
+        sections = []
+        current_section = []
+        
+        for i, line in enumerate(lines):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('📋') or '─' in line or line.startswith('='):
+                continue
+            if i == 0 and not any(keyword in line.upper() for keyword in ['PROFILE', 'SUMMARY', 'SKILLS', 'EXPERIENCE', 'EDUCATION', 'PROJECTS']):
+                name = line.upper()
+            elif '@' in line or 'http' in line or any(char.isdigit() for char in line):
+                contact_info.append(line)
+            elif (line.isupper() and len(line) > 3) or any(keyword in line.upper() for keyword in ['PROFILE', 'SUMMARY', 'SKILLS', 'EXPERIENCE', 'EDUCATION', 'PROJECTS', 'ABOUT']):
+                if current_section:
+                    sections.append(current_section)
+                current_section = [line]
+            else:
+                if current_section:
+                    current_section.append(line)
+                else:
+                    sections.append([line])
+        
+        if current_section:
+            sections.append(current_section)
+        
+        # Add header
+        story.append(Paragraph(name, header_style))
+        if contact_info:
+            contact_text = " | ".join(contact_info)
+            story.append(Paragraph(contact_text, contact_style))
+        story.append(Spacer(1, 12))
+        
+        # Add divider
+        story.append(Paragraph("_" * 60, styles['Divider']))
+        
+        # Process sections
+        inserted_projects = False
+        for section in sections:
+            if not section:
+                continue
+            section_title = section[0]
+            section_content = section[1:] if len(section) > 1 else []
+            
+            if 'PROJECTS' in section_title.upper():
+                if projects and len(projects) > 0:
+                    # Replace this section with the selected projects
+                    story.append(Paragraph('Projects', section_style))
+                    story.append(Paragraph("_" * 50, underline_style))
+                    
+                    for i, project in enumerate(projects, 1):
+                        title = project.get('title', f'Project {i}')
+                        duration = project.get('duration', '')
+                        description = project.get('description', '')
+                        technologies = project.get('technologies', [])
+                        highlights = project.get('highlights', [])
+                        
+                        story.append(Paragraph(f"{i}. {title}", job_title_style))
+                        if duration:
+                            story.append(Paragraph(f"Duration: {duration}", date_style))
+                        if description:
+                            story.append(Paragraph(f"{description}", body_style))
+                        if technologies:
+                            tech_str = ', '.join(technologies) if isinstance(technologies, list) else str(technologies)
+                            story.append(Paragraph(f"Technologies: {tech_str}", skill_style))
+                        if highlights:
+                            story.append(Paragraph("Key Highlights:", body_style))
+                            if isinstance(highlights, list):
+                                for highlight in highlights:
+                                    story.append(Paragraph(f"• {highlight}", bullet_style))
+                            else:
+                                story.append(Paragraph(f"• {highlights}", bullet_style))
+                        story.append(Spacer(1, 8))
+                    story.append(Spacer(1, 15))
+                    inserted_projects = True
+                # If projects are provided, skip the original section_content
+                continue
+            else:
+                # Add other sections
+                section_text = section_title.replace('_', ' ').title()
+                story.append(Paragraph(section_text, section_style))
+                story.append(Paragraph("_" * 50, underline_style))
+                
+                for line in section_content:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    if line.startswith('•') or line.startswith('-') or line.startswith('*'):
+                        clean_line = line[1:].strip()
+                        if clean_line:
+                            story.append(Paragraph(f"• {clean_line}", bullet_style))
+                    elif line.startswith('1.') or line.startswith('2.') or line.startswith('3.'):
+                        story.append(Paragraph(line, bullet_style))
+                    elif ':' in line and len(line.split(':')) == 2:
+                        key, value = line.split(':', 1)
+                        if key.strip() and value.strip():
+                            story.append(Paragraph(f"<b>{key.strip()}:</b> {value.strip()}", body_style))
+                        else:
+                            story.append(Paragraph(line, body_style))
+                    else:
+                        if line and not line.startswith('Generated on'):
+                            story.append(Paragraph(line, body_style))
+                story.append(Spacer(1, 15))
+        # If there was no projects section but projects are provided, add it at the end
+        if projects and len(projects) > 0 and not inserted_projects:
+            story.append(Paragraph('Projects', section_style))
+            story.append(Paragraph("_" * 50, underline_style))
+            for i, project in enumerate(projects, 1):
+                title = project.get('title', f'Project {i}')
+                duration = project.get('duration', '')
+                description = project.get('description', '')
+                technologies = project.get('technologies', [])
+                highlights = project.get('highlights', [])
+                story.append(Paragraph(f"{i}. {title}", job_title_style))
+                if duration:
+                    story.append(Paragraph(f"Duration: {duration}", date_style))
+                if description:
+                    story.append(Paragraph(f"{description}", body_style))
+                if technologies:
+                    tech_str = ', '.join(technologies) if isinstance(technologies, list) else str(technologies)
+                    story.append(Paragraph(f"Technologies: {tech_str}", skill_style))
+                if highlights:
+                    story.append(Paragraph("Key Highlights:", body_style))
+                    if isinstance(highlights, list):
+                        for highlight in highlights:
+                            story.append(Paragraph(f"• {highlight}", bullet_style))
+                    else:
+                        story.append(Paragraph(f"• {highlights}", bullet_style))
+                story.append(Spacer(1, 8))
+            story.append(Spacer(1, 15))
+        
+        # Add footer
+        story.append(Spacer(1, 40))
+        story.append(Paragraph(f"Generated on {datetime.now().strftime('%B %d, %Y')}", styles['Footer']))
+        
+        # Build PDF
+        doc.build(story)
+        buffer.seek(0)
+        return buffer
+        
+    except Exception as e:
+        print(f"Error generating PDF: {e}")
+        # Fallback to simple text PDF, replacing whatever the failed build wrote
+        buffer.seek(0)
+        buffer.truncate()
+        return generate_cv_text_fallback_enhanced(cv_content, buffer)
+
+def generate_cv_text_fallback_enhanced(cv_content: str, buffer: BytesIO) -> BytesIO:
+    """Generate enhanced formatted text file as PDF fallback"""
+    try:
+        # Parse CV content for better formatting
+        lines = cv_content.split('\n')
+        
+        # Extract name and contact info
+        name = "PROFESSIONAL CV"
+        contact_info = []
+        sections = []
+        current_section = []
+        
+        for i, line in enumerate(lines):
+            line = line.strip()
+            if not line:
+                continue
+                
+            # Skip formatting artifacts
+            if line.startswith('📋') or '─' in line or line.startswith('='):
+                continue
+                
+            # First non-empty line is usually the name
+            if i == 0 and not any(keyword in line.upper() for keyword in ['PROFILE', 'SUMMARY', 'SKILLS', 'EXPERIENCE', 'EDUCATION', 'PROJECTS']):
+                name = line.upper()
+            elif '@' in line or 'http' in line or any(char.isdigit() for char in line):
+                # Contact information
+                contact_info.append(line)
+            elif (line.isupper() and len(line) > 3) or any(keyword in line.upper() for keyword in 
+                ['PROFILE', 'SUMMARY', 'SKILLS', 'EXPERIENCE', 'EDUCATION', 'PROJECTS', 'ABOUT']):
+                # Section header
+                if current_section:
+                    sections.append(current_section)
+                current_section = [line]
+            else:
+                if current_section:
+                    current_section.append(line)
+                else:
+                    sections.append([line])
+        
+        if current_section:
+            sections.append(current_section)
+        
+        # Create enhanced formatted content
+        formatted_content = f"""
+{'='*80}
+{name:^80}
+{'='*80}
+
+"""
+        
+        # Add contact information
+        if contact_info:
+            contact_text = " | ".join(contact_info)
+            formatted_content += f"{contact_text:^80}\n\n"
+        
+        # Add sections with modern formatting
+        for section in sections:
+            if not section:
+                continue
+                
+            section_title = section[0]
+            section_content = section[1:] if len(section) > 1 else []
+            
+            # Format section header
+            formatted_content += f"\n{'-'*80}\n"
+            formatted_content += f"{section_title.replace('_', ' ').title():^80}\n"
+            formatted_content += f"{'-'*80}\n\n"
+            
+            # Format section content
+            for line in section_content:
+                if line.startswith('•') or line.startswith('-') or line.startswith('*'):
+                    formatted_content += f"  {line}\n"
+                elif line.startswith('1.') or line.startswith('2.') or line.startswith('3.'):
+                    formatted_content += f"  {line}\n"
+                elif ':' in line and len(line.split(':')) == 2:
+                    key, value = line.split(':', 1)
+                    if key.strip() and value.strip():
+                        formatted_content += f"  {key.strip()}: {value.strip()}\n"
+                    else:
+                        formatted_content += f"  {line}\n"
+                else:
+                    formatted_content += f"  {line}\n"
+        
+        # Add footer
+        formatted_content += f"\n{'='*80}\n"
+        formatted_content += f"Generated on {datetime.now().strftime('%B %d, %Y')} | CV Updater Platform\n"
+        formatted_content += f"{'='*80}\n"
+        
+        # Save as text content
+        buffer.write(formatted_content.encode('utf-8'))
+        buffer.seek(0)
+        print("✅ Enhanced CV text document generated successfully")
+        return buffer
+            
+    except Exception as e:
+        print(f"Enhanced CV generation error: {e}")
+        # Fallback to simple format
+        return generate_cv_text_fallback(cv_content, buffer)
+
+def generate_cv_text_fallback(cv_content: str, buffer: BytesIO) -> BytesIO:
+    """Generate basic formatted text file as final fallback"""
+    try:
+        # Simple but clean formatting
+        formatted_content = f"""
+CURRICULUM VITAE
+{'='*60}
+
+{cv_content}
+
+{'='*60}
+Generated on {datetime.now().strftime('%B %d, %Y')} | CV Updater Platform
+        """
+        
+        # Save as text content
+        buffer.write(formatted_content.encode('utf-8'))
+        buffer.seek(0)
+        print("✅ Basic CV text document generated successfully")
+        return buffer
+            
+    except Exception as e:
+        print(f"CV generation error: {e}")
+        # Minimal fallback
+        try:
+            buffer = BytesIO()
+            simple_content = f"CURRICULUM VITAE\n\n{cv_content}\n\nGenerated on {datetime.now().strftime('%B %d, %Y')}"
+            buffer.write(simple_content.encode('utf-8'))
+            buffer.seek(0)
+            return buffer
+        except Exception as fallback_error:
+            print(f"Fallback CV generation failed: {fallback_error}")
+            raise HTTPException(status_code=500, detail="Could not generate CV document. Please try again.")
+
@@ -0,0 +1,166 @@
+"""
+Cache for rendered CV documents.
+
+Keys hash everything that determines the output: the cleaned CV text, the
+selected projects and the renderer name/version. Entries live in a memory
+tier and an on-disk tier, each evicting least recently used entries once
+its byte budget is exceeded. A disk hit is promoted back into memory.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional, Tuple
+
+RENDER_CACHE_MEMORY_BYTES = int(os.getenv("RENDER_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+RENDER_CACHE_DISK_BYTES = int(os.getenv("RENDER_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR", os.path.join(tempfile.gettempdir(), "cv_render_cache"))
+
+def render_cache_key(content: str, project_ids: Iterable = (), renderer: str = "", extra=None) -> str:
+    """SHA-256 over the cleaned content, the sorted project ids, the renderer id and any extra inputs"""
+    digest = hashlib.sha256()
+    digest.update(hashlib.sha256(content.encode('utf-8')).digest())
+    digest.update(json.dumps({
+        "projects": sorted(str(project_id) for project_id in project_ids),
+        "renderer": renderer,
+        "extra": extra,
+    }, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+class RenderCache:
+    def __init__(self, directory: Optional[str] = RENDER_CACHE_DIR,
+                 memory_bytes: int = RENDER_CACHE_MEMORY_BYTES, disk_bytes: int = RENDER_CACHE_DISK_BYTES):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()   # key -> bytes, oldest first
+        self._memory_size = 0
+        self._disk = OrderedDict()     # key -> size on disk, oldest first
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        if directory and disk_bytes > 0:
+            os.makedirs(directory, exist_ok=True)
+            self._load_disk_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.bin")
+
+    def _load_disk_index(self):
+        """Pick up entries left by earlier processes, least recently used first"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".bin"):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_size += size
+        self._evict_disk()
+
+    def _remember(self, key: str, data: bytes):
+        if len(data) > self.memory_bytes:
+            return
+        if key in self._memory:
+            self._memory_size -= len(self._memory.pop(key))
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+            self._stats["evictions"] += 1
+
+    def _evict_disk(self):
+        while self._disk_size > self.disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_size -= size
+            self._stats["evictions"] += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def get(self, key: str) -> Tuple[Optional[bytes], str]:
+        """(data, "memory" | "disk") on a hit, (None, "miss") otherwise"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return data, "memory"
+            on_disk = key in self._disk
+        if on_disk:
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+                os.utime(self._path(key))
+            except OSError:
+                data = None
+            with self._lock:
+                if data is not None:
+                    if key in self._disk:
+                        self._disk.move_to_end(key)
+                    self._remember(key, data)
+                    self._stats["disk_hits"] += 1
+                    return data, "disk"
+                size = self._disk.pop(key, None)
+                if size is not None:
+                    self._disk_size -= size
+        with self._lock:
+            self._stats["misses"] += 1
+        return None, "miss"
+
+    def put(self, key: str, data: bytes):
+        with self._lock:
+            self._remember(key, data)
+        if not self.directory or len(data) > self.disk_bytes:
+            return
+        # Write then rename so readers never see a partial file
+        tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"⚠️ Render cache write failed: {e}")
+            return
+        with self._lock:
+            self._disk_size -= self._disk.pop(key, 0)
+            self._disk[key] = len(data)
+            self._disk_size += len(data)
+            self._evict_disk()
+
+    def get_or_render(self, key: str, render: Callable[[], bytes]) -> Tuple[bytes, str]:
+        """Cached bytes for key, rendering and storing them on a miss; empty output is not cached"""
+        data, source = self.get(key)
+        if data is not None:
+            return data, source
+        data = render()
+        if data:
+            self.put(key, data)
+        return data, "miss"
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._stats, memory_entries=len(self._memory), memory_bytes=self._memory_size,
+                        disk_entries=len(self._disk), disk_bytes=self._disk_size)
+
+    def clear(self):
+        with self._lock:
+            keys = list(self._disk)
+            self._memory.clear()
+            self._disk.clear()
+            self._memory_size = self._disk_size = 0
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+render_cache = RenderCache()
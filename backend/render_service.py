@@ -0,0 +1,247 @@
+"""
+PDF rendering in a pool of warm worker processes.
+
+Rendering is pure CPU work that holds the GIL, so running it on the request
+threads serialises concurrent downloads and stalls the event loop. Jobs are
+sent to worker processes instead; each worker builds its renderer context
+(fonts, styles) once when it starts. A job is a render spec:
+
+    {"template": "enhanced" | "cv", "content": str, "projects": [dict, ...]}
+
+and the result is the rendered bytes. Page rasterisation (PNG previews)
+runs on the same workers. The service refuses new jobs once
+RENDER_QUEUE_DEPTH jobs are waiting, gives up on a job after
+RENDER_TIMEOUT_SECONDS, and keeps histograms of queue wait and render time.
+A job still running at its timeout cannot be cancelled, so the worker
+processes are killed and replaced by a fresh pool; jobs that were running
+beside it fail with RenderWorkerLostError and can be retried.
+RENDER_WORKERS=0 renders on the calling thread (useful for debugging).
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+
+from pdf_renderer import get_renderer_context, generate_enhanced_pdf, generate_cv_pdf, rasterize_page
+
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+RENDER_QUEUE_DEPTH = int(os.getenv("RENDER_QUEUE_DEPTH", "16"))
+RENDER_TIMEOUT_SECONDS = float(os.getenv("RENDER_TIMEOUT_SECONDS", "30"))
+
+RENDER_TEMPLATES = ("enhanced", "cv")
+
+# Upper bounds in milliseconds; the last bucket catches everything slower
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+class RenderServiceError(Exception):
+    """Base class for jobs the render service could not complete"""
+
+class RenderQueueFullError(RenderServiceError):
+    """Raised when RENDER_QUEUE_DEPTH jobs are already waiting for a worker"""
+
+class RenderTimeoutError(RenderServiceError):
+    """Raised when a job does not finish within the per-job timeout"""
+
+class RenderWorkerLostError(RenderServiceError):
+    """Raised when a job's worker was killed to recycle a pool with a hung render"""
+
+class Histogram:
+    """Fixed-bucket latency histogram (milliseconds)"""
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms: float):
+        index = next((i for i, bound in enumerate(self.buckets) if value_ms <= bound), len(self.buckets))
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value_ms
+            self._max = max(self._max, value_ms)
+
+    def _percentile(self, pct: float) -> Optional[float]:
+        """Upper bound of the bucket holding the pct-th observation"""
+        if not self._count:
+            return None
+        rank = pct / 100 * self._count
+        seen = 0
+        for bound, count in zip(self.buckets, self._counts):
+            seen += count
+            if seen >= rank:
+                return float(bound)
+        return round(self._max, 2)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            buckets = {f"le_{bound}": count for bound, count in zip(self.buckets, self._counts)}
+            buckets["le_inf"] = self._counts[-1]
+            return {
+                "count": self._count,
+                "mean_ms": round(self._sum / self._count, 2) if self._count else None,
+                "max_ms": round(self._max, 2),
+                "p50_ms": self._percentile(50),
+                "p95_ms": self._percentile(95),
+                "p99_ms": self._percentile(99),
+                "buckets": buckets,
+            }
+
+def _warm_worker():
+    """Process initializer: parse fonts and compile styles before the first job arrives"""
+    get_renderer_context()
+
+def _ping(delay: float = 0.0) -> int:
+    time.sleep(delay)
+    return os.getpid()
+
+def render_spec(spec: Dict) -> bytes:
+    """Render one spec to bytes in the current process"""
+    template = spec.get("template", "enhanced")
+    if template == "enhanced":
+        return generate_enhanced_pdf(spec["content"]).getvalue()
+    if template == "cv":
+        return generate_cv_pdf(spec["content"], spec.get("projects") or []).getvalue()
+    raise ValueError(f"Unknown render template: {template}")
+
+def _timed_call(func, *args) -> Tuple[bytes, float]:
+    started = time.perf_counter()
+    data = func(*args)
+    return data, (time.perf_counter() - started) * 1000
+
+class RenderService:
+    def __init__(self, workers: int = RENDER_WORKERS, queue_depth: int = RENDER_QUEUE_DEPTH,
+                 timeout: float = RENDER_TIMEOUT_SECONDS):
+        self.workers = max(0, workers)
+        self.queue_depth = max(0, queue_depth)
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0  # submitted jobs that have not finished, running or queued
+        self._stats = {"completed": 0, "failed": 0, "rejected": 0, "timed_out": 0, "pools_recycled": 0}
+        self.wait_ms = Histogram()
+        self.render_ms = Histogram()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn rather than fork: the parent holds database connections and threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_worker)
+            return self._executor
+
+    def start(self):
+        """Start every worker now so the first renders do not pay for process start-up"""
+        if self.workers == 0:
+            get_renderer_context()
+            return
+        executor = self._get_executor()
+        # Each ping holds its worker briefly, so the pings spread over (and start) all workers
+        pings = [executor.submit(_ping, 0.2) for _ in range(self.workers)]
+        pids = {future.result() for future in pings}
+        print(f"🖨️ Render service ready ({len(pids)} warm worker processes)")
+
+    def _settle(self, job: dict, outcome: str):
+        """Free a job's in-flight slot exactly once, whichever of the worker or the timeout gets there first"""
+        with self._lock:
+            if job["settled"]:
+                return
+            job["settled"] = True
+            self._in_flight -= 1
+            self._stats[outcome] += 1
+
+    def _job_finished(self, job: dict, future):
+        failed = future.cancelled() or future.exception() is not None
+        self._settle(job, "failed" if failed else "completed")
+
+    def _recycle(self, executor: ProcessPoolExecutor):
+        """Kill the workers of executor (one of them is stuck in a render) and start a fresh pool on next use"""
+        with self._lock:
+            if self._executor is not executor:
+                return  # another timed-out job already replaced this pool
+            self._executor = None
+            self._stats["pools_recycled"] += 1
+        # ProcessPoolExecutor cannot stop a running job; killing its processes is the only way to free them
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            try:
+                process.kill()
+            except Exception:
+                pass
+        executor.shutdown(wait=False, cancel_futures=True)
+        print(f"♻️ Render pool recycled after a job exceeded {self.timeout}s")
+
+    def _run(self, func, *args) -> bytes:
+        """Run func(*args) in a worker process and return its bytes (blocks the calling thread)"""
+        if self.workers == 0:
+            data, elapsed_ms = _timed_call(func, *args)
+            self.render_ms.observe(elapsed_ms)
+            with self._lock:
+                self._stats["completed"] += 1
+            return data
+
+        executor = self._get_executor()
+        with self._lock:
+            if self._in_flight >= self.workers + self.queue_depth:
+                self._stats["rejected"] += 1
+                raise RenderQueueFullError(
+                    f"{self._in_flight} renders in flight, queue limit is {self.queue_depth}")
+            self._in_flight += 1
+        job = {"settled": False}
+        submitted = time.perf_counter()
+        try:
+            future = executor.submit(_timed_call, func, *args)
+        except Exception:
+            self._settle(job, "failed")
+            raise
+        # The slot is freed when the worker is done, or when the job times out and its worker is killed
+        future.add_done_callback(lambda done: self._job_finished(job, done))
+
+        try:
+            data, elapsed_ms = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            if not future.cancel():
+                # Already running: the only way to get the worker back is to kill it
+                self._recycle(executor)
+            with self._lock:
+                self._stats["timed_out"] += 1
+            self._settle(job, "failed")
+            raise RenderTimeoutError(f"Render did not finish within {self.timeout}s")
+        except BrokenProcessPool as e:
+            raise RenderWorkerLostError(f"Render worker was stopped: {e}")
+        total_ms = (time.perf_counter() - submitted) * 1000
+        self.render_ms.observe(elapsed_ms)
+        self.wait_ms.observe(max(0.0, total_ms - elapsed_ms))
+        return data
+
+    def render(self, spec: Dict) -> bytes:
+        """Render spec in a worker process and return the document bytes"""
+        if spec.get("template", "enhanced") not in RENDER_TEMPLATES:
+            raise ValueError(f"Unknown render template: {spec.get('template')}")
+        return self._run(render_spec, spec)
+
+    def rasterize(self, pdf_bytes: bytes, page_number: int, width: int) -> bytes:
+        """PNG of one page of a rendered PDF, scaled to width pixels, made in a worker process"""
+        return self._run(rasterize_page, pdf_bytes, page_number, width)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            state = dict(self._stats, workers=self.workers, queue_depth=self.queue_depth,
+                         timeout_seconds=self.timeout, in_flight=self._in_flight,
+                         queued=max(0, self._in_flight - self.workers))
+        return {**state, "wait_ms": self.wait_ms.snapshot(), "render_ms": self.render_ms.snapshot()}
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+render_service = RenderService()
@@ -0,0 +1,318 @@
+"""
+Async data access for CVs, projects, chat messages and CV updates.
+
+Every query runs on a dedicated DB thread pool, so awaiting a repository
+method never blocks the event loop on sqlite3 calls or WAL lock waits.
+All queries are scoped to the requesting user (tenancy.current_user_id()).
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Optional, Dict
+
+from db import get_db_cursor_context
+from db_pool import DB_POOL_SIZE, dialect_of
+from cv_versions import record_cv_version, list_cv_versions, get_cv_version_content
+from tenancy import current_user_id
+
+# One thread per pooled connection: more would only queue on the pool
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", str(DB_POOL_SIZE)))
+
+_db_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+
+def _in_transaction(func, *args):
+    with get_db_cursor_context() as (cursor, conn):
+        return func(cursor, *args)
+
+async def run_db(func, *args):
+    """Run func(cursor, *args) in one committed transaction on the DB executor"""
+    loop = asyncio.get_running_loop()
+    # Executor threads do not inherit context variables; carry the request's user over
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_db_executor, partial(context.run, _in_transaction, func, *args))
+
+def _owns_cv(cursor, cv_id: int) -> bool:
+    cursor.execute("SELECT 1 FROM cvs WHERE id = ? AND user_id = ?", (cv_id, current_user_id()))
+    return cursor.fetchone() is not None
+
+class CVRepository:
+    async def count(self) -> int:
+        def query(cursor):
+            cursor.execute("SELECT COUNT(*) FROM cvs WHERE user_id = ?", (current_user_id(),))
+            return cursor.fetchone()[0]
+        return await run_db(query)
+
+    async def get_current(self) -> Optional[tuple]:
+        """(filename, current_content, updated_at) of the active CV, else the latest one"""
+        def query(cursor):
+            user_id = current_user_id()
+            cursor.execute("SELECT filename, current_content, updated_at FROM cvs WHERE user_id = ? AND is_active = TRUE LIMIT 1",
+                           (user_id,))
+            row = cursor.fetchone()
+            if not row:
+                cursor.execute("SELECT filename, current_content, updated_at FROM cvs WHERE user_id = ? ORDER BY updated_at DESC LIMIT 1",
+                               (user_id,))
+                row = cursor.fetchone()
+            return row
+        return await run_db(query)
+
+    async def list(self) -> List[Dict]:
+        def query(cursor):
+            cursor.execute('''SELECT id, title, filename, created_at, updated_at, is_active
+                             FROM cvs WHERE user_id = ? ORDER BY updated_at DESC''', (current_user_id(),))
+            return [
+                {"id": cv_id, "title": title, "filename": filename, "created_at": created_at,
+                 "updated_at": updated_at, "is_active": bool(is_active)}
+                for cv_id, title, filename, created_at, updated_at, is_active in cursor.fetchall()
+            ]
+        return await run_db(query)
+
+    async def list_all_tenants(self) -> List[Dict]:
+        """id, title and owner of every CV in the table, grouped by owner (admin exports only)"""
+        def query(cursor):
+            cursor.execute("SELECT id, title, user_id FROM cvs ORDER BY user_id, id")
+            return [{"id": cv_id, "title": title, "user_id": user_id} for cv_id, title, user_id in cursor.fetchall()]
+        return await run_db(query)
+
+    async def list_contents(self) -> List[Dict]:
+        def query(cursor):
+            cursor.execute('''SELECT id, filename, current_content, updated_at, is_active
+                             FROM cvs WHERE user_id = ? ORDER BY updated_at DESC''', (current_user_id(),))
+            return [
+                {"id": cv_id, "filename": filename, "current_content": content,
+                 "updated_at": updated_at, "is_active": bool(is_active)}
+                for cv_id, filename, content, updated_at, is_active in cursor.fetchall()
+            ]
+        return await run_db(query)
+
+    async def get(self, cv_id: int) -> Optional[Dict]:
+        def query(cursor):
+            cursor.execute('''SELECT id, title, filename, current_content, created_at, updated_at, is_active
+                             FROM cvs WHERE id = ? AND user_id = ?''', (cv_id, current_user_id()))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            cv_id_, title, filename, content, created_at, updated_at, is_active = row
+            return {"id": cv_id_, "title": title, "filename": filename, "content": content,
+                    "created_at": created_at, "updated_at": updated_at, "is_active": bool(is_active)}
+        return await run_db(query)
+
+    async def update(self, cv_id: int, title: Optional[str] = None, content: Optional[str] = None) -> bool:
+        """Update the given fields; False if the CV does not exist"""
+        def query(cursor):
+            if not _owns_cv(cursor, cv_id):
+                return False
+            fields, params = [], []
+            if title is not None:
+                fields.append("title = ?")
+                params.append(title)
+            if content is not None:
+                fields.append("current_content = ?")
+                params.append(content)
+            if fields:
+                fields.append("updated_at = CURRENT_TIMESTAMP")
+                cursor.execute(f"UPDATE cvs SET {', '.join(fields)} WHERE id = ?", params + [cv_id])
+            if content is not None:
+                record_cv_version(cursor, cv_id, content, "Edited")
+            return True
+        return await run_db(query)
+
+    async def delete(self, cv_id: int) -> bool:
+        """Delete a CV, promoting the user's most recent one if it was active"""
+        def query(cursor):
+            user_id = current_user_id()
+            cursor.execute("SELECT is_active FROM cvs WHERE id = ? AND user_id = ?", (cv_id, user_id))
+            row = cursor.fetchone()
+            if not row:
+                return False
+            cursor.execute("DELETE FROM cvs WHERE id = ?", (cv_id,))
+            if row[0]:
+                cursor.execute('''UPDATE cvs SET is_active = TRUE
+                                 WHERE id = (SELECT id FROM cvs WHERE user_id = ? ORDER BY updated_at DESC LIMIT 1)''',
+                               (user_id,))
+            return True
+        return await run_db(query)
+
+    async def activate(self, cv_id: int) -> bool:
+        def query(cursor):
+            if not _owns_cv(cursor, cv_id):
+                return False
+            cursor.execute("UPDATE cvs SET is_active = FALSE WHERE user_id = ?", (current_user_id(),))
+            cursor.execute("UPDATE cvs SET is_active = TRUE WHERE id = ?", (cv_id,))
+            return True
+        return await run_db(query)
+
+    async def versions(self, cv_id: int) -> Optional[List[Dict]]:
+        """Version metadata, newest first; None if the CV does not exist"""
+        def query(cursor):
+            if not _owns_cv(cursor, cv_id):
+                return None
+            return list_cv_versions(cursor, cv_id)
+        return await run_db(query)
+
+    async def version_content(self, cv_id: int, version_number: int) -> Optional[str]:
+        def query(cursor):
+            if not _owns_cv(cursor, cv_id):
+                return None
+            return get_cv_version_content(cursor, cv_id, version_number)
+        return await run_db(query)
+
+def insert_projects(cursor, projects: List[Dict]) -> List[int]:
+    """Insert projects with one batched statement in the caller's transaction; returns their ids in order"""
+    if not projects:
+        return []
+    rows = [json.dumps(project) for project in projects]
+    user_id = current_user_id()
+    if dialect_of(cursor) == "postgres":
+        # RETURNING has no defined order: ids are drawn in ordinality order, so sorting them restores the input's
+        cursor.execute('''WITH inserted AS (
+                              INSERT INTO manual_projects (project_data, user_id)
+                              SELECT project.data, ? FROM unnest(?::text[]) WITH ORDINALITY AS project(data, ordinality)
+                              ORDER BY project.ordinality
+                              RETURNING id)
+                          SELECT id FROM inserted ORDER BY id''', (user_id, rows))
+        return [row[0] for row in cursor.fetchall()]
+    cursor.executemany("INSERT INTO manual_projects (project_data, user_id) VALUES (?, ?)",
+                       [(row, user_id) for row in rows])
+    # The transaction holds the write lock, so the AUTOINCREMENT ids are consecutive
+    cursor.execute("SELECT last_insert_rowid()")
+    last_id = cursor.fetchone()[0]
+    return list(range(last_id - len(rows) + 1, last_id + 1))
+
+def _project_listing_sql(dialect: str) -> str:
+    """The current user's projects as one JSON document, newest first.
+
+    The generated title column is NULL for malformed rows, and reading it from
+    idx_manual_projects_user_listing replaces per-row JSON validation. The row id is
+    appended to each stored object's text as its last key (overriding a stored "id" the
+    way json_set did), so no row is parsed, in Python or in SQL.
+    """
+    if dialect == "postgres":
+        aggregate = "string_agg(project, ',' ORDER BY created_at DESC)"
+    else:
+        aggregate = "group_concat(project, ',')"
+    return f'''SELECT '{{"projects": [' || COALESCE({aggregate}, '') || '], "total_count": ' || COUNT(*) || '}}'
+               FROM (SELECT substr(rtrim(project_data), 1, length(rtrim(project_data)) - 1)
+                            || ', "id": ' || id || '}}' AS project, created_at
+                     FROM manual_projects WHERE user_id = ? AND title IS NOT NULL
+                     ORDER BY created_at DESC) AS p'''
+
+class ProjectRepository:
+    async def count(self) -> int:
+        def query(cursor):
+            cursor.execute("SELECT COUNT(*) FROM manual_projects WHERE user_id = ?", (current_user_id(),))
+            return cursor.fetchone()[0]
+        return await run_db(query)
+
+    async def list(self) -> List[Dict]:
+        """All projects, newest first, with the row id merged into the stored JSON"""
+        def query(cursor):
+            cursor.execute("SELECT id, project_data FROM manual_projects WHERE user_id = ? ORDER BY created_at DESC",
+                           (current_user_id(),))
+            projects = []
+            for project_id, project_json in cursor.fetchall():
+                try:
+                    project_data = json.loads(project_json)
+                    project_data['id'] = project_id
+                    projects.append(project_data)
+                except (TypeError, ValueError):
+                    pass
+            return projects
+        return await run_db(query)
+
+    async def list_json(self) -> str:
+        """The {"projects": [...], "total_count": n} listing assembled by the database itself"""
+        def query(cursor):
+            cursor.execute(_project_listing_sql(dialect_of(cursor)), (current_user_id(),))
+            return cursor.fetchone()[0]
+        return await run_db(query)
+
+    async def get_many(self, project_ids: List[int]) -> Dict[int, str]:
+        """Raw project_data JSON keyed by id for the ids that exist"""
+        if not project_ids:
+            return {}
+        def query(cursor):
+            placeholders = ",".join("?" * len(project_ids))
+            cursor.execute(f"SELECT id, project_data FROM manual_projects WHERE user_id = ? AND id IN ({placeholders})",
+                           [current_user_id()] + list(project_ids))
+            return dict(cursor.fetchall())
+        return await run_db(query)
+
+    async def update(self, project_id: int, project_data: Dict) -> bool:
+        def query(cursor):
+            cursor.execute("UPDATE manual_projects SET project_data = ? WHERE id = ? AND user_id = ?",
+                           (json.dumps(project_data), project_id, current_user_id()))
+            return cursor.rowcount > 0
+        return await run_db(query)
+
+    async def delete(self, project_id: int) -> bool:
+        def query(cursor):
+            cursor.execute("DELETE FROM manual_projects WHERE id = ? AND user_id = ?", (project_id, current_user_id()))
+            return cursor.rowcount > 0
+        return await run_db(query)
+
+    async def clear(self):
+        def query(cursor):
+            cursor.execute("DELETE FROM manual_projects WHERE user_id = ?", (current_user_id(),))
+        await run_db(query)
+
+class ChatMessageRepository:
+    async def page(self, before_id: Optional[int], limit: int) -> List[tuple]:
+        """Up to `limit` messages older than before_id (or the newest), newest first"""
+        def query(cursor):
+            if before_id is None:
+                cursor.execute('''SELECT id, message, message_type, created_at FROM chat_messages
+                                 WHERE user_id = ? ORDER BY id DESC LIMIT ?''', (current_user_id(), limit))
+            else:
+                cursor.execute('''SELECT id, message, message_type, created_at FROM chat_messages
+                                 WHERE user_id = ? AND id < ? ORDER BY id DESC LIMIT ?''',
+                               (current_user_id(), before_id, limit))
+            return cursor.fetchall()
+        return await run_db(query)
+
+    async def after(self, after_id: int, limit: int) -> List[tuple]:
+        """Up to `limit` messages with id > after_id, oldest first (export batches)"""
+        def query(cursor):
+            cursor.execute('''SELECT id, message, message_type, created_at FROM chat_messages
+                             WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?''', (current_user_id(), after_id, limit))
+            return cursor.fetchall()
+        return await run_db(query)
+
+    async def add(self, message: str, message_type: str) -> int:
+        def query(cursor):
+            cursor.execute("INSERT INTO chat_messages (message, message_type, user_id) VALUES (?, ?, ?)",
+                           (message, message_type, current_user_id()))
+            return cursor.lastrowid
+        return await run_db(query)
+
+class CVUpdateRepository:
+    async def add(self, update_type: str, content: str, original_message: str) -> int:
+        def query(cursor):
+            cursor.execute('''INSERT INTO cv_updates (update_type, content, original_message, user_id)
+                             VALUES (?, ?, ?, ?)''', (update_type, content, original_message, current_user_id()))
+            return cursor.lastrowid
+        return await run_db(query)
+
+    async def pending(self) -> List[tuple]:
+        """(update_type, content) of unprocessed updates, oldest first"""
+        def query(cursor):
+            cursor.execute('''SELECT update_type, content FROM cv_updates
+                             WHERE user_id = ? AND processed = FALSE ORDER BY created_at''', (current_user_id(),))
+            return cursor.fetchall()
+        return await run_db(query)
+
+    async def mark_processed(self) -> int:
+        def query(cursor):
+            cursor.execute("UPDATE cv_updates SET processed = TRUE WHERE user_id = ? AND processed = FALSE",
+                           (current_user_id(),))
+            return cursor.rowcount
+        return await run_db(query)
+
+cv_repository = CVRepository()
+project_repository = ProjectRepository()
+chat_message_repository = ChatMessageRepository()
+cv_update_repository = CVUpdateRepository()
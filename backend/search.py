@@ -0,0 +1,94 @@
+"""
+Full-text search over CVs, projects and chat history (FTS5 tables from migration 5,
+or GIN-indexed tsvector expressions on PostgreSQL).
+
+Each scope is ranked by its own table's bm25 / ts_rank, and those scores do not
+compare across tables, so results come back grouped by scope with up to `limit`
+hits each rather than merged into a single ranking.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from db_pool import dialect_of
+from tenancy import current_user_id
+
+SNIPPET_TOKENS = 12
+
+# scope -> (fts table, source table, title expression, bm25 column weights)
+SEARCH_SCOPES = {
+    "cvs": ("cvs_fts", "cvs", "src.title", (5.0, 1.0)),
+    "projects": ("manual_projects_fts", "manual_projects", "src.title", (5.0, 1.0)),
+    "chat": ("chat_messages_fts", "chat_messages", "src.message_type", (1.0,)),
+}
+
+# PostgreSQL: scope -> (document tsvector, headline text). Migration 5 indexes the exact
+# same expressions, so keep the two in sync. Titles get weight A, bodies D; ts_rank
+# scores them 5:1 like the bm25 weights above.
+PG_RANK_WEIGHTS = "{0.2, 0.2, 0.2, 1.0}"
+PG_SEARCH_DOCUMENTS = {
+    "cvs": ("setweight(to_tsvector('english', title), 'A') || "
+            "setweight(to_tsvector('english', current_content), 'D')",
+            "current_content"),
+    "projects": ("setweight(to_tsvector('english', COALESCE(title, '')), 'A') || "
+                 "setweight(jsonb_to_tsvector('english', COALESCE(try_jsonb(project_data), '{}'), '[\"string\"]'), 'D')",
+                 "project_data"),
+    "chat": ("setweight(to_tsvector('english', message), 'D')", "message"),
+}
+
+def build_match_query(text: str) -> Optional[str]:
+    """Turn free text into a safe FTS5 query: every word must match, the last one as a prefix"""
+    words = re.findall(r"\w+", text or "")
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+def build_tsquery(text: str) -> Optional[str]:
+    """The PostgreSQL to_tsquery equivalent of build_match_query"""
+    words = re.findall(r"\w+", text or "")
+    if not words:
+        return None
+    return " & ".join(words[:-1] + [words[-1] + ":*"])
+
+def _search_postgres(cursor, text: str, scopes: List[str], limit: int) -> List[Dict]:
+    query = build_tsquery(text)
+    if not query:
+        return []
+    results = []
+    for scope in scopes:
+        _, source, title, _ = SEARCH_SCOPES[scope]
+        document, body = PG_SEARCH_DOCUMENTS[scope]
+        cursor.execute(f'''SELECT src.id, {title},
+                                  ts_headline('english', {body}, query, 'StartSel=<mark>, StopSel=</mark>, MaxWords={SNIPPET_TOKENS}, MinWords=3'),
+                                  ts_rank('{PG_RANK_WEIGHTS}', {document}, query)
+                           FROM {source} AS src, to_tsquery('english', ?) AS query
+                           WHERE src.user_id = ? AND {document} @@ query
+                           ORDER BY 4 DESC LIMIT ?''', (query, current_user_id(), limit))
+        for row_id, row_title, snippet, score in cursor.fetchall():
+            results.append({"type": scope, "id": row_id, "title": row_title, "snippet": snippet, "score": score})
+    return results
+
+def search(cursor, text: str, scopes: List[str] = None, limit: int = 20) -> List[Dict]:
+    """The current user's hits for each requested scope in turn, up to limit per scope and best first
+    within it (score only compares hits of the same type)"""
+    if dialect_of(cursor) == "postgres":
+        return _search_postgres(cursor, text, scopes or list(SEARCH_SCOPES), limit)
+    match = build_match_query(text)
+    if not match:
+        return []
+
+    results = []
+    for scope in scopes or list(SEARCH_SCOPES):
+        fts, source, title, weights = SEARCH_SCOPES[scope]
+        rank = f"bm25({fts}, {', '.join(str(w) for w in weights)})"
+        cursor.execute(f'''SELECT src.id, {title}, snippet({fts}, -1, '<mark>', '</mark>', '…', {SNIPPET_TOKENS}), {rank}
+                           FROM {fts} JOIN {source} AS src ON src.id = {fts}.rowid
+                           WHERE {fts} MATCH ? AND src.user_id = ? ORDER BY {rank} LIMIT ?''',
+                       (match, current_user_id(), limit))
+        for row_id, row_title, snippet, score in cursor.fetchall():
+            # bm25() is lower-is-better; flip it so callers can sort descending
+            results.append({"type": scope, "id": row_id, "title": row_title,
+                            "snippet": snippet, "score": -score})
+    return results
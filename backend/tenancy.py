@@ -0,0 +1,137 @@
+"""
+Per-user data partitioning.
+
+Every row of cvs, manual_projects, chat_messages and cv_updates carries a
+user_id. The HTTP middleware in main_enhanced authenticates the request's
+Supabase access token (Authorization: Bearer <jwt>, HS256-signed with
+SUPABASE_JWT_SECRET) and runs the request as the token's subject; queries
+read it back with current_user_id(). Client-supplied user ids are never
+trusted.
+
+Requests without a token are rejected with 401 when AUTH_REQUIRED is true,
+which is the default once SUPABASE_JWT_SECRET is set. Without a secret (a
+local single-user install) they share DEFAULT_USER_ID, which is also the
+owner of every row that existed before the column was added.
+
+Users listed in ADMIN_USER_IDS (comma-separated token subjects) may use the
+endpoints that read across every tenant.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DEFAULT_USER_ID = "default"
+# Supabase signs the tokens of signed-in users for this audience
+AUTH_AUDIENCE = "authenticated"
+
+_VALID_USER_ID = re.compile(r"^[A-Za-z0-9_.@:-]{1,128}$")
+
+_current_user_id: ContextVar[str] = ContextVar("current_user_id", default=DEFAULT_USER_ID)
+
+class AuthenticationError(Exception):
+    """The request carries no valid access token"""
+
+def _jwt_secret() -> str:
+    # Read per call: .env is loaded after this module is imported
+    return os.getenv("SUPABASE_JWT_SECRET", "")
+
+def auth_required() -> bool:
+    default = "true" if _jwt_secret() else "false"
+    return os.getenv("AUTH_REQUIRED", default).lower() == "true"
+
+def is_admin(user_id: str) -> bool:
+    admins = {admin.strip() for admin in os.getenv("ADMIN_USER_IDS", "").split(",")}
+    return user_id != DEFAULT_USER_ID and user_id in admins
+
+def parse_user_id(user_id) -> str:
+    """DEFAULT_USER_ID when absent; ValueError for ids that are not 1-128 URL-safe characters"""
+    user_id = (user_id or "").strip()
+    if not user_id:
+        return DEFAULT_USER_ID
+    if not _VALID_USER_ID.match(user_id):
+        raise ValueError("Invalid user id")
+    return user_id
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+def _sign(signing_input: str, secret: str) -> str:
+    return _b64encode(hmac.new(secret.encode(), signing_input.encode("ascii"), hashlib.sha256).digest())
+
+def issue_token(user_id: str, expires_in: int = 3600, secret: str = None) -> str:
+    """An access token for user_id in the format Supabase issues (scripts and tests)"""
+    secret = secret or _jwt_secret()
+    if not secret:
+        raise AuthenticationError("SUPABASE_JWT_SECRET is not set")
+    now = int(time.time())
+    header = _b64encode(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+    payload = _b64encode(json.dumps({"sub": parse_user_id(user_id), "aud": AUTH_AUDIENCE, "role": AUTH_AUDIENCE,
+                                     "iat": now, "exp": now + expires_in}).encode())
+    return f"{header}.{payload}.{_sign(f'{header}.{payload}', secret)}"
+
+def auth_headers(user_id: str) -> dict:
+    """Request headers that authenticate as user_id"""
+    return {"Authorization": f"Bearer {issue_token(user_id)}"}
+
+def verify_token(token: str, secret: str = None) -> str:
+    """The user id (sub claim) of a valid, unexpired HS256 token; AuthenticationError otherwise"""
+    secret = secret or _jwt_secret()
+    if not secret:
+        raise AuthenticationError("Authentication is not configured")
+    try:
+        header, payload, signature = token.split(".")
+        if json.loads(_b64decode(header)).get("alg") != "HS256":
+            raise AuthenticationError("Unsupported token algorithm")
+        if not hmac.compare_digest(signature, _sign(f"{header}.{payload}", secret)):
+            raise AuthenticationError("Invalid token signature")
+        claims = json.loads(_b64decode(payload))
+    except AuthenticationError:
+        raise
+    except Exception:
+        raise AuthenticationError("Malformed token")
+
+    if not isinstance(claims.get("exp"), (int, float)) or claims["exp"] <= time.time():
+        raise AuthenticationError("Token has expired")
+    audience = claims.get("aud")
+    if AUTH_AUDIENCE not in (audience if isinstance(audience, list) else [audience]):
+        raise AuthenticationError("Token is not for a signed-in user")
+    try:
+        return parse_user_id(claims.get("sub"))
+    except ValueError:
+        raise AuthenticationError("Token has an invalid subject")
+
+def authenticate(authorization) -> str:
+    """User id for an Authorization header value; AuthenticationError if it cannot be trusted"""
+    scheme, _, token = (authorization or "").strip().partition(" ")
+    if scheme.lower() == "bearer" and token.strip():
+        user_id = verify_token(token.strip())
+        if user_id == DEFAULT_USER_ID:
+            raise AuthenticationError("Token has an invalid subject")
+        return user_id
+    if authorization:
+        raise AuthenticationError("Expected a Bearer token")
+    if auth_required():
+        raise AuthenticationError("Authentication required")
+    return DEFAULT_USER_ID
+
+def current_user_id() -> str:
+    return _current_user_id.get()
+
+@contextmanager
+def user_scope(user_id: str):
+    """Run the block as user_id (requests, background jobs and tests)"""
+    token = _current_user_id.set(parse_user_id(user_id))
+    try:
+        yield
+    finally:
+        _current_user_id.reset(token)
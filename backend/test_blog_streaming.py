@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test Server-Sent Events streaming for LinkedIn blog generation
+"""
+
+import sys
+import os
+import json
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fastapi.testclient import TestClient
+import main_enhanced
+from main_enhanced import app, _iter_text_chunks, generate_linkedin_blog_fallback
+
+client = TestClient(app)
+
+def parse_sse(body: str) -> list:
+    """Parse an SSE body into (event, data) tuples"""
+    events = []
+    for frame in body.strip().split('\n\n'):
+        event, data = None, None
+        for line in frame.split('\n'):
+            if line.startswith('event: '):
+                event = line[len('event: '):]
+            elif line.startswith('data: '):
+                data = json.loads(line[len('data: '):])
+        events.append((event, data))
+    return events
+
+def get_any_project() -> dict:
+    projects = client.get("/projects/").json()["projects"]
+    if not projects:
+        client.post("/projects/create", json={"title": "Streaming Demo", "technologies": ["Python"]})
+        projects = client.get("/projects/").json()["projects"]
+    return projects[0]
+
+def test_text_chunks_roundtrip():
+    """Chunking must not lose or reorder any characters"""
+    text = "🚀 Excited to share\n\nmy   latest project!\n#Python"
+    chunks = list(_iter_text_chunks(text, 2))
+    assert len(chunks) > 1
+    assert ''.join(chunks) == text
+
+def test_project_blog_stream_fallback(monkeypatch):
+    """Without an OpenAI client the fallback post is streamed in chunks"""
+    monkeypatch.setattr(main_enhanced, "openai_client", None)
+    project = get_any_project()
+
+    response = client.post(f"/projects/{project['id']}/blog/stream")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = parse_sse(response.text)
+    names = [name for name, _ in events]
+    print(f"📡 Received {len(events)} events")
+    assert names[0] == "start"
+    assert names[-1] == "done"
+    assert names.count("token") > 1
+
+    streamed = ''.join(data["delta"] for name, data in events if name == "token")
+    expected = generate_linkedin_blog_fallback({k: v for k, v in project.items() if k != 'id'})
+    assert streamed == expected
+    assert events[-1][1]["blog_content"] == expected.strip()
+
+def test_project_blog_stream_unknown_project():
+    response = client.post("/projects/999999999/blog/stream")
+    assert response.status_code == 404
+
+def test_blog_generate_stream_by_title(monkeypatch):
+    monkeypatch.setattr(main_enhanced, "openai_client", None)
+    project = get_any_project()
+
+    response = client.post("/blog/generate/stream", json={"project_title": project["title"]})
+    assert response.status_code == 200
+    events = parse_sse(response.text)
+    assert events[0][1]["project_title"] == project["title"]
+    assert events[-1][0] == "done"
+
+def test_blog_batch_concurrent_with_error_isolation(monkeypatch):
+    """Batch generation runs projects concurrently and isolates per-project failures"""
+    monkeypatch.setattr(main_enhanced, "openai_client", None)
+
+    def slow_blog(project_data):
+        time.sleep(0.2)
+        if project_data.get('title') == 'Explodes':
+            raise RuntimeError("model exploded")
+        return f"Post about {project_data.get('title')}"
+
+    ids = []
+    for title in ("Batch One", "Batch Two", "Explodes", "Batch Four"):
+        ids.append(client.post("/projects/create", json={"title": title}).json()["project"]["id"])
+
+    monkeypatch.setattr(main_enhanced, "generate_linkedin_blog", slow_blog)
+    try:
+        started = time.perf_counter()
+        response = client.post("/projects/blog/batch", json={"project_ids": ids + [999999999], "max_concurrency": 4})
+        elapsed = time.perf_counter() - started
+    finally:
+        for project_id in ids:
+            client.delete(f"/projects/{project_id}")
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.strip().split('\n')]
+    results = {item["project_id"]: item for item in lines if item["type"] == "result"}
+    summary = lines[-1]
+    print(f"📦 Batch of {len(results)} finished in {elapsed:.2f}s: {summary}")
+
+    assert elapsed < 0.2 * 4 * 0.75, "projects must be generated concurrently"
+    assert results[ids[0]]["blog_content"] == "Post about Batch One"
+    assert results[ids[2]]["status"] == "error" and "exploded" in results[ids[2]]["error"]
+    assert results[999999999]["error"] == "Project not found"
+    assert summary == {"type": "summary", "requested": 5, "succeeded": 3, "failed": 2, "max_concurrency": 4}
+
+if __name__ == "__main__":
+    test_text_chunks_roundtrip()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_project_blog_stream_fallback(monkeypatch)
+    test_project_blog_stream_unknown_project()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_blog_generate_stream_by_title(monkeypatch)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_blog_batch_concurrent_with_error_isolation(monkeypatch)
+    print("✅ All blog streaming tests passed")
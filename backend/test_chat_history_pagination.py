@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test keyset-paginated chat history and the NDJSON export
+"""
+
+import sys
+import os
+import json
+import asyncio
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+import main_enhanced
+from repositories import run_db
+
+client = TestClient(main_enhanced.app)
+
+def seed_messages(count):
+    def insert(cursor):
+        cursor.executemany("INSERT INTO chat_messages (message, message_type) VALUES (?, ?)",
+                           [(f"page test {i}", "user") for i in range(count)])
+        cursor.execute("SELECT MAX(id) FROM chat_messages")
+        return cursor.fetchone()[0]
+    return asyncio.run(run_db(insert))
+
+def test_pages_walk_backwards_without_gaps():
+    newest_id = seed_messages(25)
+
+    first = client.get("/chat/history/", params={"limit": 10})
+    assert first.status_code == 200
+    page = first.json()
+    assert isinstance(page, list), "frontend expects a plain list"
+    assert [m["id"] for m in page] == list(range(newest_id - 9, newest_id + 1)), "oldest first within a page"
+
+    seen = [m["id"] for m in page]
+    cursor = first.headers["X-Next-Before-Id"]
+    for _ in range(2):
+        response = client.get("/chat/history/", params={"before_id": cursor, "limit": 10})
+        ids = [m["id"] for m in response.json()]
+        assert ids and max(ids) < min(seen)
+        seen = ids + seen
+        cursor = response.headers.get("X-Next-Before-Id")
+    assert seen[-25:] == list(range(newest_id - 24, newest_id + 1))
+    print(f"📜 Walked {len(seen)} messages in pages of 10")
+
+def test_last_page_has_no_cursor():
+    response = client.get("/chat/history/", params={"before_id": 1, "limit": 10})
+    assert response.json() == []
+    assert "X-Next-Before-Id" not in response.headers
+
+def test_ndjson_export_streams_everything():
+    newest_id = seed_messages(3)
+    response = client.get("/chat/history/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    ids = [row["id"] for row in rows]
+    assert ids == sorted(ids)
+    assert ids[-1] == newest_id
+    assert rows[-1]["message"] == "page test 2"
+
+if __name__ == "__main__":
+    test_pages_walk_backwards_without_gaps()
+    test_last_page_has_no_cursor()
+    test_ndjson_export_streams_everything()
+    print("✅ All chat history pagination tests passed")
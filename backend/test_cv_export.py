@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test the streaming ZIP export of stored CVs
+"""
+
+import sys
+import os
+import io
+import uuid
+import asyncio
+import zipfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Tokens are signed with this secret; requests without one stay allowed for the other test modules
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+os.environ.setdefault("AUTH_REQUIRED", "false")
+
+from fastapi.testclient import TestClient
+
+import main_enhanced
+from cv_export import stream_cv_export
+from tenancy import auth_headers
+
+client = TestClient(main_enhanced.app)
+
+def test_export_zip_contains_every_cv_as_pdf():
+    headers = auth_headers(f"export-{uuid.uuid4().hex[:8]}")
+    for i in range(5):
+        text = f"Exported Person {i}\nexport{i}@example.com\n\nEXPERIENCE\n- Kept CV number {i} on file\n"
+        client.post("/upload-cv/", files={"file": (f"export_{i}.txt", text.encode())},
+                    data={"extracted_text": text}, headers=headers)
+    cvs = client.get("/cvs/", headers=headers).json()["cvs"]
+
+    response = client.get("/cvs/export.zip", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    names = archive.namelist()
+    assert sorted(name.split("_")[0] for name in names) == sorted(f"{cv['id']:05d}" for cv in cvs)
+    assert all(name.endswith(".pdf") for name in names)
+    assert all(archive.read(name).startswith(b"%PDF") for name in names)
+
+    # Each entry is exactly what downloading that CV serves
+    active = next(cv for cv in cvs if cv["is_active"])
+    entry = next(name for name in names if name.startswith(f"{active['id']:05d}_"))
+    assert archive.read(entry) == client.post(f"/cvs/{active['id']}/download", headers=headers).content
+
+def test_archive_is_yielded_entry_by_entry():
+    user_id = f"chunks-{uuid.uuid4().hex[:8]}"
+    headers = auth_headers(user_id)
+    for i in range(3):
+        text = f"Chunked Person {i}\nchunk{i}@example.com\n\nEXPERIENCE\n- Streamed archive entry number {i} to the client\n"
+        client.post("/upload-cv/", files={"file": (f"chunk_{i}.txt", text.encode())},
+                    data={"extracted_text": text}, headers=headers)
+    cvs = [dict(cv, user_id=user_id) for cv in client.get("/cvs/", headers=headers).json()["cvs"]]
+    cvs.append({"id": 999999, "title": "Missing", "user_id": user_id})  # deleted mid-export: becomes an error entry
+
+    async def collect():
+        return [chunk async for chunk in stream_cv_export(cvs, main_enhanced._export_content, concurrency=2)]
+
+    chunks = asyncio.run(collect())
+    print(f"📦 Export streamed in {len(chunks)} chunks")
+    # One chunk per entry, then the central directory
+    assert len(chunks) == len(cvs) + 1
+    names = zipfile.ZipFile(io.BytesIO(b"".join(chunks))).namelist()
+    assert "999999_Missing.error.txt" in names and len(names) == 4
+
+def test_export_of_user_without_cvs_is_an_empty_archive():
+    response = client.get("/cvs/export.zip", headers=auth_headers(f"empty-{uuid.uuid4().hex[:8]}"))
+    assert response.status_code == 200
+    assert zipfile.ZipFile(io.BytesIO(response.content)).namelist() == []
+
+def test_all_tenants_export_is_admin_only():
+    admin, tenants = f"admin-{uuid.uuid4().hex[:8]}", [f"tenant-{uuid.uuid4().hex[:8]}" for _ in range(2)]
+    for tenant in tenants:
+        text = f"{tenant}\n{tenant}@example.com\n\nEXPERIENCE\n- Exported along with every other tenant\n"
+        client.post("/upload-cv/", files={"file": (f"{tenant}.txt", text.encode())},
+                    data={"extracted_text": text}, headers=auth_headers(tenant))
+    tenant_cv_ids = {cv["id"] for tenant in tenants for cv in client.get("/cvs/", headers=auth_headers(tenant)).json()["cvs"]}
+
+    assert client.get("/admin/cvs/export.zip", headers=auth_headers(tenants[0])).status_code == 403
+    previous = os.environ.get("ADMIN_USER_IDS")
+    os.environ["ADMIN_USER_IDS"] = admin
+    try:
+        response = client.get("/admin/cvs/export.zip", headers=auth_headers(admin))
+    finally:
+        if previous is None:
+            del os.environ["ADMIN_USER_IDS"]
+        else:
+            os.environ["ADMIN_USER_IDS"] = previous
+    assert response.status_code == 200
+    names = zipfile.ZipFile(io.BytesIO(response.content)).namelist()
+    exported_ids = {int(name.split("_")[0]) for name in names}
+    print(f"📦 Admin export: {len(names)} CVs across all tenants")
+    assert tenant_cv_ids <= exported_ids
+
+if __name__ == "__main__":
+    test_export_zip_contains_every_cv_as_pdf()
+    test_archive_is_yielded_entry_by_entry()
+    test_export_of_user_without_cvs_is_an_empty_archive()
+    test_all_tenants_export_is_admin_only()
+    print("✅ All CV export tests passed")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test background preparation of formatted CVs and downloads that only render it
+"""
+
+import sys
+import os
+import asyncio
+import uuid
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Tokens are signed with this secret; requests without one stay allowed for the other test modules
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+os.environ.setdefault("AUTH_REQUIRED", "false")
+
+from fastapi.testclient import TestClient
+import main_enhanced
+from db import get_db_cursor_context
+from cv_versions import record_cv_version
+from cv_precompute import CVPreparer, _users_with_pending_updates, get_prepared_content
+from repositories import cv_update_repository, insert_projects
+from tenancy import user_scope, auth_headers
+
+client = TestClient(main_enhanced.app)
+
+CV_TEXT = "Prep Tester\nprep@example.com\n\nEXPERIENCE\n• Shipped the background formatting pipeline for CV downloads\n"
+
+def _preparer(calls):
+    def enhance(content, updates):
+        calls.append("enhance")
+        return content + "".join(f"\n• {text}" for _, text in updates)
+
+    def format_cv(content):
+        calls.append("format")
+        return "FORMATTED\n" + content
+    return CVPreparer(enhance=enhance, format_cv=format_cv, assemble=main_enhanced.build_cv_with_projects,
+                      interval=0, batch_size=1000)
+
+def _assembled(user_id):
+    with user_scope(user_id):
+        return main_enhanced.build_cv_with_projects()
+
+def _run_until_idle(preparer):
+    while preparer.run_once()["more"]:
+        pass
+
+def test_updates_and_formatting_are_prepared_in_background():
+    user_id = f"prep-{uuid.uuid4().hex[:8]}"
+    headers = auth_headers(user_id)
+    with get_db_cursor_context() as (cursor, conn):
+        cursor.execute('''INSERT INTO cvs (title, filename, original_content, current_content, is_active, user_id)
+                          VALUES ('Prepared', 'prep.txt', ?, ?, TRUE, ?)''', (CV_TEXT, CV_TEXT, user_id))
+        cv_id = cursor.lastrowid
+        record_cv_version(cursor, cv_id, CV_TEXT, "Uploaded CV")
+    with user_scope(user_id):
+        asyncio.run(cv_update_repository.add("skill", "Learned Rust", "I learned Rust"))
+
+    # Nothing prepared yet: the CV is assembled with its projects without any AI call
+    before = client.get("/cv/enhanced/", headers=headers)
+    assert before.status_code == 200
+    assert before.headers["X-CV-Prepared"] == "false"
+    assert before.json()["content"] == _assembled(user_id)
+
+    calls = []
+    preparer = _preparer(calls)
+    _run_until_idle(preparer)
+    assert "enhance" in calls and "format" in calls
+    with user_scope(user_id):
+        assert asyncio.run(cv_update_repository.pending()) == []
+
+    after = client.get("/cv/enhanced/", headers=headers)
+    assert after.headers["X-CV-Prepared"] == "true"
+    assert after.json()["content"] == "FORMATTED\n" + _assembled(user_id)
+    assert "Learned Rust" in after.json()["content"]
+
+    # Downloads render the prepared text and call nothing else
+    calls.clear()
+    download = client.post(f"/cvs/{cv_id}/download", headers=headers)
+    assert download.status_code == 200
+    assert download.headers["X-CV-Prepared"] == "true"
+    assert calls == []
+
+    # Editing the CV makes the prepared copy stale until the next pass
+    edited = CV_TEXT + "• Edited by hand after preparation\n"
+    assert client.put(f"/cvs/{cv_id}", json={"content": edited}, headers=headers).status_code == 200
+    assert client.post(f"/cvs/{cv_id}/download", headers=headers).headers["X-CV-Prepared"] == "false"
+    _run_until_idle(preparer)
+    assert client.get("/cv/enhanced/", headers=headers).json()["content"] == "FORMATTED\n" + _assembled(user_id)
+
+    # Adding a project also makes it stale, and the next pass formats the CV with the project in it
+    with user_scope(user_id):
+        with get_db_cursor_context() as (cursor, conn):
+            insert_projects(cursor, [{"title": "Preparer Project", "description": "Formats CVs ahead of time",
+                                      "technologies": ["Python"], "highlights": []}])
+    assert client.get("/cv/enhanced/", headers=headers).headers["X-CV-Prepared"] == "false"
+    _run_until_idle(preparer)
+    prepared = client.get("/cv/enhanced/", headers=headers)
+    assert prepared.headers["X-CV-Prepared"] == "true"
+    assert "Preparer Project" in prepared.json()["content"]
+    print(f"🪄 Preparer stats: {preparer.snapshot()}")
+
+def test_prepared_rows_follow_their_cv():
+    user_id = f"prep-{uuid.uuid4().hex[:8]}"
+    with get_db_cursor_context() as (cursor, conn):
+        cursor.execute('''INSERT INTO cvs (title, filename, original_content, current_content, user_id)
+                          VALUES ('Short lived', 'gone.txt', ?, ?, ?)''', (CV_TEXT, CV_TEXT, user_id))
+        cv_id = cursor.lastrowid
+        record_cv_version(cursor, cv_id, CV_TEXT)
+    assert _preparer([]).prepare_cv(cv_id, user_id)
+
+    assert client.delete(f"/cvs/{cv_id}", headers=auth_headers(user_id)).status_code == 200
+    with get_db_cursor_context() as (cursor, conn):
+        cursor.execute("SELECT COUNT(*) FROM prepared_cvs WHERE cv_id = ?", (cv_id,))
+        assert cursor.fetchone()[0] == 0
+
+def test_downloading_an_inactive_cv_requests_its_formatting():
+    user_id = f"prep-{uuid.uuid4().hex[:8]}"
+    headers = auth_headers(user_id)
+    with get_db_cursor_context() as (cursor, conn):
+        cursor.execute('''INSERT INTO cvs (title, filename, original_content, current_content, is_active, user_id)
+                          VALUES ('Older CV', 'older.txt', ?, ?, FALSE, ?)''', (CV_TEXT, CV_TEXT, user_id))
+        cv_id = cursor.lastrowid
+        record_cv_version(cursor, cv_id, CV_TEXT, "Uploaded CV")
+
+    preparer = _preparer([])
+    original, main_enhanced.cv_preparer = main_enhanced.cv_preparer, preparer
+    try:
+        # Not active, so the background passes leave it alone until it is downloaded
+        _run_until_idle(preparer)
+        with get_db_cursor_context() as (cursor, conn):
+            assert get_prepared_content(cursor, cv_id) is None
+
+        first = client.post(f"/cvs/{cv_id}/download", headers=headers)
+        assert first.status_code == 200
+        assert first.headers["X-CV-Prepared"] == "false"
+
+        _run_until_idle(preparer)
+        with get_db_cursor_context() as (cursor, conn):
+            assert get_prepared_content(cursor, cv_id) == "FORMATTED\n" + CV_TEXT
+        second = client.post(f"/cvs/{cv_id}/download", headers=headers)
+        assert second.headers["X-CV-Prepared"] == "true"
+        print("✅ Downloaded inactive CV is formatted by the next pass")
+    finally:
+        main_enhanced.cv_preparer = original
+
+def test_longest_waiting_users_are_served_first():
+    waiting, recent = f"prep-{uuid.uuid4().hex[:8]}", f"prep-{uuid.uuid4().hex[:8]}"
+    with get_db_cursor_context() as (cursor, conn):
+        for user_id, created_at in ((recent, "2001-01-01 00:00:00"), (waiting, "2000-01-01 00:00:00"),
+                                    (recent, "2000-06-01 00:00:00")):
+            cursor.execute('''INSERT INTO cv_updates (update_type, content, original_message, created_at, user_id)
+                              VALUES ('skill', 'Waiting', 'Waiting', ?, ?)''', (created_at, user_id))
+        users = _users_with_pending_updates(cursor, 1000)
+        assert users.index(waiting) < users.index(recent)
+        cursor.execute("DELETE FROM cv_updates WHERE user_id IN (?, ?)", (waiting, recent))
+
+if __name__ == "__main__":
+    test_updates_and_formatting_are_prepared_in_background()
+    test_prepared_rows_follow_their_cv()
+    test_downloading_an_inactive_cv_requests_its_formatting()
+    test_longest_waiting_users_are_served_first()
+    print("✅ All CV preparation tests passed")
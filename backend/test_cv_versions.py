@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test delta-compressed CV version history
+"""
+
+import sys
+import os
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+import main_enhanced
+from db import get_db_cursor_context
+from cv_versions import make_delta, apply_delta, record_cv_version, CV_VERSION_KEYFRAME_INTERVAL
+
+client = TestClient(main_enhanced.app)
+
+BASE_CV = "\n".join(["JANE DOE", "", "SKILLS"] + [f"• Skill {i}" for i in range(40)] +
+                    ["", "EXPERIENCE"] + [f"• Did thing {i}" for i in range(40)])
+
+def test_delta_round_trip():
+    rng = random.Random(3)
+    old = BASE_CV
+    for _ in range(50):
+        lines = old.split("\n")
+        index = rng.randrange(len(lines))
+        choice = rng.random()
+        if choice < 0.4:
+            lines.insert(index, f"• New line {rng.random():.4f}")
+        elif choice < 0.7:
+            del lines[index]
+        else:
+            lines[index] = lines[index].upper()
+        new = "\n".join(lines)
+        assert apply_delta(old, make_delta(old, new)) == new
+        old = new
+
+def test_versions_endpoints_and_keyframes():
+    with get_db_cursor_context() as (cursor, conn):
+        cursor.execute('''INSERT INTO cvs (title, filename, original_content, current_content)
+                          VALUES ('Versioned', 'v.txt', ?, ?)''', (BASE_CV, BASE_CV))
+        cv_id = cursor.lastrowid
+        record_cv_version(cursor, cv_id, BASE_CV)
+
+    contents = [BASE_CV]
+    edits = CV_VERSION_KEYFRAME_INTERVAL + 2
+    try:
+        for i in range(edits):
+            contents.append(contents[-1] + f"\n• Learned tool {i}")
+            assert client.put(f"/cvs/{cv_id}", json={"content": contents[-1]}).status_code == 200
+        # Saving identical content must not create a version
+        client.put(f"/cvs/{cv_id}", json={"content": contents[-1]})
+
+        listing = client.get(f"/cvs/{cv_id}/versions").json()
+        versions = listing["versions"]
+        assert listing["total_count"] == edits + 1
+        keyframes = sorted(v["version_number"] for v in versions if v["is_keyframe"])
+        assert keyframes == [1, CV_VERSION_KEYFRAME_INTERVAL + 1]
+
+        full_size = sum(v["content_length"] for v in versions)
+        stored = sum(v["stored_bytes"] for v in versions)
+        print(f"🗜️ {edits + 1} versions: {full_size} chars of content stored in {stored} bytes")
+        assert stored * 5 < full_size
+
+        for number in (1, 2, CV_VERSION_KEYFRAME_INTERVAL, CV_VERSION_KEYFRAME_INTERVAL + 1, edits + 1):
+            body = client.get(f"/cvs/{cv_id}/versions/{number}").json()
+            assert body["content"] == contents[number - 1], f"version {number} rebuilt incorrectly"
+
+        assert client.get(f"/cvs/{cv_id}/versions/{edits + 5}").status_code == 404
+    finally:
+        client.delete(f"/cvs/{cv_id}")
+    assert client.get(f"/cvs/{cv_id}/versions").status_code == 404
+
+if __name__ == "__main__":
+    test_delta_round_trip()
+    test_versions_endpoints_and_keyframes()
+    print("✅ All CV version tests passed")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test the pooled, pre-configured SQLite connections
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_pool import SQLiteConnectionPool, PoolTimeoutError
+
+def make_pool(size=2, timeout=1.0):
+    path = os.path.join(tempfile.mkdtemp(), "pool_test.db")
+    return SQLiteConnectionPool(path, size=size, timeout=timeout)
+
+def test_connections_are_reused_and_configured_once():
+    pool = make_pool(size=2)
+    first = pool.acquire()
+    raw = first._raw
+    assert first.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    first.close()
+
+    second = pool.acquire()
+    assert second._raw is raw, "returned connection should be handed out again"
+    second.close()
+    assert pool.snapshot()["checkouts"] == 2
+    assert pool.snapshot()["in_use"] == 0
+
+def test_uncommitted_work_is_rolled_back_on_return():
+    pool = make_pool(size=1)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE items (name TEXT)")
+        conn.commit()
+        conn.execute("INSERT INTO items VALUES ('dangling')")
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 0
+
+def test_wait_time_metrics_and_timeout():
+    pool = make_pool(size=1, timeout=0.05)
+    held = pool.acquire()
+    try:
+        pool.acquire()
+        assert False, "expected PoolTimeoutError"
+    except PoolTimeoutError:
+        pass
+
+    pool.timeout = 2.0
+    releaser = threading.Thread(target=lambda: (time.sleep(0.1), held.close()))
+    releaser.start()
+    waiter = pool.acquire()
+    releaser.join()
+    waiter.close()
+
+    snapshot = pool.snapshot()
+    print(f"⏱️ Pool snapshot: {snapshot}")
+    assert snapshot["timeouts"] == 1
+    assert snapshot["wait_max_ms"] >= 80
+
+def test_health_check_replaces_broken_connections():
+    pool = make_pool(size=2)
+    conn = pool.acquire()
+    conn._raw.close()
+    conn.close()
+
+    assert pool.snapshot()["replaced"] == 1, "closed connection should be replaced on return"
+    assert pool.health_check() == {"healthy": True, "checked": 1, "replaced": 0}
+
+    # A connection that broke while idle fails the ping and is swapped out on return
+    raw = pool._idle.get_nowait()
+    raw.close()
+    pool._idle.put(raw)
+    assert pool.health_check() == {"healthy": False, "checked": 1, "replaced": 1}
+    assert pool.health_check()["healthy"]
+
+class FailingPingConnection(sqlite3.Connection):
+    """Works for everything (including rollback) except the health check's ping"""
+
+    def execute(self, sql, *args):
+        if sql == "SELECT 1":
+            raise sqlite3.OperationalError("disk I/O error")
+        return super().execute(sql, *args)
+
+def test_failed_ping_replaces_a_connection_that_can_still_roll_back():
+    pool = make_pool(size=1)
+    pool._idle.get_nowait().close()
+    pool._idle.put(sqlite3.connect(pool.database, factory=FailingPingConnection, check_same_thread=False))
+
+    assert pool.health_check() == {"healthy": False, "checked": 1, "replaced": 1}
+    raw = pool._idle.get_nowait()
+    assert not isinstance(raw, FailingPingConnection), "the failing connection must not return to the pool"
+    pool._idle.put(raw)
+    assert pool.health_check() == {"healthy": True, "checked": 1, "replaced": 0}
+    print("✅ Connection that failed the ping was replaced")
+
+def test_health_check_leaves_the_idle_pool_available():
+    pool = make_pool(size=2, timeout=0.05)
+    held = pool.acquire()
+    try:
+        # Only one connection is checked out for the ping: the other stays available
+        assert pool.health_check()["healthy"]
+        assert pool.snapshot()["idle"] == 1
+        other = pool.acquire()
+        other.close()
+    finally:
+        held.close()
+    assert pool.snapshot()["idle"] == 2
+
+def test_dropped_connection_returns_to_pool():
+    pool = make_pool(size=1, timeout=0.05)
+    conn = pool.acquire()
+    del conn
+    again = pool.acquire()
+    again.close()
+    assert pool.snapshot()["leaked"] == 1
+
+if __name__ == "__main__":
+    test_connections_are_reused_and_configured_once()
+    test_uncommitted_work_is_rolled_back_on_return()
+    test_wait_time_metrics_and_timeout()
+    test_health_check_replaces_broken_connections()
+    test_failed_ping_replaces_a_connection_that_can_still_roll_back()
+    test_health_check_leaves_the_idle_pool_available()
+    test_dropped_connection_returns_to_pool()
+    print("✅ All connection pool tests passed")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test the numbered schema migrations and that hot queries use their indexes
+"""
+
+import sys
+import os
+import sqlite3
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from migrations import migrate, current_version, MIGRATIONS
+
+def query_plan(conn, sql):
+    return " | ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall())
+
+def test_migrations_apply_once():
+    conn = sqlite3.connect(":memory:")
+    applied = migrate(conn)
+    assert applied == [m.version for m in MIGRATIONS]
+    assert migrate(conn) == []
+    assert current_version(conn.cursor()) == MIGRATIONS[-1].version
+
+def test_legacy_database_is_upgraded():
+    conn = sqlite3.connect(":memory:")
+    conn.execute('''CREATE TABLE cvs (id INTEGER PRIMARY KEY AUTOINCREMENT, filename TEXT NOT NULL,
+                    original_content TEXT NOT NULL, current_content TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    conn.execute('''CREATE TABLE cv_updates (id INTEGER PRIMARY KEY AUTOINCREMENT, update_type TEXT NOT NULL,
+                    content TEXT NOT NULL, original_message TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    conn.execute("INSERT INTO cvs (filename, original_content, current_content) VALUES ('old.txt', 'cv', 'cv')")
+    conn.commit()
+
+    migrate(conn)
+    title, is_active = conn.execute("SELECT title, is_active FROM cvs").fetchone()
+    assert title == 'Untitled CV'
+    assert is_active == 1, "the only CV should become active"
+    conn.execute("SELECT processed FROM cv_updates")
+
+def test_hot_queries_use_indexes():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    plans = {
+        "SELECT current_content FROM cvs WHERE user_id = 'u1' AND is_active = TRUE LIMIT 1": "idx_cvs_user_active",
+        "SELECT filename, current_content FROM cvs WHERE user_id = 'u1' ORDER BY updated_at DESC LIMIT 1":
+            "idx_cvs_user_updated_at",
+        "SELECT id, message, message_type, created_at FROM chat_messages WHERE user_id = 'u1' AND id < 100 "
+        "ORDER BY id DESC LIMIT 50": "idx_chat_messages_user",
+        "SELECT id, project_data FROM manual_projects WHERE user_id = 'u1' ORDER BY created_at DESC":
+            "idx_manual_projects_user_listing",
+        "SELECT update_type, content FROM cv_updates WHERE user_id = 'u1' AND processed = FALSE ORDER BY created_at":
+            "idx_cv_updates_user_pending",
+    }
+    for sql, index in plans.items():
+        plan = query_plan(conn, sql)
+        print(f"🔎 {plan}")
+        assert index in plan, f"{sql} should use {index}"
+        assert "TEMP B-TREE" not in plan, f"{sql} should not sort in memory"
+
+def test_project_columns_are_generated_and_indexed():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    conn.execute("INSERT INTO manual_projects (project_data) VALUES (?)",
+                 ('{"title": "Weather Dashboard", "duration": "2021", "role": "Frontend", "technologies": ["React"]}',))
+    conn.execute("INSERT INTO manual_projects (project_data) VALUES ('not json')")
+    rows = conn.execute("SELECT title, duration, role, technologies FROM manual_projects ORDER BY id").fetchall()
+    assert rows == [("Weather Dashboard", "2021", "Frontend", '["React"]'), (None, None, None, None)]
+
+    plan = query_plan(conn, "SELECT project_data FROM manual_projects "
+                            "WHERE user_id = 'default' AND title = 'weather dashboard' COLLATE NOCASE")
+    print(f"🔎 {plan}")
+    assert "idx_manual_projects_user_title" in plan
+    assert conn.execute("SELECT COUNT(*) FROM manual_projects WHERE title = 'weather dashboard' COLLATE NOCASE").fetchone()[0] == 1
+
+if __name__ == "__main__":
+    test_migrations_apply_once()
+    test_legacy_database_is_upgraded()
+    test_hot_queries_use_indexes()
+    test_project_columns_are_generated_and_indexed()
+    print("✅ All migration tests passed")
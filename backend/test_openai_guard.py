@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Test the OpenAI client guard: deadlines, concurrency cap and circuit breaker
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from types import SimpleNamespace
+from openai_guard import (
+    GuardedOpenAIClient, CircuitBreaker, CircuitOpenError, ConcurrencyLimitError
+)
+
+class FakeOpenAI:
+    """Minimal stand-in for the OpenAI SDK client"""
+
+    def __init__(self, behaviour):
+        self.behaviour = behaviour
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls.append(kwargs)
+        return self.behaviour(**kwargs)
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+def failing(**kwargs):
+    raise TimeoutError("request timed out")
+
+def succeeding(**kwargs):
+    return "ok"
+
+def test_deadline_is_passed_to_sdk():
+    fake = FakeOpenAI(succeeding)
+    guard = GuardedOpenAIClient(fake, timeout=3.5)
+    assert guard.chat.completions.create(model="m", messages=[]) == "ok"
+    assert fake.calls[0]["timeout"] == 3.5
+
+def test_breaker_opens_after_threshold_and_fails_fast():
+    fake = FakeOpenAI(failing)
+    guard = GuardedOpenAIClient(fake, breaker=CircuitBreaker(failure_threshold=3, cooldown_seconds=60))
+
+    for _ in range(3):
+        try:
+            guard.chat.completions.create(model="m", messages=[])
+        except TimeoutError:
+            pass
+    assert guard.breaker.state == CircuitBreaker.OPEN
+
+    started = time.monotonic()
+    try:
+        guard.chat.completions.create(model="m", messages=[])
+        assert False, "expected CircuitOpenError"
+    except CircuitOpenError:
+        pass
+    assert time.monotonic() - started < 0.1
+    assert len(fake.calls) == 3, "open breaker must not reach OpenAI"
+
+    snapshot = guard.snapshot()
+    print(f"🔌 Breaker snapshot: {snapshot['breaker']}")
+    assert snapshot["breaker"]["state"] == "open"
+    assert snapshot["breaker"]["rejected"] == 1
+
+def test_half_open_trial_closes_breaker():
+    outcomes = [failing, succeeding]
+    fake = FakeOpenAI(lambda **kw: outcomes[0](**kw))
+    guard = GuardedOpenAIClient(fake, breaker=CircuitBreaker(failure_threshold=1, cooldown_seconds=0.05))
+
+    try:
+        guard.chat.completions.create(model="m", messages=[])
+    except TimeoutError:
+        pass
+    assert guard.breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.06)
+    outcomes.pop(0)
+    assert guard.chat.completions.create(model="m", messages=[]) == "ok"
+    assert guard.breaker.state == CircuitBreaker.CLOSED
+
+def test_client_errors_do_not_trip_breaker():
+    def bad_request(**kwargs):
+        raise FakeAPIError(400)
+    guard = GuardedOpenAIClient(FakeOpenAI(bad_request), breaker=CircuitBreaker(failure_threshold=1))
+    try:
+        guard.chat.completions.create(model="m", messages=[])
+    except FakeAPIError:
+        pass
+    assert guard.breaker.state == CircuitBreaker.CLOSED
+
+def test_concurrency_limit():
+    release = threading.Event()
+
+    def slow(**kwargs):
+        release.wait(2)
+        return "ok"
+
+    guard = GuardedOpenAIClient(FakeOpenAI(slow), max_concurrency=1, queue_timeout=0.05)
+    worker = threading.Thread(target=lambda: guard.chat.completions.create(model="m", messages=[]))
+    worker.start()
+    time.sleep(0.02)
+    try:
+        guard.chat.completions.create(model="m", messages=[])
+        assert False, "expected ConcurrencyLimitError"
+    except ConcurrencyLimitError:
+        pass
+    finally:
+        release.set()
+        worker.join()
+    assert guard.snapshot()["in_flight"] == 0
+
+def test_stream_holds_slot_until_drained():
+    def streaming(**kwargs):
+        return iter(["a", "b"])
+    guard = GuardedOpenAIClient(FakeOpenAI(streaming))
+    stream = guard.chat.completions.create(model="m", messages=[], stream=True)
+    assert list(stream) == ["a", "b"]
+    assert guard.snapshot()["in_flight"] == 0
+
+def test_abandoned_stream_releases_its_slot():
+    def streaming(**kwargs):
+        return iter(["a", "b", "c"])
+    guard = GuardedOpenAIClient(FakeOpenAI(streaming), max_concurrency=1, queue_timeout=0.05)
+
+    # Closed before iteration started: a generator's finally would never have run
+    stream = guard.chat.completions.create(model="m", messages=[], stream=True)
+    assert guard.snapshot()["in_flight"] == 1
+    stream.close()
+    assert guard.snapshot()["in_flight"] == 0
+
+    # Abandoned part-way through (a client disconnecting mid-response)
+    with guard.chat.completions.create(model="m", messages=[], stream=True) as stream:
+        assert next(stream) == "a"
+    assert guard.snapshot()["in_flight"] == 0
+
+    # Dropped without closing: released when collected
+    stream = guard.chat.completions.create(model="m", messages=[], stream=True)
+    next(stream)
+    del stream
+    assert guard.snapshot()["in_flight"] == 0
+    assert guard.snapshot()["breaker"]["consecutive_failures"] == 0
+    assert list(guard.chat.completions.create(model="m", messages=[], stream=True)) == ["a", "b", "c"]
+
+if __name__ == "__main__":
+    test_deadline_is_passed_to_sdk()
+    test_breaker_opens_after_threshold_and_fails_fast()
+    test_half_open_trial_closes_breaker()
+    test_client_errors_do_not_trip_breaker()
+    test_concurrency_limit()
+    test_stream_holds_slot_until_drained()
+    test_abandoned_stream_releases_its_slot()
+    print("✅ All OpenAI guard tests passed")
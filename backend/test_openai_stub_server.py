@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test the OpenAI-compatible stub server used for offline load testing
+"""
+
+import sys
+import os
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+from openai_stub_server import create_app, StubConfig, LatencyModel
+
+def chat(client, messages, **extra):
+    return client.post("/v1/chat/completions", json={"model": "gpt-3.5-turbo", "messages": messages, **extra})
+
+def test_classification_wire_format():
+    client = TestClient(create_app(StubConfig(seed=1)))
+    response = chat(client, [
+        {"role": "system", "content": "You are a CV assistant with full CRUD capabilities. Classify messages to perform ..."},
+        {"role": "user", "content": "I learned Rust and Go"}
+    ])
+    assert response.status_code == 200
+    body = response.json()
+    assert body["object"] == "chat.completion"
+    classification = json.loads(body["choices"][0]["message"]["content"])
+    print(f"🏷️ Stub classification: {classification}")
+    assert classification["category"] == "SKILL_ADD"
+    assert classification["operation"] == "CREATE"
+
+def test_streaming_chunks():
+    client = TestClient(create_app(StubConfig()))
+    response = chat(client, [{"role": "user", "content": "Create a professional LinkedIn blog post about this project:\n- Title: Demo"}],
+                    stream=True)
+    assert response.status_code == 200
+    frames = [line[len("data: "):] for line in response.text.split("\n") if line.startswith("data: ")]
+    assert frames[-1] == "[DONE]"
+    text = ''.join(json.loads(f)["choices"][0]["delta"].get("content", "") for f in frames[:-1])
+    assert "Demo" in text
+
+def test_error_injection_is_reproducible():
+    def error_pattern(seed):
+        client = TestClient(create_app(StubConfig(error_rate=0.5, error_status=503, seed=seed)))
+        return [chat(client, [{"role": "user", "content": "hi"}]).status_code for _ in range(20)]
+
+    first = error_pattern(7)
+    assert 503 in first and 200 in first
+    assert first == error_pattern(7)
+
+def test_latency_distributions():
+    assert LatencyModel("fixed:0.25").sample() == 0.25
+    for spec in ("uniform:0.1,0.2", "normal:0.1,0.01", "lognormal:-2,0.3"):
+        assert LatencyModel(spec).sample() >= 0
+
+if __name__ == "__main__":
+    test_classification_wire_format()
+    test_streaming_chunks()
+    test_error_injection_is_reproducible()
+    test_latency_distributions()
+    print("✅ All stub server tests passed")
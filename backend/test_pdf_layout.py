@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test the enhanced PDF layout engine: measured wrapping, predictable page breaks and per-section reuse
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fpdf import FPDF
+
+from pdf_layout import (BLOCK_STYLES, FontMetrics, LayoutCache, PageGeometry, layout_cache, layout_document, load_metrics,
+                        metrics_for, split_sections, section_blocks, wrap_text, _metrics_cache)
+from pdf_renderer import generate_enhanced_pdf, HAS_PYMUPDF
+
+LONG_CV = ("Jane Doe\nSenior Engineer\njane@example.com\n\nPROFILE SUMMARY\n" +
+           "Builds reliable systems and writes paragraphs long enough to wrap across the page. " * 5 +
+           "\n\nSKILLS\n- Python\n- Go\n\nWORK EXPERIENCE\nSTAFF ENGINEER\n" +
+           "\n".join(f"- Delivered project {i} with measurable impact on latency, cost and reliability "
+                     f"for users in many regions" for i in range(150)) +
+           "\n\nEDUCATION\nBSc Computer Science\n")
+
+def _pdf():
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=False)
+    return pdf
+
+def test_wrapped_lines_fit_the_measured_width():
+    pdf = _pdf()
+    metrics = load_metrics(pdf, "Helvetica")
+    text = "Supercalifragilisticexpialidocious " * 3 + "x" * 200 + " short words to finish the paragraph"
+    width = 80
+    lines = wrap_text(text, metrics[""], 10, width, pdf.k)
+    pdf.set_font("Helvetica", "", 10)
+    assert all(pdf.get_string_width(line) <= width + 1e-6 for line in lines)
+    assert "".join(" ".join(lines).split()) == "".join(text.split())
+    # Glyph widths are shared by every document in the process, one entry per font face
+    assert metrics_for(pdf.current_font) is metrics[""]
+    cached_faces = len(_metrics_cache)
+    for _ in range(3):
+        assert load_metrics(_pdf(), "Helvetica")[""] is metrics[""]
+    assert len(_metrics_cache) == cached_faces
+
+def test_headers_come_from_the_section_parser():
+    sections = split_sections(LONG_CV)
+    assert [section[0] for section in sections[1:]] == ["PROFILE SUMMARY", "SKILLS", "WORK EXPERIENCE", "EDUCATION"]
+    preamble = section_blocks(sections[0], preamble=True)
+    assert [block.kind for block in preamble] == ["name", "title", "contact"]
+    experience = section_blocks(sections[3], preamble=False)
+    assert experience[0] == ("header", "Work Experience")
+    # An upper-case job title inside a section is not a section heading
+    assert experience[1] == ("paragraph", "STAFF ENGINEER")
+
+def test_unlisted_all_caps_headings_start_sections():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "demo_cv_complete.txt"), encoding="utf-8") as f:
+        demo_cv = f.read()
+    sections = split_sections(demo_cv)
+    headings = [section[0] for section in sections[1:]]
+    # Not in the parser's pattern table, but short all-caps lines after a blank line
+    assert "ABOUT MYSELF" in headings and "EDUCATION AND TRAINING" in headings
+    about = section_blocks(sections[headings.index("ABOUT MYSELF") + 1], preamble=False)
+    assert about[0] == ("header", "About Myself")
+    assert [block.kind for block in about[1:]] == ["paragraph"]
+    assert [block.kind for block in section_blocks(sections[0], preamble=True)] == ["name", "title"]
+
+def test_page_breaks_are_predictable():
+    pdf = _pdf()
+    geometry = PageGeometry.of(pdf)
+    pages = layout_document(pdf, LONG_CV, "Helvetica")
+    assert pages == layout_document(_pdf(), LONG_CV, "Helvetica")
+    assert len(pages) > 1
+    for page in pages:
+        assert all(line.y + BLOCK_STYLES[line.kind].line_height <= geometry.bottom for line in page)
+        assert page[-1].kind != "header", "a heading must not end a page"
+
+    if HAS_PYMUPDF:
+        import fitz
+        data = generate_enhanced_pdf(LONG_CV).getvalue()
+        assert fitz.open(stream=data, filetype="pdf").page_count == len(pages)
+
+def test_edits_only_reflow_from_the_changed_section():
+    cache = LayoutCache()
+    first = layout_document(_pdf(), LONG_CV, "Helvetica", cache)
+    assert cache.snapshot()["sections_laid_out"] == 5
+
+    # Adding a skill: only SKILLS is wrapped again, and flowing resumes after PROFILE SUMMARY
+    edited = LONG_CV.replace("- Go\n", "- Go\n- Rust\n")
+    started = time.perf_counter()
+    second = layout_document(_pdf(), edited, "Helvetica", cache)
+    incremental_ms = (time.perf_counter() - started) * 1000
+    stats = cache.snapshot()
+    assert stats["sections_laid_out"] == 6
+    assert stats["sections_skipped"] == 2
+    assert second == layout_document(_pdf(), edited, "Helvetica", LayoutCache(0, 0)), "cached layout must match a full one"
+    assert second[0][:5] == first[0][:5]
+
+    started = time.perf_counter()
+    layout_document(_pdf(), edited + "- Python certification\n", "Helvetica", LayoutCache())
+    full_ms = (time.perf_counter() - started) * 1000
+    print(f"📐 Layout after a one-section edit: {incremental_ms:.1f}ms incremental, {full_ms:.1f}ms full")
+
+    # Editing the last section re-flows nothing before it
+    layout_document(_pdf(), edited + "- Python certification\n", "Helvetica", cache)
+    assert cache.snapshot()["sections_skipped"] == 2 + 4
+
+def test_render_work_grows_linearly():
+    measured = {"chars": 0, "calls": 0}
+    original_units = FontMetrics.units
+
+    def counting_units(self, text):
+        measured["chars"] += len(text)
+        measured["calls"] += 1
+        return original_units(self, text)
+
+    def render_work(copies):
+        layout_cache.clear()  # measure the full layout, not cached sections
+        measured.update(chars=0, calls=0)
+        started = time.perf_counter()
+        # Distinct copies, so no section is reused from an earlier copy in the same document
+        generate_enhanced_pdf("".join(LONG_CV.replace("Delivered", f"Delivered ({copy})") for copy in range(copies)))
+        return dict(measured, ms=(time.perf_counter() - started) * 1000)
+
+    FontMetrics.units = counting_units
+    try:
+        small, large = render_work(2), render_work(8)
+    finally:
+        FontMetrics.units = original_units
+    # Timing is informational only: wall-clock ratios are too noisy to assert on
+    print(f"📐 Enhanced PDF render: 2x {small['ms']:.1f}ms, 8x {large['ms']:.1f}ms; "
+          f"measured {small['chars']} vs {large['chars']} characters")
+    # 4x the text should measure about 4x the characters; re-measuring per line would be ~16x
+    for counter in ("chars", "calls"):
+        assert 3.5 * small[counter] <= large[counter] <= 4.5 * small[counter], (counter, small, large)
+
+if __name__ == "__main__":
+    test_wrapped_lines_fit_the_measured_width()
+    test_headers_come_from_the_section_parser()
+    test_unlisted_all_caps_headings_start_sections()
+    test_page_breaks_are_predictable()
+    test_edits_only_reflow_from_the_changed_section()
+    test_render_work_grows_linearly()
+    print("✅ All PDF layout tests passed")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test that the PDF preview is a pure read and honours If-None-Match
+"""
+
+import sys
+import os
+import uuid
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Tokens are signed with this secret; requests without one stay allowed for the other test modules
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+os.environ.setdefault("AUTH_REQUIRED", "false")
+
+from fastapi.testclient import TestClient
+
+import main_enhanced
+from tenancy import auth_headers
+
+client = TestClient(main_enhanced.app)
+
+CV_TEXT = "Pat Preview\nEngineer\n\nEXPERIENCE\nPolled the preview endpoint every few seconds.\n"
+
+def test_preview_does_not_write_and_answers_304():
+    user_id = f"preview-{uuid.uuid4().hex[:8]}"
+    headers = auth_headers(user_id)
+    client.post("/upload-cv/", files={"file": ("preview_cv.txt", CV_TEXT.encode())},
+                data={"extracted_text": CV_TEXT}, headers=headers)
+    client.post("/projects/create", json={"title": "Preview Poller", "description": "Only shown, never saved"},
+                headers=headers)
+    cv_id = client.get("/cvs/", headers=headers).json()["cvs"][0]["id"]
+    versions_before = client.get(f"/cvs/{cv_id}/versions", headers=headers).json()
+
+    preview = client.get("/cv/pdf-preview", headers=headers)
+    assert preview.status_code == 200 and preview.headers["content-type"] == "application/pdf"
+    assert client.get(f"/cvs/{cv_id}/versions", headers=headers).json() == versions_before, "preview must not persist"
+
+    etag = preview.headers["ETag"]
+
+    # A matching poll is answered from the version markers alone: nothing is assembled or rendered
+    assemble = main_enhanced.build_cv_with_projects
+    assembled = []
+    main_enhanced.build_cv_with_projects = lambda *args: assembled.append(1) or assemble(*args)
+    try:
+        not_modified = client.get("/cv/pdf-preview", headers={**headers, "If-None-Match": f'"stale", {etag}'})
+    finally:
+        main_enhanced.build_cv_with_projects = assemble
+    print(f"📄 If-None-Match -> {not_modified.status_code}")
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+    assert not_modified.content == b""
+    assert assembled == []
+
+    # Editing a project changes the ETag
+    project_id = client.get("/projects/", headers=headers).json()["projects"][0]["id"]
+    assert client.put(f"/projects/{project_id}", json={"title": "Preview Poller", "description": "Edited"},
+                      headers=headers).status_code == 200
+    refreshed = client.get("/cv/pdf-preview", headers={**headers, "If-None-Match": etag})
+    assert refreshed.status_code == 200
+    etag = refreshed.headers["ETag"]
+
+    # A new CV changes the ETag
+    edited = CV_TEXT + "Answered conditional requests with 304.\n"
+    client.post("/upload-cv/", files={"file": ("preview_cv.txt", edited.encode())},
+                data={"extracted_text": edited}, headers=headers)
+    assert client.get("/cv/pdf-preview", headers={**headers, "If-None-Match": etag}).status_code == 200
+
+def test_page_png_is_scaled_and_cached():
+    import struct
+
+    headers = auth_headers(f"png-{uuid.uuid4().hex[:8]}")
+    client.post("/upload-cv/", files={"file": ("png_cv.txt", CV_TEXT.encode())},
+                data={"extracted_text": CV_TEXT}, headers=headers)
+
+    first = client.get("/cv/preview/page/1.png?width=200", headers=headers)
+    assert first.status_code == 200 and first.headers["content-type"] == "image/png"
+    width, height = struct.unpack(">II", first.content[16:24])  # PNG IHDR
+    print(f"🖼️ Page 1 thumbnail {width}x{height}, {len(first.content)} bytes")
+    assert width == 200 and height > width
+
+    second = client.get("/cv/preview/page/1.png?width=200", headers=headers)
+    assert second.headers["X-Render-Cache"] == "memory" and second.content == first.content
+    assert client.get("/cv/preview/page/1.png?width=200",
+                      headers={**headers, "If-None-Match": first.headers["ETag"]}).status_code == 304
+    assert client.get("/cv/preview/page/1.png?width=320", headers=headers).headers["ETag"] != first.headers["ETag"]
+
+    cv_id = client.get("/cvs/", headers=headers).json()["cvs"][0]["id"]
+    assert client.get(f"/cv/preview/page/1.png?width=120&cv_id={cv_id}", headers=headers).status_code == 200
+    assert client.get("/cv/preview/page/9.png", headers=headers).status_code == 404
+    assert client.get("/cv/preview/page/1.png?width=5", headers=headers).status_code == 400
+
+def test_preview_without_cv_is_404():
+    response = client.get("/cv/pdf-preview", headers=auth_headers(f"empty-{uuid.uuid4().hex[:8]}"))
+    assert response.status_code == 404
+
+if __name__ == "__main__":
+    test_preview_does_not_write_and_answers_304()
+    test_page_png_is_scaled_and_cached()
+    test_preview_without_cv_is_404()
+    print("✅ All PDF preview tests passed")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test that the renderer context parses fonts and compiles styles once and reuses them
+"""
+
+import sys
+import os
+import time
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import reportlab
+from fpdf import FPDF
+
+from pdf_renderer import RendererContext, get_renderer_context, generate_cv_pdf
+
+VERA_DIR = os.path.join(os.path.dirname(reportlab.__file__), "fonts")
+VERA_FILES = {"": "Vera.ttf", "B": "VeraBd.ttf"}
+
+def render_with(install, text):
+    pdf = FPDF()
+    pdf.set_creation_date(datetime(2024, 1, 1))
+    pdf.add_page()
+    install(pdf)
+    pdf.set_font('DejaVu', 'B', 14)
+    pdf.cell(0, 10, text[:12], new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font('DejaVu', '', 10)
+    pdf.multi_cell(0, 8, text)
+    return bytes(pdf.output())
+
+def test_cloned_fonts_render_like_freshly_parsed_ones():
+    context = RendererContext(font_files=VERA_FILES, font_dir=VERA_DIR)
+    assert context.fonts_available
+
+    def parse_files(pdf):
+        for style, name in VERA_FILES.items():
+            pdf.add_font('DejaVu', style, os.path.join(VERA_DIR, name))
+
+    first, second = "Naïve café résumé", "Zebra quartz xylophone"
+    assert render_with(context.install_fonts, first) == render_with(parse_files, first)
+    # The second document must not inherit glyphs subset for the first one
+    assert render_with(context.install_fonts, second) == render_with(parse_files, second)
+
+    timings = {}
+    for label, install in (("parsed", parse_files), ("reused", context.install_fonts)):
+        started = time.perf_counter()
+        for _ in range(20):
+            install(FPDF())
+        timings[label] = (time.perf_counter() - started) * 1000 / 20
+    print(f"🖨️ Per-render font setup: parsed {timings['parsed']:.2f}ms, reused {timings['reused']:.2f}ms")
+    assert timings["reused"] < timings["parsed"]
+
+def test_enhanced_pdf_is_written_into_the_callers_buffer():
+    from io import BytesIO
+    from pdf_renderer import generate_enhanced_pdf
+
+    cv = "Casey Buffer\nEngineer\n\nEXPERIENCE\nFirst plain paragraph.\nSecond plain paragraph.\n- A bullet\n"
+    out = BytesIO()
+    assert generate_enhanced_pdf(cv, out) is out
+    assert out.tell() == 0 and out.getvalue().startswith(b"%PDF")
+
+def test_missing_fonts_fall_back_to_core_fonts():
+    context = RendererContext(font_dir="/nonexistent")
+    assert not context.fonts_available
+    assert context.install_fonts(FPDF()) is False
+
+def test_context_and_styles_are_built_once():
+    context = get_renderer_context()
+    assert get_renderer_context() is context
+    body_style = context.styles['Body']
+
+    cv = "Sam Styles\nsam@example.com\n\nEXPERIENCE\n- Rendered many CVs\n"
+    projects = [{"title": "Renderer", "description": "Reuses compiled styles", "technologies": ["ReportLab"]}]
+    first = generate_cv_pdf(cv, projects).getvalue()
+    second = generate_cv_pdf(cv, projects).getvalue()
+    assert first.startswith(b"%PDF") and second.startswith(b"%PDF")
+    assert get_renderer_context().styles['Body'] is body_style
+
+if __name__ == "__main__":
+    test_cloned_fonts_render_like_freshly_parsed_ones()
+    test_enhanced_pdf_is_written_into_the_callers_buffer()
+    test_missing_fonts_fall_back_to_core_fonts()
+    test_context_and_styles_are_built_once()
+    print("✅ All PDF renderer tests passed")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite -> PostgreSQL dialect translation of the Postgres backend
+"""
+
+import sys
+import os
+import json
+import uuid
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from db_postgres import translate_sql, TranslatingCursor
+from db_pool import database_dialect, dialect_of
+from migrations import MIGRATIONS, POSTGRES_MIGRATIONS, migrate
+from repositories import insert_projects
+from tenancy import user_scope
+
+# A scratch PostgreSQL database for the live tests, e.g. postgresql://cv:cv@localhost:5432/cv_test
+TEST_POSTGRES_DSN = os.getenv("TEST_POSTGRES_DSN", "")
+
+class RecordingCursor:
+    """Stands in for a psycopg2 cursor: records statements, returns id 42 for RETURNING"""
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+
+    def fetchone(self):
+        return (42,)
+
+def test_translate_sql():
+    assert translate_sql("SELECT * FROM cvs WHERE id = ? AND title LIKE ?") == \
+        "SELECT * FROM cvs WHERE id = %s AND title LIKE %s"
+    # Quoted question marks and percent signs are literals
+    assert translate_sql("SELECT '?', '50%' FROM cvs WHERE id = ?") == "SELECT '?', '50%%' FROM cvs WHERE id = %s"
+    assert translate_sql("id INTEGER PRIMARY KEY AUTOINCREMENT, payload BLOB NOT NULL") == \
+        "id SERIAL PRIMARY KEY, payload BYTEA NOT NULL"
+    assert translate_sql("WHERE title = ? COLLATE NOCASE") == "WHERE lower(title) = lower(%s)"
+    assert translate_sql("WHERE instr(lower(title), ?) > 0") == "WHERE strpos(lower(title), %s) > 0"
+
+def test_insert_reports_lastrowid():
+    raw = RecordingCursor()
+    cursor = TranslatingCursor(raw)
+    cursor.execute("INSERT INTO chat_messages (message, message_type) VALUES (?, ?)", ("hi", "user"))
+    assert raw.statements[-1] == ("INSERT INTO chat_messages (message, message_type) VALUES (%s, %s) RETURNING id",
+                                  ("hi", "user"))
+    assert cursor.lastrowid == 42
+
+    cursor.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)", (1, "initial"))
+    assert "RETURNING" not in raw.statements[-1][0], "tables without an id column get no RETURNING"
+    assert dialect_of(cursor) == "postgres"
+
+def test_backend_selection_and_migration_versions():
+    assert database_dialect("postgresql://cv:secret@db:5432/cv") == "postgres"
+    assert database_dialect("sqlite:///cv_updater.db") == "sqlite"
+    assert database_dialect("") == "sqlite"
+    assert [m.version for m in POSTGRES_MIGRATIONS] == [m.version for m in MIGRATIONS], \
+        "both backends must share migration numbering"
+
+@pytest.mark.skipif(not TEST_POSTGRES_DSN, reason="TEST_POSTGRES_DSN is not set")
+def test_insert_projects_returns_ids_in_input_order():
+    from db_postgres import PostgresConnectionPool
+
+    pool = PostgresConnectionPool(TEST_POSTGRES_DSN, 1)
+    user_id = f"pg-{uuid.uuid4().hex[:8]}"
+    projects = [{"title": f"Project {i}"} for i in range(50)]
+    try:
+        with pool.connection() as conn:
+            migrate(conn)
+            cursor = conn.cursor()
+            with user_scope(user_id):
+                ids = insert_projects(cursor, projects)
+            cursor.execute("SELECT id, project_data FROM manual_projects WHERE user_id = ?", (user_id,))
+            stored = {project_id: json.loads(data)["title"] for project_id, data in cursor.fetchall()}
+            assert [stored[project_id] for project_id in ids] == [project["title"] for project in projects]
+            conn.rollback()
+    finally:
+        pool.close()
+
+if __name__ == "__main__":
+    test_translate_sql()
+    test_insert_reports_lastrowid()
+    test_backend_selection_and_migration_versions()
+    if TEST_POSTGRES_DSN:
+        test_insert_projects_returns_ids_in_input_order()
+    print("✅ All PostgreSQL backend tests passed")
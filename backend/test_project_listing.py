@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test project listings served straight from SQLite JSON and title lookups on the generated column
+"""
+
+import sys
+import os
+import json
+import sqlite3
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+import main_enhanced
+from db import get_db_cursor_context
+from main_enhanced import find_project_by_title
+from migrations import migrate
+from repositories import _project_listing_sql
+
+client = TestClient(main_enhanced.app)
+
+def test_listing_shape_matches_stored_projects():
+    created = client.post("/projects/create", json={"title": "Listing Probe", "technologies": ["Go"]}).json()["project"]
+    try:
+        for path in ("/projects/", "/projects/list"):
+            body = client.get(path).json()
+            assert body["total_count"] == len(body["projects"])
+            assert body["projects"][0] == created, "newest project first, with its row id merged in"
+    finally:
+        client.delete(f"/projects/{created['id']}")
+
+def test_listing_reads_titles_from_the_index_without_parsing_rows():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    rows = [('{"title": "Older", "technologies": ["Go"], "id": 999}', "2020-01-01"),
+            ("not json", "2021-01-01"),
+            ('{"title": "Newer", "highlights": ["Fast"]}', "2022-01-01")]
+    conn.executemany("INSERT INTO manual_projects (project_data, created_at, user_id) VALUES (?, ?, 'u1')", rows)
+    sql = _project_listing_sql("sqlite")
+
+    listing = json.loads(conn.execute(sql, ("u1",)).fetchone()[0])
+    assert listing == {"projects": [{"title": "Newer", "highlights": ["Fast"], "id": 3},
+                                    {"title": "Older", "technologies": ["Go"], "id": 1}],
+                       "total_count": 2}, "malformed rows dropped, row id wins over a stored one"
+    assert json.loads(conn.execute(sql, ("nobody",)).fetchone()[0]) == {"projects": [], "total_count": 0}
+
+    plan = " | ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, ("u1",)).fetchall())
+    print(f"🔎 {plan}")
+    assert "idx_manual_projects_user_listing" in plan and "TEMP B-TREE" not in plan
+    # title comes from the index, so the generated column's json_valid/json_extract never run
+    functions = {row[5] for row in conn.execute("EXPLAIN " + sql, ("u1",)).fetchall() if row[1] == "Function"}
+    assert not any(name.startswith("json") for name in functions), functions
+
+def test_title_lookup_prefers_exact_match():
+    ids = [client.post("/projects/create", json={"title": title}).json()["project"]["id"]
+           for title in ("Lookup Probe Extended", "Lookup Probe")]
+    try:
+        with get_db_cursor_context() as (cursor, conn):
+            assert find_project_by_title(cursor, "LOOKUP PROBE")["title"] == "Lookup Probe"
+            assert find_project_by_title(cursor, "probe extended")["title"] == "Lookup Probe Extended"
+    finally:
+        for project_id in ids:
+            client.delete(f"/projects/{project_id}")
+
+if __name__ == "__main__":
+    test_listing_shape_matches_stored_projects()
+    test_listing_reads_titles_from_the_index_without_parsing_rows()
+    test_title_lookup_prefers_exact_match()
+    print("✅ All project listing tests passed")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test the two-tier rendered-PDF cache and its use by the preview endpoint
+"""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Tokens are signed with this secret; requests without one stay allowed for the other test modules
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+os.environ.setdefault("AUTH_REQUIRED", "false")
+
+from render_cache import RenderCache, render_cache_key
+
+def test_key_covers_content_projects_and_renderer():
+    base = render_cache_key("cv text", [3, 1], "fpdf2/enhanced-v1")
+    assert base == render_cache_key("cv text", [1, 3], "fpdf2/enhanced-v1"), "project order must not matter"
+    assert base != render_cache_key("cv text!", [1, 3], "fpdf2/enhanced-v1")
+    assert base != render_cache_key("cv text", [1], "fpdf2/enhanced-v1")
+    assert base != render_cache_key("cv text", [1, 3], "fpdf2/enhanced-v2")
+
+def test_memory_and_disk_tiers_evict_lru_by_bytes():
+    directory = tempfile.mkdtemp()
+    cache = RenderCache(directory, memory_bytes=250, disk_bytes=250)
+    for name in ("a", "b", "c"):
+        cache.put(name, name.encode() * 100)
+    # 300 bytes over 250-byte budgets: "a" is evicted from both tiers
+    assert cache.get("a") == (None, "miss")
+    assert cache.get("c") == (b"c" * 100, "memory")
+    assert sorted(os.listdir(directory)) == ["b.bin", "c.bin"]
+
+    # A fresh process only has the disk tier; a hit there is promoted to memory
+    reopened = RenderCache(directory, memory_bytes=250, disk_bytes=250)
+    assert reopened.get("b") == (b"b" * 100, "disk")
+    assert reopened.get("b") == (b"b" * 100, "memory")
+
+    renders = []
+    data, source = reopened.get_or_render("d", lambda: renders.append(1) or b"d" * 10)
+    assert (data, source) == (b"d" * 10, "miss")
+    assert reopened.get_or_render("d", lambda: renders.append(1) or b"")[1] == "memory"
+    assert len(renders) == 1
+    print(f"🗄️ Cache snapshot: {reopened.snapshot()}")
+
+def test_unchanged_download_is_served_from_cache():
+    import uuid
+    from fastapi.testclient import TestClient
+    import main_enhanced
+    from tenancy import auth_headers
+
+    from db import get_db_cursor_context
+
+    def stored_versions():
+        with get_db_cursor_context() as (cursor, conn):
+            cursor.execute('''SELECT COUNT(*) FROM cv_versions v JOIN cvs c ON c.id = v.cv_id
+                              WHERE c.user_id = ?''', (user_id,))
+            return cursor.fetchone()[0]
+
+    client = TestClient(main_enhanced.app)
+    user_id = f"cache-{uuid.uuid4().hex[:8]}"
+    headers = auth_headers(user_id)
+    cv_text = "Cache Tester\nEngineer\n\nEXPERIENCE\nRendered the same CV twice without changing a line.\n"
+    client.post("/upload-cv/", files={"file": ("cache_cv.txt", cv_text.encode())},
+                data={"extracted_text": cv_text}, headers=headers)
+
+    body = {"selected_project_ids": []}
+    versions = stored_versions()
+    first = client.post("/cv/download-with-selected-projects", json=body, headers=headers)
+    started = time.perf_counter()
+    second = client.post("/cv/download-with-selected-projects", json=body, headers=headers)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"⚡ Cached download served in {elapsed_ms:.1f}ms")
+
+    assert first.status_code == second.status_code == 200
+    assert second.headers["X-Render-Cache"] == "memory"
+    assert first.content == second.content
+    # Downloads only read: no new CV version is written
+    assert stored_versions() == versions
+
+    enhanced = [client.post("/cv/download", headers=headers) for _ in range(2)]
+    assert [response.status_code for response in enhanced] == [200, 200]
+    assert enhanced[1].headers["X-Render-Cache"] == "memory"
+    assert int(second.headers["Content-Length"]) == len(second.content)
+    assert list(main_enhanced._iter_byte_chunks(b"abcdef", 4)) == [b"abcd", b"ef"]
+
+if __name__ == "__main__":
+    test_key_covers_content_projects_and_renderer()
+    test_memory_and_disk_tiers_evict_lru_by_bytes()
+    test_unchanged_download_is_served_from_cache()
+    print("✅ All render cache tests passed")
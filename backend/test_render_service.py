@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test the process-pool render service: warm workers, queue limit, timeouts and histograms
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import HTTPException
+
+from render_service import (
+    Histogram, RenderService, RenderQueueFullError, RenderTimeoutError, _ping
+)
+
+CV_SPEC = {
+    "template": "cv",
+    "content": "Riley Render\nriley@example.com\n\nEXPERIENCE\n- Rendered CVs off the request thread\n",
+    "projects": [{"title": "Render Pool", "description": "Warm worker processes", "technologies": ["ReportLab"]}],
+}
+
+def test_histogram_buckets_and_percentiles():
+    histogram = Histogram(buckets=(10, 100))
+    for value in (1, 2, 3, 50, 500):
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"le_10": 3, "le_100": 1, "le_inf": 1}
+    assert snapshot["p50_ms"] == 10.0 and snapshot["p95_ms"] == 500.0
+    assert Histogram().snapshot()["p50_ms"] is None
+
+def test_workers_render_specs_in_other_processes():
+    service = RenderService(workers=2, queue_depth=4, timeout=60)
+    try:
+        service.start()
+        executor = service._get_executor()
+        worker_pids = {future.result() for future in [executor.submit(_ping, 0.1) for _ in range(2)]}
+        assert len(worker_pids) == 2 and os.getpid() not in worker_pids
+
+        pdf = service.render(CV_SPEC)
+        assert pdf.startswith(b"%PDF")
+        snapshot = service.snapshot()
+        print(f"🖨️ Render service: {snapshot['render_ms']['count']} render(s), "
+              f"mean {snapshot['render_ms']['mean_ms']}ms, wait mean {snapshot['wait_ms']['mean_ms']}ms")
+        assert snapshot["render_ms"]["count"] == 1
+        assert snapshot["in_flight"] == 0
+    finally:
+        service.shutdown()
+
+def test_full_queue_and_timeouts_are_reported():
+    service = RenderService(workers=1, queue_depth=0, timeout=60)
+    service._in_flight = 1  # one job already running, no room to queue another
+    try:
+        service.render(CV_SPEC)
+        assert False, "expected the queue to be full"
+    except RenderQueueFullError:
+        pass
+    assert service.snapshot()["rejected"] == 1
+
+    # A cold pool cannot start a worker and render within a millisecond
+    service = RenderService(workers=1, queue_depth=1, timeout=0.001)
+    try:
+        try:
+            service.render(CV_SPEC)
+            assert False, "expected a timeout"
+        except RenderTimeoutError:
+            pass
+        assert service.snapshot()["timed_out"] == 1
+    finally:
+        service.shutdown()
+
+def test_hung_render_is_killed_and_capacity_recycled():
+    service = RenderService(workers=1, queue_depth=0, timeout=1)
+    try:
+        service.start()
+        hung_pid = service._run(_ping, 0)
+        try:
+            service._run(_ping, 30)  # sleeps far past the timeout
+            assert False, "expected a timeout"
+        except RenderTimeoutError:
+            pass
+        snapshot = service.snapshot()
+        assert snapshot["in_flight"] == 0, "the hung job must give its slot back"
+        assert snapshot["pools_recycled"] == 1
+
+        # With one worker and no queue, this only succeeds on a fresh worker
+        pdf = service.render(CV_SPEC)
+        assert pdf.startswith(b"%PDF")
+        assert service._run(_ping, 0) != hung_pid
+        assert service.snapshot()["in_flight"] == 0
+        print("✅ Hung render worker killed; later renders still succeed")
+    finally:
+        service.shutdown()
+
+def test_busy_renderer_is_a_503():
+    import main_enhanced
+
+    busy = RenderService(workers=1, queue_depth=0)
+    busy._in_flight = 1
+    original, main_enhanced.render_service = main_enhanced.render_service, busy
+    try:
+        main_enhanced.render_pdf("cv", CV_SPEC["content"])
+        assert False, "expected HTTPException"
+    except HTTPException as e:
+        assert e.status_code == 503 and e.headers["Retry-After"]
+    finally:
+        main_enhanced.render_service = original
+
+if __name__ == "__main__":
+    test_histogram_buckets_and_percentiles()
+    test_workers_render_specs_in_other_processes()
+    test_full_queue_and_timeouts_are_reported()
+    test_hung_render_is_killed_and_capacity_recycled()
+    test_busy_renderer_is_a_503()
+    print("✅ All render service tests passed")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test the async repository layer and that DB waits do not block the event loop
+"""
+
+import sys
+import os
+import asyncio
+import json
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import main_enhanced  # initialises the schema
+from repositories import (
+    run_db, cv_repository, project_repository, chat_message_repository, cv_update_repository, insert_projects
+)
+
+def test_project_and_chat_round_trip():
+    async def scenario():
+        before = await project_repository.count()
+        ids = await run_db(lambda cursor: [
+            cursor.execute("INSERT INTO manual_projects (project_data) VALUES (?)",
+                           ('{"title": "Repo Test %d"}' % i,)).lastrowid
+            for i in range(2)
+        ])
+        assert await project_repository.count() == before + 2
+        rows = await project_repository.get_many(ids + [999999999])
+        assert sorted(rows) == sorted(ids)
+        assert await project_repository.update(ids[0], {"title": "Renamed"})
+        listed = {p["id"]: p for p in await project_repository.list()}
+        assert listed[ids[0]]["title"] == "Renamed"
+        for project_id in ids:
+            assert await project_repository.delete(project_id)
+        assert not await project_repository.delete(ids[0])
+
+        message_id = await chat_message_repository.add("hello repo", "user")
+        assert (await chat_message_repository.page(None, 1))[0][0] == message_id
+
+        update_id = await cv_update_repository.add("skill", "Rust", "I learned Rust")
+        assert ("skill", "Rust") in await cv_update_repository.pending()
+        assert await cv_update_repository.mark_processed() >= 1
+        assert await cv_update_repository.pending() == []
+        return update_id
+
+    assert asyncio.run(scenario())
+
+def test_bulk_project_insert_returns_ids_in_order():
+    async def scenario():
+        projects = [{"title": f"Bulk Project {i}"} for i in range(3)]
+        ids = await run_db(insert_projects, projects)
+        assert await run_db(insert_projects, []) == []
+        rows = await project_repository.get_many(ids)
+        try:
+            assert len(ids) == 3 and ids == sorted(ids)
+            assert [json.loads(rows[project_id])["title"] for project_id in ids] == [p["title"] for p in projects]
+        finally:
+            for project_id in ids:
+                await project_repository.delete(project_id)
+    asyncio.run(scenario())
+
+def test_missing_cv_is_reported():
+    async def scenario():
+        assert await cv_repository.get(999999999) is None
+        assert not await cv_repository.activate(999999999)
+        assert not await cv_repository.update(999999999, title="x")
+    asyncio.run(scenario())
+
+def test_db_wait_does_not_block_event_loop():
+    async def scenario():
+        ticks = []
+
+        async def heartbeat():
+            for _ in range(10):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.02)
+
+        def slow_query(cursor):
+            # Stand-in for a long WAL lock wait
+            time.sleep(0.3)
+            cursor.execute("SELECT 1")
+            return cursor.fetchone()[0]
+
+        result, _ = await asyncio.gather(run_db(slow_query), heartbeat())
+        return result, ticks
+
+    result, ticks = asyncio.run(scenario())
+    gaps = [b - a for a, b in zip(ticks, ticks[1:])]
+    print(f"💓 Longest event-loop gap during DB wait: {max(gaps) * 1000:.0f}ms")
+    assert result == 1
+    assert max(gaps) < 0.15, "event loop stalled while the query was running"
+
+if __name__ == "__main__":
+    test_project_and_chat_round_trip()
+    test_bulk_project_insert_returns_ids_in_order()
+    test_missing_cv_is_reported()
+    test_db_wait_does_not_block_event_loop()
+    print("✅ All repository tests passed")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test FTS5 search over CVs, projects and chat history
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+import main_enhanced
+from db import get_db_cursor_context
+from search import build_match_query
+
+client = TestClient(main_enhanced.app)
+
+def test_match_query_is_sanitised():
+    assert build_match_query('kubernetes "AND" OR (terraf') == '"kubernetes" "AND" "OR" "terraf"*'
+    assert build_match_query("  ?! ") is None
+
+def test_triggers_keep_index_in_sync():
+    project = client.post("/projects/create", json={"title": "Zephyrine Telemetry",
+                                                    "technologies": ["Quokkascript"]}).json()["project"]
+    try:
+        hits = client.get("/search", params={"q": "quokkascript", "scope": "projects"}).json()["results"]
+        assert [hit["id"] for hit in hits] == [project["id"]]
+        assert "<mark>Quokkascript</mark>" in hits[0]["snippet"]
+
+        client.put(f"/projects/{project['id']}", json={"title": "Zephyrine Telemetry", "technologies": ["Go"]})
+        assert client.get("/search", params={"q": "quokkascript", "scope": "projects"}).json()["results"] == []
+    finally:
+        client.delete(f"/projects/{project['id']}")
+    assert client.get("/search", params={"q": "zephyrine", "scope": "projects"}).json()["results"] == []
+
+def test_ranked_results_across_scopes():
+    cv_ids = []
+    with get_db_cursor_context() as (cursor, conn):
+        cursor.execute("INSERT INTO chat_messages (message, message_type) VALUES (?, ?)",
+                       ("I mentored juniors on Flibbertigibbet pipelines", "user"))
+        for title, content in (("Backend CV", "Worked on many things, once on Flibbertigibbet, among other systems"),
+                               ("Flibbertigibbet CV", "Flibbertigibbet Flibbertigibbet engineer")):
+            cursor.execute('''INSERT INTO cvs (title, filename, original_content, current_content)
+                              VALUES (?, ?, ?, ?)''', (title, "search.txt", "x", content))
+            cv_ids.append(cursor.lastrowid)
+    try:
+        body = client.get("/search", params={"q": "flibbertig"}).json()
+        print(f"🔍 {body}")
+        assert {hit["type"] for hit in body["results"]} == {"cvs", "chat"}
+        cv_hits = [hit["id"] for hit in body["results"] if hit["type"] == "cvs"]
+        assert cv_hits == [cv_ids[1], cv_ids[0]], "title match plus repeated term should rank first"
+        # Grouped by scope, each ranked on its own: bm25 scores of different tables do not compare
+        assert [hit["type"] for hit in body["results"]][:2] == ["cvs", "cvs"]
+        assert body["counts"]["cvs"] == 2 and body["counts"]["chat"] >= 1
+        for scope in ("cvs", "chat"):
+            scores = [hit["score"] for hit in body["results"] if hit["type"] == scope]
+            assert scores == sorted(scores, reverse=True)
+
+        # limit applies to each scope, so a strong CV match cannot push the chat hits out
+        limited = client.get("/search", params={"q": "flibbertig", "limit": 1}).json()
+        assert [hit["type"] for hit in limited["results"]] == ["cvs", "chat"]
+        assert limited["results"][0]["id"] == cv_ids[1]
+    finally:
+        for cv_id in cv_ids:
+            client.delete(f"/cvs/{cv_id}")
+
+    assert client.get("/search", params={"q": "x", "scope": "bogus"}).status_code == 400
+
+if __name__ == "__main__":
+    test_match_query_is_sanitised()
+    test_triggers_keep_index_in_sync()
+    test_ranked_results_across_scopes()
+    print("✅ All search tests passed")
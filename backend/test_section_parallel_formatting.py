@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test section-parallel AI formatting for long CVs and concurrent update enhancement
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from types import SimpleNamespace
+import main_enhanced
+from main_enhanced import (
+    split_cv_into_sections, stitch_cv_sections, format_cv_with_ai, enhance_cv_with_openai
+)
+
+SAMPLE_CV = """JOHN DOE
+john.doe@email.com | +1-555-123-4567
+
+EDUCATION
+BSc Computer Science, MIT (2018)
+
+SKILLS
+• Python
+• React
+
+WORK EXPERIENCE
+Senior Engineer at TechCorp
+• Led the platform team
+
+PROFILE SUMMARY
+Engineer with 5+ years of experience.
+"""
+
+class SlowSectionClient:
+    """Fake OpenAI client: every call takes `delay` seconds and upper-cases the section"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.max_tokens = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        self.max_tokens.append(kwargs["max_tokens"])
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        prompt = kwargs["messages"][0]["content"]
+        body = prompt.split("Section Content:\n", 1)[1].split("\n\nReturn only", 1)[0]
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=body.upper()))])
+
+def test_split_and_stitch_keep_document_order():
+    preamble, parts = split_cv_into_sections(SAMPLE_CV)
+    assert preamble[0] == "JOHN DOE"
+    assert [p[0] for p in parts] == ['education', 'skills', 'experience', 'profile']
+
+    # Stitching is the inverse of splitting: the author's section order is kept
+    assert stitch_cv_sections(preamble, parts) == SAMPLE_CV.strip()
+
+def test_parallel_formatting_wall_clock():
+    fake = SlowSectionClient(delay=0.3)
+    previous = main_enhanced.openai_client
+    main_enhanced.openai_client = fake
+    try:
+        started = time.perf_counter()
+        formatted = format_cv_with_ai(SAMPLE_CV, section_parallel=True)
+        elapsed = time.perf_counter() - started
+    finally:
+        main_enhanced.openai_client = previous
+
+    print(f"⏱️ 4 sections formatted in {elapsed:.2f}s (peak concurrency {fake.peak})")
+    assert fake.peak > 1
+    assert elapsed < 0.3 * 4 * 0.75, "wall clock should track the slowest section, not the sum"
+    assert "• PYTHON" in formatted and "BSC COMPUTER SCIENCE, MIT (2018)" in formatted
+    order = [formatted.index(h) for h in ("EDUCATION", "SKILLS", "WORK EXPERIENCE", "PROFILE SUMMARY")]
+    assert order == sorted(order), "formatted sections must stay in document order"
+
+def test_education_updates_are_extracted_concurrently():
+    calls = []
+    extract = main_enhanced.extract_education_from_message
+
+    def slow_extract(message):
+        calls.append(message)
+        time.sleep(0.3)
+        return f"{message}, from MIT"
+
+    main_enhanced.extract_education_from_message = slow_extract
+    try:
+        started = time.perf_counter()
+        enhanced = enhance_cv_with_openai(SAMPLE_CV, [("skill", "Docker"), ("education", "MSc Robotics"),
+                                                      ("education", "PhD Vision")])
+        elapsed = time.perf_counter() - started
+    finally:
+        main_enhanced.extract_education_from_message = extract
+
+    print(f"⏱️ 2 education updates extracted in {elapsed:.2f}s")
+    assert sorted(calls) == ["MSc Robotics", "PhD Vision"]
+    assert elapsed < 0.3 * 2 * 0.9
+    skills_block = enhanced[enhanced.index("SKILLS"):enhanced.index("WORK EXPERIENCE")]
+    assert "• Docker" in skills_block
+    assert enhanced.index("• MSc Robotics, from MIT") < enhanced.index("• PhD Vision, from MIT")
+    assert enhanced.index("EDUCATION") < enhanced.index("SKILLS") < enhanced.index("PROFILE SUMMARY")
+
+if __name__ == "__main__":
+    test_split_and_stitch_keep_document_order()
+    test_parallel_formatting_wall_clock()
+    test_education_updates_are_extracted_concurrently()
+    print("✅ All section-parallel formatting tests passed")
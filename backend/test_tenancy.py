@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test that the authenticated user partitions CVs, projects and chat history between users
+"""
+
+import sys
+import os
+import uuid
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Tokens are signed with this secret; requests without one stay allowed for the other test modules
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+os.environ.setdefault("AUTH_REQUIRED", "false")
+
+from fastapi.testclient import TestClient
+
+import main_enhanced
+from tenancy import auth_headers, issue_token, DEFAULT_USER_ID
+
+client = TestClient(main_enhanced.app)
+
+CV_TEXT = "Jane Tenant\nSoftware Engineer\n\nEXPERIENCE\nBuilt isolated multi-tenant services for five years.\n"
+
+def as_user(user_id):
+    return auth_headers(user_id)
+
+def test_users_do_not_see_each_others_data():
+    alice, bob = f"alice-{uuid.uuid4().hex[:8]}", f"bob-{uuid.uuid4().hex[:8]}"
+
+    # upload_cv is a sync endpoint, so this also covers the threadpool path
+    response = client.post("/upload-cv/", files={"file": ("alice_cv.txt", CV_TEXT.encode())},
+                           data={"extracted_text": CV_TEXT}, headers=as_user(alice))
+    assert response.status_code == 200
+    project = client.post("/projects/create", json={"title": "Alice Only", "description": "Private project"},
+                          headers=as_user(alice))
+    assert project.status_code == 200
+
+    alice_cvs = client.get("/cvs/", headers=as_user(alice)).json()["cvs"]
+    assert [cv["filename"] for cv in alice_cvs] == ["alice_cv.txt"]
+    assert client.get("/cvs/", headers=as_user(bob)).json()["cvs"] == []
+    assert client.get(f"/cvs/{alice_cvs[0]['id']}/versions", headers=as_user(bob)).status_code == 404
+
+    alice_titles = [p["title"] for p in client.get("/projects/", headers=as_user(alice)).json()["projects"]]
+    assert "Alice Only" in alice_titles
+    assert client.get("/projects/", headers=as_user(bob)).json()["total_count"] == 0
+
+    # Bob's upload must not wipe Alice's projects or deactivate her CV
+    client.post("/upload-cv/", files={"file": ("bob_cv.txt", CV_TEXT.encode())},
+                data={"extracted_text": CV_TEXT}, headers=as_user(bob))
+    assert "Alice Only" in [p["title"] for p in client.get("/projects/", headers=as_user(alice)).json()["projects"]]
+    assert [cv["is_active"] for cv in client.get("/cvs/", headers=as_user(alice)).json()["cvs"]] == [True]
+
+def test_user_id_header_is_not_trusted():
+    alice = f"alice-{uuid.uuid4().hex[:8]}"
+    client.post("/upload-cv/", files={"file": ("alice_cv.txt", CV_TEXT.encode())},
+                data={"extracted_text": CV_TEXT}, headers=as_user(alice))
+    # A client-chosen id does not select a tenant; only the token does
+    forged = client.get("/cvs/", headers={"X-User-Id": alice})
+    assert "alice_cv.txt" not in [cv["filename"] for cv in forged.json()["cvs"]]
+    assert [cv["filename"] for cv in client.get("/cvs/", headers=as_user(alice)).json()["cvs"]] == ["alice_cv.txt"]
+
+def test_invalid_tokens_are_rejected():
+    bad_tokens = {
+        "wrong secret": issue_token("mallory", secret="not-the-server-secret"),
+        "expired": issue_token("mallory", expires_in=-10),
+        "default tenant": issue_token(DEFAULT_USER_ID),
+        "garbage": "not.a.token",
+    }
+    for reason, token in bad_tokens.items():
+        response = client.get("/cvs/", headers={"Authorization": f"Bearer {token}"})
+        print(f"🔒 {reason} token -> {response.status_code}")
+        assert response.status_code == 401
+    assert client.get("/cvs/", headers={"Authorization": "Basic YWxpY2U6c2VjcmV0"}).status_code == 401
+
+def test_anonymous_requests_are_rejected_when_auth_is_required():
+    previous = os.environ.get("AUTH_REQUIRED")
+    os.environ["AUTH_REQUIRED"] = "true"
+    try:
+        response = client.get("/cvs/")
+        assert response.status_code == 401
+        assert response.headers["WWW-Authenticate"] == "Bearer"
+        # The health check and CORS preflights stay reachable
+        assert client.get("/").status_code == 200
+        assert client.get("/cvs/", headers=as_user(f"carol-{uuid.uuid4().hex[:8]}")).status_code == 200
+    finally:
+        os.environ["AUTH_REQUIRED"] = previous
+
+if __name__ == "__main__":
+    test_users_do_not_see_each_others_data()
+    test_user_id_header_is_not_trusted()
+    test_invalid_tokens_are_rejected()
+    test_anonymous_requests_are_rejected_when_auth_is_required()
+    print("✅ All tenancy tests passed")
@@ -0,0 +1,46 @@
+import axios from 'axios'
+import { supabase } from './supabaseClient'
+
+// The backend identifies the user from their Supabase access token
+const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8081'
+const BACKEND_URLS = [API_BASE_URL, 'http://localhost:8081']
+
+const isBackendUrl = (url) => typeof url === 'string' && BACKEND_URLS.some((base) => url.startsWith(base))
+
+const accessToken = async () => {
+  const { data: { session } } = await supabase.auth.getSession()
+  return session?.access_token ?? null
+}
+
+let installed = false
+
+export const installApiAuth = () => {
+  if (installed) return
+  installed = true
+
+  axios.interceptors.request.use(async (config) => {
+    const url = config.baseURL ? `${config.baseURL}${config.url}` : config.url
+    if (isBackendUrl(url)) {
+      const token = await accessToken()
+      if (token) {
+        config.headers = { ...config.headers, Authorization: `Bearer ${token}` }
+      }
+    }
+    return config
+  })
+
+  const originalFetch = window.fetch.bind(window)
+  window.fetch = async (input, init = {}) => {
+    const url = typeof input === 'string' ? input : input?.url
+    if (!isBackendUrl(url)) {
+      return originalFetch(input, init)
+    }
+    const token = await accessToken()
+    if (!token) {
+      return originalFetch(input, init)
+    }
+    const headers = new Headers(init.headers || (typeof input === 'string' ? undefined : input.headers))
+    headers.set('Authorization', `Bearer ${token}`)
+    return originalFetch(input, { ...init, headers })
+  }
+}
@@ -322,6 +322,13 @@ const MessagesContainer = styled.div`
   }
 `;
 
+const OlderMessagesNotice = styled.div`
+  text-align: center;
+  font-size: 0.8rem;
+  color: var(--text-secondary);
+  margin-bottom: 15px;
+`;
+
 const Message = styled.div`
   margin-bottom: 20px;
   display: flex;
@@ -685,7 +692,12 @@ function ChatInterface({ cvUploaded, onCVUpdate }) {
   const [inputValue, setInputValue] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const [lastUpdateCheck, setLastUpdateCheck] = useState(Date.now());
+  const [olderBeforeId, setOlderBeforeId] = useState(null);
+  const [isLoadingOlder, setIsLoadingOlder] = useState(false);
   const messagesEndRef = useRef(null);
+  const messagesContainerRef = useRef(null);
+  // scrollHeight before older messages were prepended, so the view stays where the user was reading
+  const prependedFromHeightRef = useRef(null);
   const { user } = useAuth();
 
   useEffect(() => {
@@ -694,24 +706,49 @@ function ChatInterface({ cvUploaded, onCVUpdate }) {
     }
   }, [cvUploaded]);
 
+  const formatHistory = (chatHistory) => chatHistory.map(msg => ({
+    id: msg.id,
+    text: msg.message,
+    sender: msg.type === 'user' ? 'user' : 'ai',
+    timestamp: new Date(msg.timestamp)
+  }));
+
+  // The history is paged newest first; X-Next-Before-Id points at the next older page
+  const nextBeforeId = (response) => response.headers['x-next-before-id'] || null;
+
   const loadChatHistory = async () => {
     try {
       const response = await axios.get(`${API_BASE_URL}/chat/history/`);
-      const chatHistory = response.data || [];
-      
-      const formattedMessages = chatHistory.map(msg => ({
-        id: msg.id,
-        text: msg.message,
-        sender: msg.type === 'user' ? 'user' : 'ai',
-        timestamp: new Date(msg.timestamp)
-      }));
-      
-      setMessages(formattedMessages);
+      setMessages(formatHistory(response.data || []));
+      setOlderBeforeId(nextBeforeId(response));
     } catch (error) {
       console.error('Error loading chat history:', error);
     }
   };
 
+  const loadOlderMessages = async () => {
+    if (!olderBeforeId || isLoadingOlder) return;
+    setIsLoadingOlder(true);
+    try {
+      const response = await axios.get(`${API_BASE_URL}/chat/history/`, {
+        params: { before_id: olderBeforeId }
+      });
+      prependedFromHeightRef.current = messagesContainerRef.current?.scrollHeight ?? null;
+      setMessages(prev => [...formatHistory(response.data || []), ...prev]);
+      setOlderBeforeId(nextBeforeId(response));
+    } catch (error) {
+      console.error('Error loading older chat messages:', error);
+    } finally {
+      setIsLoadingOlder(false);
+    }
+  };
+
+  const handleMessagesScroll = (event) => {
+    if (event.currentTarget.scrollTop < 40) {
+      loadOlderMessages();
+    }
+  };
+
   const detectCrudOperation = (userMessage, aiResponse) => {
     const msg = userMessage.toLowerCase();
     const response = aiResponse.toLowerCase();
@@ -832,6 +869,13 @@ function ChatInterface({ cvUploaded, onCVUpdate }) {
   };
 
   useEffect(() => {
+    const container = messagesContainerRef.current;
+    if (prependedFromHeightRef.current !== null && container) {
+      // Older messages went in above: keep the same message in view instead of jumping to the end
+      container.scrollTop = container.scrollHeight - prependedFromHeightRef.current;
+      prependedFromHeightRef.current = null;
+      return;
+    }
     scrollToBottom();
   }, [messages, isLoading]);
 
@@ -918,7 +962,7 @@ function ChatInterface({ cvUploaded, onCVUpdate }) {
         </>
       )}
       
-      <MessagesContainer>
+      <MessagesContainer ref={messagesContainerRef} onScroll={handleMessagesScroll}>
         {!cvUploaded ? (
           <PlaceholderMessage>
             <span className="placeholder-icon">📤</span>
@@ -941,6 +985,11 @@ function ChatInterface({ cvUploaded, onCVUpdate }) {
           </PlaceholderMessage>
         ) : (
           <>
+            {(olderBeforeId || isLoadingOlder) && (
+              <OlderMessagesNotice>
+                {isLoadingOlder ? 'Loading earlier messages…' : 'Scroll up for earlier messages'}
+              </OlderMessagesNotice>
+            )}
             {messages.map(message => (
               <Message key={message.id} isUser={message.sender === 'user'}>
                 <MessageWithAvatar isUser={message.sender === 'user'}>
@@ -2,6 +2,10 @@ import React from 'react';
 import ReactDOM from 'react-dom/client';
 import './index.css';
 import App from './App';
+import { installApiAuth } from './apiAuth';
+
+// Every backend request carries the signed-in user's access token
+installApiAuth();
 
 const root = ReactDOM.createRoot(document.getElementById('root'));
 root.render(